@@ -3,15 +3,19 @@ FastAPI Backend for Personal Knowledge Assistant
 Serves the Next.js frontend
 """
 
+import json
 import logging
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from pathlib import Path
+from typing import Optional
 
 from assistant import HybridAssistant
 from config import Config
 from backend.utils import get_api_logger
+from backend.core.llm import LLMOverloadedError, limiter_stats, llm_registry
 
 # Configure root logger to capture all module logs
 logging.basicConfig(
@@ -39,6 +43,11 @@ assistant: HybridAssistant = None
 
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None  # Conversation to continue (no history without one)
+
+
+class ClearRequest(BaseModel):
+    session_id: str  # Required: a client may only clear its own conversation
 
 
 class ChatResponse(BaseModel):
@@ -69,20 +78,41 @@ async def get_status():
     }
 
 
+async def _replace_assistant(force_rebuild: bool) -> HybridAssistant:
+    """Build and initialize a new assistant, then release the one it replaces"""
+    global assistant
+    
+    new_assistant = HybridAssistant(llm_provider=Config.LLM_PROVIDER)
+    try:
+        new_assistant.initialize(force_rebuild=force_rebuild)
+    except Exception:
+        await new_assistant.aclose()
+        raise
+    
+    old_assistant, assistant = assistant, new_assistant
+    if old_assistant is not None:
+        await old_assistant.aclose()
+    return new_assistant
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the assistant's connections and threads"""
+    if assistant is not None:
+        await assistant.aclose()
+
+
 @app.post("/api/initialize")
 async def initialize():
     """Initialize the assistant"""
     global assistant
     
     try:
-        if not Config.COHERE_API_KEY:
+        if Config.LLM_PROVIDER != "mock" and not Config.COHERE_API_KEY:
             raise HTTPException(status_code=400, detail="Cohere API key not configured")
         
         logger.info(" Initializing assistant...")
-        assistant = HybridAssistant(llm_provider=Config.LLM_PROVIDER)
-        assistant.initialize(force_rebuild=False)
-        
-        stats = assistant.get_stats()
+        stats = (await _replace_assistant(force_rebuild=False)).get_stats()
         kb_path = Path(Config.KNOWLEDGE_BASE_PATH)
         pdf_count = len(list(kb_path.glob("*.pdf"))) if kb_path.exists() else 0
         
@@ -107,24 +137,51 @@ async def chat(message: ChatMessage):
         raise HTTPException(status_code=400, detail="Assistant not initialized")
     
     try:
-        response = assistant.ask(message.message)
+        response = await assistant.aask(message.message, message.session_id)
         return ChatResponse(
             answer=response["answer"],
             source_type=response["source_type"],
             sources=response["sources"]
         )
+    except LLMOverloadedError as e:
+        logger.warning(f"Chat shed: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"})
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(events):
+    """Format assistant stream events as Server-Sent Events"""
+    for event in events:
+        name = event.pop("event")
+        # default=float: relevance scores may be numpy floats
+        yield f"event: {name}\ndata: {json.dumps(event, default=float)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Chat with the assistant, streaming tokens as Server-Sent Events"""
+    global assistant
+    
+    if not assistant or not assistant.is_initialized:
+        raise HTTPException(status_code=400, detail="Assistant not initialized")
+    
+    # Sync generator: Starlette iterates it in a worker thread
+    return StreamingResponse(
+        _sse(assistant.ask_stream(message.message, message.session_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/clear")
-async def clear_chat():
-    """Clear chat history"""
+async def clear_chat(request: ClearRequest):
+    """Clear one session's chat history"""
     global assistant
     
     if assistant:
-        assistant.clear_memory()
+        assistant.clear_memory(request.session_id)
         return {"status": "cleared"}
     
     return {"status": "no assistant"}
@@ -137,10 +194,7 @@ async def rebuild_kb():
     
     try:
         logger.info(" Rebuilding knowledge base...")
-        assistant = HybridAssistant(llm_provider=Config.LLM_PROVIDER)
-        assistant.initialize(force_rebuild=True)
-        
-        stats = assistant.get_stats()
+        stats = (await _replace_assistant(force_rebuild=True)).get_stats()
         return {
             "status": "rebuilt",
             "documents": stats['vector_store'].get('document_count', 0)
@@ -150,6 +204,20 @@ async def rebuild_kb():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.delete("/api/documents/{filename}")
+async def delete_document(filename: str):
+    """Remove a PDF's chunks from the knowledge base"""
+    if not assistant or not assistant.is_initialized:
+        raise HTTPException(status_code=400, detail="Assistant not initialized")
+    
+    try:
+        deleted = assistant.delete_document(filename)
+        return {"status": "deleted", "filename": filename, "chunks_deleted": deleted}
+    except Exception as e:
+        logger.error(f"Delete failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/cache/stats")
 async def get_cache_stats():
     """Get Redis cache statistics"""
@@ -162,7 +230,7 @@ async def get_cache_stats():
 async def clear_cache():
     """Clear Redis cache"""
     if assistant and assistant.is_initialized:
-        success = assistant.cache_manager.invalidate_cache()
+        success = await assistant.async_cache_manager.invalidate_cache()
         return {
             "status": "cleared" if success else "failed",
             "message": "Cache cleared successfully" if success else "Failed to clear cache"
@@ -170,6 +238,23 @@ async def clear_cache():
     return {"error": "Assistant not initialized"}
 
 
+@app.post("/api/cache/warm")
+async def warm_cache(limit: int = 100):
+    """Regenerate answers to frequent recent questions in the background"""
+    if assistant and assistant.is_initialized:
+        return assistant.warm_cache(limit)
+    return {"error": "Assistant not initialized"}
+
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """LLM limiter queue depth, wait times and shed counts, shared clients and routing health"""
+    stats = {"limits": limiter_stats(), "clients": llm_registry.get_stats()}
+    if assistant and assistant.is_initialized:
+        stats["routing"] = assistant.get_stats()["llm_routing"]
+    return stats
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
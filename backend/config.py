@@ -19,14 +19,52 @@ class Settings:
     # LLM Provider: "cohere", "groq", "openai"
     LLM_PROVIDER = os.getenv("LLM_PROVIDER", "cohere")
     
-    # Self-Reflection for better answers
+    # Self-Reflection for better answers: runs in the background after the
+    # answer is returned, on a sample of knowledge-base answers plus every
+    # answer whose best retrieval score is below REFLECTION_LOW_CONFIDENCE;
+    # improved answers replace the cached ones
     ENABLE_REFLECTION = os.getenv("ENABLE_REFLECTION", "false").lower() == "true"
+    REFLECTION_SAMPLE_RATE = float(os.getenv("REFLECTION_SAMPLE_RATE", "0.1"))
+    REFLECTION_LOW_CONFIDENCE = float(os.getenv("REFLECTION_LOW_CONFIDENCE", "0.3"))
+    REFLECTION_WORKERS = 1
+    
+    # Prompt version: bump when prompts change so cached answers are not reused
+    PROMPT_VERSION = "1"
     
     # API Keys
     COHERE_API_KEY = os.getenv("COHERE_API_KEY")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     
+    # LLM routing: fail over to these providers (comma-separated, keys required) and
+    # optionally hedge calls slower than the primary's LLM_HEDGE_PERCENTILE latency
+    LLM_FALLBACK_PROVIDERS = [name.strip() for name in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",") if name.strip()]
+    LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE = 95
+    
+    # LLM call limiter, per provider and process-wide: calls beyond the concurrency
+    # cap, token bucket (requests/second, LLM_BURST deep) or requests per minute wait
+    # in a FIFO queue; a full queue or a LLM_QUEUE_TIMEOUT_SECONDS wait fails fast
+    # with HTTP 503. 0 disables a limit.
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0"))
+    LLM_BURST = int(os.getenv("LLM_BURST", "0"))  # 0 = one second of requests
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+    # Per-provider overrides, e.g. {"groq": {"requests_per_minute": 30}}
+    LLM_PROVIDER_LIMITS = {}
+    # Client-side retries per call (each retry of a 429 adds load; failover handles the rest)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+    
+    # LLM_PROVIDER=mock: offline, deterministic answers with simulated latency
+    MOCK_LLM_RESPONSE = os.getenv("MOCK_LLM_RESPONSE", "This is a mock answer to: {question}")
+    MOCK_LLM_RESPONSE_TOKENS = int(os.getenv("MOCK_LLM_RESPONSE_TOKENS", "150"))  # Padded with filler words
+    MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "300"))  # Median time to first token
+    MOCK_LLM_LATENCY_SIGMA = float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0"))  # 0 = fixed, else lognormal spread
+    MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "0"))  # 0 = no generation time
+    MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED", "42"))
+    
     # Paths
     BASE_DIR = Path(__file__).parent.parent
     KNOWLEDGE_BASE_PATH = BASE_DIR / "data" / "knowledge_base"
@@ -40,10 +78,103 @@ class Settings:
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
     
+    # Chunk length unit: "chars" or "tokens" (embedding-model word-pieces)
+    # Token mode sizes chunks to the embedding window so nothing is truncated
+    CHUNK_LENGTH_UNIT = os.getenv("CHUNK_LENGTH_UNIT", "chars")
+    CHUNK_TOKEN_OVERLAP = 32  # Overlap in tokens when CHUNK_LENGTH_UNIT=tokens
+    
+    # Splitter: "native" (offset-based, faster) or "langchain" (RecursiveCharacterTextSplitter)
+    CHUNK_SPLITTER = os.getenv("CHUNK_SPLITTER", "native")
+    
+    # Embedding Settings
+    # Backend: "torch" (HuggingFace/PyTorch) or "onnx" (ONNX Runtime, faster on CPU)
+    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_MAX_TOKENS = 256  # Model sequence limit; longer input is truncated
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "false").lower() == "true"  # int8 weights
+    ONNX_MODEL_DIR = BASE_DIR / "data" / "onnx"
+    
+    # Deduplication: drop exact/near-duplicate chunks before embedding (opt-in)
+    ENABLE_DEDUP = os.getenv("ENABLE_DEDUP", "false").lower() == "true"
+    DEDUP_MAX_DISTANCE = 4  # SimHash bits that may differ (64-bit fingerprints)
+    DEDUP_MAX_ENTRIES = 100000  # Kept-chunk hashes remembered (~100 bytes each)
+    
     # Vector Search Settings
     TOP_K_RESULTS = 2
     SIMILARITY_THRESHOLD = 0.2
     
+    # RAG context packing: highest-scoring chunks up to CONTEXT_MAX_TOKENS, chunk
+    # overlap removed, optionally only sentences sharing words with the question
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+    CONTEXT_TRIM_SENTENCES = os.getenv("CONTEXT_TRIM_SENTENCES", "false").lower() == "true"
+    CONTEXT_TOKEN_COUNT = os.getenv("CONTEXT_TOKEN_COUNT", "approx")  # approx (~4 chars/token) or tokenizer (EMBEDDING_MODEL's)
+    # Longest text match stripped between chunks of different pages or sources (no
+    # offsets to compare); unset: derived from the splitter, see context_max_overlap_chars
+    CONTEXT_MAX_OVERLAP_CHARS = int(os.getenv("CONTEXT_MAX_OVERLAP_CHARS") or 0) or None
+    
+    # Answer Cache Settings
+    # L1: in-process LRU in front of Redis (0 bytes disables it)
+    L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    L1_CACHE_TTL_SECONDS = 60  # Short, so other workers' invalidations are picked up
+    CACHE_PUBSUB_INVALIDATION = os.getenv("CACHE_PUBSUB_INVALIDATION", "false").lower() == "true"
+    
+    # Redis connection pool
+    REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
+    REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_HEALTH_CHECK_INTERVAL = 30  # Seconds idle before a connection is PINGed
+    REDIS_RETRIES = 3  # Retries on connection errors, exponential backoff
+    REDIS_TIMEOUT_SECONDS = 2  # Longest a cache call blocks on an unreachable Redis, retries included
+    
+    # Local fallback used while Redis is unreachable (empty path disables it)
+    CACHE_FALLBACK_PATH = os.getenv("CACHE_FALLBACK_PATH", str(BASE_DIR / "data" / "cache" / "fallback.sqlite3"))
+    CACHE_FALLBACK_MAX_BYTES = 64 * 1024 * 1024
+    REDIS_RECONNECT_INTERVAL = 30  # Seconds between reconnection attempts
+    
+    # Semantic cache: reuse answers of near-identical questions (cosine similarity, opt-in:
+    # a false hit serves another question's answer, so tune the threshold on real traffic)
+    ENABLE_SEMANTIC_CACHE = os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+    SEMANTIC_CACHE_MAX_ENTRIES = 10000
+    SEMANTIC_CACHE_SAMPLE_RATE = 0.05  # Fraction of semantic hits kept for false-hit review
+    
+    # Coalesce concurrent misses for the same question: "process", "redis" (across workers) or "off"
+    SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "process")
+    SINGLE_FLIGHT_LOCK_TIMEOUT = 60  # Redis lock expiry, covers a crashed leader
+    
+    # Conversation memory: "memory" (per worker) or "redis" (shared, any worker serves any session)
+    SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+    MAX_SESSIONS = 10000  # Least recently used sessions are evicted beyond this
+    SESSION_IDLE_TTL_SECONDS = 3600
+    # Chat history in prompts: the last HISTORY_KEEP_TURNS exchanges word for word, older
+    # ones folded into a running summary in the background ("extractive", or "llm", whose
+    # summary calls queue on the same provider limiter as answers)
+    HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "2"))
+    HISTORY_SUMMARIZER = os.getenv("HISTORY_SUMMARIZER", "extractive")
+    HISTORY_SUMMARY_MAX_CHARS = 1200
+    
+    # Threads for embedding + vector search on the async request path
+    ASYNC_RETRIEVAL_WORKERS = int(os.getenv("ASYNC_RETRIEVAL_WORKERS", "8"))
+    
+    # Cached answer encoding: "orjson", "msgpack" or "json" (legacy text, readable by older workers)
+    CACHE_FORMAT = os.getenv("CACHE_FORMAT", "orjson")
+    CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "")  # "zstd" or empty
+    CACHE_COMPRESS_MIN_BYTES = 1024  # Smaller entries are stored uncompressed
+    
+    # Stale-while-revalidate (opt-in): after the 24h TTL, answers are served stale
+    # for this many more hours while one background task regenerates them (0: off)
+    CACHE_STALE_TTL_HOURS = float(os.getenv("CACHE_STALE_TTL_HOURS", "0"))
+    REVALIDATE_WORKERS = 2  # Concurrent background refreshes
+    
+    # Cache warming: regenerate the most frequent questions of the last
+    # CACHE_WARM_DAYS (Redis query counter + logs/app.log) on startup
+    ENABLE_CACHE_WARMING = os.getenv("ENABLE_CACHE_WARMING", "false").lower() == "true"
+    CACHE_WARM_LIMIT = int(os.getenv("CACHE_WARM_LIMIT", "100"))
+    CACHE_WARM_DAYS = 7
+    CACHE_WARM_RATE = float(os.getenv("CACHE_WARM_RATE", "0.5"))  # Generations started per second
+    CACHE_WARM_CONCURRENCY = 2  # Concurrent LLM calls while warming
+    
     # LLM Settings
     LLM_TEMPERATURE = 0.3
     MAX_CHAT_HISTORY = 5
@@ -52,6 +183,19 @@ class Settings:
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", "8000"))
     
+    @classmethod
+    def context_max_overlap_chars(cls):
+        """
+        Cap on the overlap the context builder looks for between chunks
+
+        In chars mode the splitter never overlaps more than CHUNK_OVERLAP.
+        CHUNK_TOKEN_OVERLAP tokens have no fixed length in characters, so in
+        tokens mode only the chunks' own lengths bound the match (None).
+        """
+        if cls.CONTEXT_MAX_OVERLAP_CHARS:
+            return cls.CONTEXT_MAX_OVERLAP_CHARS
+        return cls.CHUNK_OVERLAP if cls.CHUNK_LENGTH_UNIT == "chars" else None
+    
     @classmethod
     def ensure_directories(cls):
         """Ensure required directories exist"""
@@ -1,5 +1,35 @@
 """Cache module initialization"""
 
+from backend.core.cache.local_cache import LocalLRUCache
+from backend.core.cache.serialization import AnswerCodec
+from backend.core.cache.sqlite_cache import SQLiteCache
+from backend.core.cache.fallback import OutageFallback, Reconnector
+from backend.core.cache.invalidation import InvalidationListener
+from backend.core.cache.freshness import SoftExpiry
+from backend.core.cache.semantic_cache import SemanticAnswerCache
 from backend.core.cache.redis_manager import RedisCacheManager
+from backend.core.cache.async_redis_manager import AsyncRedisCacheManager
+from backend.core.cache.single_flight import (
+    SingleFlight, RedisSingleFlight, AsyncSingleFlight, AsyncRedisSingleFlight
+)
+from backend.core.cache.revalidation import StaleRevalidator
+from backend.core.cache.warmer import CacheWarmer
 
-__all__ = ['RedisCacheManager']
+__all__ = [
+    'LocalLRUCache',
+    'AnswerCodec',
+    'SQLiteCache',
+    'OutageFallback',
+    'Reconnector',
+    'InvalidationListener',
+    'SoftExpiry',
+    'SemanticAnswerCache',
+    'RedisCacheManager',
+    'AsyncRedisCacheManager',
+    'SingleFlight',
+    'RedisSingleFlight',
+    'AsyncSingleFlight',
+    'AsyncRedisSingleFlight',
+    'StaleRevalidator',
+    'CacheWarmer'
+]
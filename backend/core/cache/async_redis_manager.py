@@ -0,0 +1,214 @@
+"""
+Asyncio Redis Cache Manager
+Non-blocking counterpart of RedisCacheManager for async routes
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, List, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+
+from backend.core.cache.redis_manager import RedisCacheManager
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRedisCacheManager:
+    """
+    Q&A cache on redis.asyncio, sharing keys and L1 with a RedisCacheManager
+
+    Key layout, generation, L1 tier and serialization all come from the
+    wrapped sync manager, so both clients read and write the same entries;
+    only the network calls differ (awaited, on their own connection pool).
+    """
+
+    def __init__(self, cache: RedisCacheManager):
+        """
+        Args:
+            cache: Sync manager whose settings, keys and L1 tier are shared
+        """
+        self.cache = cache
+
+        # Connects lazily, so it is usable as soon as the sync manager
+        # reports Redis as (back) up
+        params = dict(cache.connection_params)
+        self.pool = aioredis.BlockingConnectionPool(timeout=cache.timeout, **params)
+        self.redis_client = aioredis.Redis(
+            connection_pool=self.pool,
+            retry=Retry(ExponentialBackoff(), cache.retries),
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache.enabled
+
+    async def _local(self, fn, *args):
+        """Run a sync manager call (local tiers: SQLite reads and writes) in a worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _get_generation(self) -> int:
+        """Current generation, refreshed through the shared sync manager's state"""
+        cache = self.cache
+        now = time.monotonic()
+        if self.enabled and now - cache._generation_read_at >= cache.generation_refresh_seconds:
+            try:
+                cache._generation = int(await self.redis_client.get(cache.generation_key) or 0)
+                cache._generation_read_at = now
+            except Exception as e:
+                logger.error(f"Error reading cache generation: {e}")
+        return cache._generation
+
+    async def get_cached_answer(self, question: str, semantic: bool = True) -> Optional[Dict]:
+        """Retrieve a cached answer without blocking the event loop"""
+        cache = self.cache
+        response = (await self.get_many([question]))[0]
+        if response is not None or cache.semantic is None or not semantic:
+            return response
+
+        try:
+            # Embedding the question is CPU-bound: keep it (and the lookup of
+            # the matched question's answer) off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, cache.semantic.find_answer, question, cache._get_exact
+            )
+        except Exception as e:
+            logger.error(f"Error in semantic cache lookup: {e}")
+            return None
+
+    async def get_many(self, questions: List[str]) -> List[Optional[Dict]]:
+        """L1 first, then one MGET for the rest; None for misses"""
+        cache = self.cache
+        if not self.enabled:
+            # Local tiers only (L1 and the on-disk fallback)
+            return await self._local(cache.get_many, questions)
+
+        generation = await self._get_generation()
+        keys = [cache._key_for(question, generation) for question in questions]
+        results = [cache._from_l1(key) for key in keys]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        try:
+            values = await self.redis_client.mget([keys[i] for i in missing])
+            for i, cached_data in zip(missing, values):
+                if cached_data:
+                    results[i] = cache._decode_hit(keys[i], cached_data)
+        except Exception as e:
+            logger.error(f"Error retrieving from cache: {e}")
+            cache._on_redis_error(e)
+            if not self.enabled:
+                return await self._local(cache.get_many, questions)
+        return results
+
+    async def cache_answer(
+        self, question: str, response: Dict, source_files: List[str] = None, semantic: bool = True
+    ) -> bool:
+        """Cache a question-answer pair"""
+        cached = await self.cache_many([(question, response, source_files)])
+        if cached and self.cache.semantic is not None and semantic:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.cache.semantic.add, question)
+            except Exception as e:
+                logger.error(f"Error indexing question for semantic cache: {e}")
+        return cached
+
+    async def cache_many(self, entries: List[Tuple[str, Dict, List[str]]]) -> bool:
+        """Cache several (question, response, source_files) entries in one pipeline"""
+        cache = self.cache
+        if not entries:
+            return True
+        if not self.enabled:
+            return await self._local(cache.cache_many, entries)
+
+        try:
+            generation = await self._get_generation()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for question, response, source_files in entries:
+                cache_key = cache._key_for(question, generation)
+                cached_data = cache._encode(cache_key, response)
+                cache._queue_write(pipe, cache_key, cached_data, source_files)
+
+            await pipe.execute()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error caching answer: {e}")
+            cache._on_redis_error(e)
+            if not self.enabled:
+                return await self._local(cache.cache_many, entries)
+            return False
+
+    async def invalidate_cache(self, question: str = None) -> bool:
+        """
+        Invalidate one question, or everything by starting a new generation
+
+        Entries of older generations are then pruned in a worker thread;
+        use the sync manager's invalidate_cache(purge=True) to delete
+        everything eagerly.
+        """
+        cache = self.cache
+        if not self.enabled:
+            return await self._local(cache.invalidate_cache, question)
+        if not question and cache.semantic is not None:
+            cache.semantic.clear()
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            if question:
+                cache_key = cache._key_for(question, await self._get_generation())
+                if cache.l1 is not None:
+                    cache.l1.delete(cache_key)
+                pipe.unlink(cache_key)
+                pipe.zrem(cache.index_key, cache_key)
+                message = cache_key
+            else:
+                pipe.incr(cache.generation_key)
+                message = "*"
+            if cache.invalidations is not None and cache.invalidations.listening:
+                pipe.publish(cache.invalidations.channel, message)
+            result = await pipe.execute()
+
+            if question:
+                logger.info(f"🗑️ Invalidated cache for: {question[:50]}...")
+                return result[0] > 0
+
+            cache._generation = int(result[0])
+            cache._generation_read_at = time.monotonic()
+            if cache.l1 is not None:
+                cache.l1.clear()
+            logger.info(f"🔄 Cache generation is now {cache._generation}")
+            cache._schedule_prune(cache._generation)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error invalidating cache: {e}")
+            return False
+
+    async def record_query(self, question: str) -> None:
+        """Count a question for cache warming (buffered with the sync manager's counts)"""
+        cache = self.cache
+        counts = cache._count_query(question)
+        if not counts or not self.enabled:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            cache._queue_query_counts(pipe, counts)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording question frequency: {e}")
+
+    async def close(self):
+        """Close the asyncio connection pool"""
+        try:
+            await self.redis_client.aclose()
+            await self.pool.disconnect()
+        except Exception as e:
+            logger.error(f"Error closing async Redis connection: {e}")
@@ -0,0 +1,109 @@
+"""
+Redis Outage Handling
+Reconnects in the background and keeps answers on local disk until Redis is back
+"""
+
+import logging
+import threading
+from typing import Any, Callable, List, Tuple
+
+from backend.core.cache.sqlite_cache import SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+# (cache key, serialized answer, source files, seconds left) of an unsynced entry
+PendingEntry = Tuple[str, bytes, List[str], float]
+
+
+class Reconnector:
+    """
+    Pings Redis in the background until it answers, then calls resume()
+
+    Runs while Redis is marked unavailable, so requests skip it instead of
+    each waiting for a connect timeout. A failing resume() is retried on
+    the next interval.
+    """
+
+    def __init__(self, interval: float = 30):
+        """
+        Args:
+            interval: Seconds between reconnection attempts
+        """
+        self.interval = interval
+        self._thread = None
+        self._closed = threading.Event()
+
+    def start(self, ping: Callable[[], Any], resume: Callable[[], None]) -> None:
+        """Start reconnecting (no-op if already running or closed)"""
+        if self._closed.is_set() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(ping, resume), name="redis-reconnect", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, ping: Callable[[], Any], resume: Callable[[], None]) -> None:
+        while not self._closed.wait(self.interval):
+            try:
+                ping()
+            except Exception:
+                continue
+
+            logger.info("✅ Redis cache reconnected")
+            try:
+                resume()
+            except Exception as e:
+                logger.error(f"Error resuming Redis cache: {e}")
+                continue
+            return
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+class OutageFallback:
+    """
+    Local answer store used while Redis is unreachable
+
+    Answers written during an outage are flagged pending in the SQLite
+    store and handed back for writing to Redis once it recovers.
+    """
+
+    def __init__(self, store: SQLiteCache):
+        """
+        Args:
+            store: On-disk answer store (survives restarts)
+        """
+        self.store = store
+
+    @property
+    def path(self) -> str:
+        return str(self.store.path)
+
+    def write_back(self, write: Callable[[List[PendingEntry]], None], batch_size: int = 500) -> int:
+        """
+        Hand answers cached during the outage to write(), one batch at a time
+
+        Entries are marked synced only after write() returns.
+
+        Returns:
+            Entries written back
+        """
+        written = 0
+        while True:
+            entries = self.store.pending(batch_size)
+            if not entries:
+                break
+            write(entries)
+            self.store.mark_synced([entry[0] for entry in entries])
+            written += len(entries)
+
+        if written:
+            logger.info(f"💾 Wrote back {written} answers cached during the Redis outage")
+        return written
+
+    def close(self) -> None:
+        self.store.close()
@@ -0,0 +1,43 @@
+"""
+Soft Expiry
+Marks cached answers stale after a soft TTL, for stale-while-revalidate
+"""
+
+import time
+from typing import Dict, Optional
+
+SOFT_EXPIRY_FIELD = '_soft_expires_at'
+
+
+class SoftExpiry:
+    """
+    Stamps answers with a soft expiry time when cached and flags them stale once it passes
+
+    Redis keeps the answer until the hard TTL, so a stale answer can still
+    be served while a background task regenerates it.
+    """
+
+    def __init__(self, soft_ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            soft_ttl_seconds: Seconds until a cached answer turns stale (None: never stamped)
+        """
+        self.soft_ttl_seconds = soft_ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.soft_ttl_seconds is not None
+
+    def stamp(self, response: Dict) -> Dict:
+        """Add the soft expiry to a response about to be cached"""
+        if self.enabled:
+            response[SOFT_EXPIRY_FIELD] = time.time() + self.soft_ttl_seconds
+        return response
+
+    @staticmethod
+    def check(response: Dict) -> Dict:
+        """Strip the stored soft expiry and flag the response as stale once it has passed"""
+        soft_expires_at = response.pop(SOFT_EXPIRY_FIELD, None)
+        if soft_expires_at is not None and time.time() >= soft_expires_at:
+            response['stale'] = True
+        return response
@@ -0,0 +1,88 @@
+"""
+Cross-Worker Cache Invalidation
+Pub/sub channel over which workers tell each other to drop in-process (L1) entries
+"""
+
+import logging
+from typing import Callable, Dict
+
+from backend.core.cache.local_cache import LocalLRUCache
+
+logger = logging.getLogger(__name__)
+
+# How long the listener thread blocks waiting for a message (bounds close())
+POLL_SECONDS = 1.0
+
+
+class InvalidationListener:
+    """
+    Publishes invalidations and applies the ones other workers publish
+
+    A message is either a cache key (drop that L1 entry) or "*" (drop all
+    of L1 and call on_clear_all, e.g. to re-read the generation). Nothing
+    is published or received until start() succeeds.
+    """
+
+    def __init__(self, redis_client, channel: str, l1: LocalLRUCache, on_clear_all: Callable[[], None] = None):
+        """
+        Args:
+            redis_client: Sync Redis client
+            channel: Pub/sub channel shared by all workers
+            l1: In-process tier the messages apply to
+            on_clear_all: Called after a "*" message cleared L1
+        """
+        self.redis_client = redis_client
+        self.channel = channel
+        self.l1 = l1
+        self.on_clear_all = on_clear_all
+        self._pubsub = None
+        self._thread = None
+
+    @property
+    def listening(self) -> bool:
+        return self._pubsub is not None
+
+    def start(self) -> bool:
+        """Subscribe in a background thread (no-op if already listening)"""
+        if self.listening:
+            return True
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: self._on_message})
+            self._thread = self._pubsub.run_in_thread(sleep_time=POLL_SECONDS, daemon=True)
+            logger.info(f"📡 Listening for cache invalidations on {self.channel}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Cache invalidation listener unavailable: {e}")
+            self._pubsub = None
+            return False
+
+    def _on_message(self, message: Dict) -> None:
+        data = message.get('data')
+        if isinstance(data, bytes):
+            data = data.decode()
+        if data == "*":
+            self.l1.clear()
+            if self.on_clear_all is not None:
+                self.on_clear_all()
+        elif data:
+            self.l1.delete(data)
+
+    def publish(self, data: str) -> None:
+        """Tell other workers to drop L1 entries (no-op while not listening)"""
+        if not self.listening:
+            return
+        try:
+            self.redis_client.publish(self.channel, data)
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {e}")
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            # The thread may be reading the connection: wait before closing it
+            self._thread.join(timeout=2 * POLL_SECONDS)
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
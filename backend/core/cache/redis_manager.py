@@ -5,23 +5,63 @@ Caches responses to speed up repeated questions
 
 import redis
 import hashlib
-import json
 import logging
-from typing import Optional, Dict
-from datetime import timedelta
+import threading
+import time
+from collections import Counter
+from typing import Optional, Dict, List, Tuple
+from datetime import datetime, timedelta
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+from backend.core.cache.fallback import OutageFallback, PendingEntry, Reconnector
+from backend.core.cache.freshness import SoftExpiry
+from backend.core.cache.invalidation import InvalidationListener
+from backend.core.cache.local_cache import LocalLRUCache
+from backend.core.cache.semantic_cache import SemanticAnswerCache
+from backend.core.cache.serialization import AnswerCodec
+from backend.core.cache.sqlite_cache import SQLiteCache
 
 logger = logging.getLogger(__name__)
 
 
 class RedisCacheManager:
-    """Manages Redis cache for Q&A pairs"""
+    """
+    Manages Redis cache for Q&A pairs
+
+    Keys, generations, the index and batching live here; the tiers around
+    Redis are collaborators: an in-process LRU (l1), cross-worker L1
+    invalidation (InvalidationListener), the reconnect loop run while
+    Redis is down (Reconnector), the outage store (OutageFallback), near-duplicate questions
+    (SemanticAnswerCache) and soft expiry for stale-while-revalidate
+    (SoftExpiry).
+    """
     
     def __init__(
         self,
         host: str = '127.0.0.1',
         port: int = 6379,
         password: str = None,
-        ttl_hours: int = 24
+        ttl_hours: int = 24,
+        stale_ttl_hours: float = 0,
+        namespace: str = "mira:qa",
+        batch_size: int = 500,
+        llm_provider: str = None,
+        llm_model: str = None,
+        prompt_version: str = "1",
+        generation_refresh_seconds: float = 1.0,
+        l1: LocalLRUCache = None,
+        pubsub_invalidation: bool = False,
+        max_connections: int = 50,
+        health_check_interval: int = 30,
+        retries: int = 3,
+        timeout: float = 2,
+        fallback: SQLiteCache = None,
+        reconnect_interval: float = 30,
+        semantic_cache: SemanticAnswerCache = None,
+        codec: AnswerCodec = None,
+        frequency_days: int = 7,
+        frequency_flush_seconds: float = 10
     ):
         """
         Initialize Redis connection
@@ -31,36 +71,382 @@ class RedisCacheManager:
             port: Redis port (default: 6379)
             password: Redis password (optional for local instance)
             ttl_hours: Time-to-live for cached entries in hours
+            stale_ttl_hours: Extra hours an expired answer is kept and served as
+                stale while it is regenerated (0 disables stale-while-revalidate)
+            namespace: Key prefix for cached answers
+            batch_size: Keys per UNLINK/ZRANGE batch when clearing
+            llm_provider: LLM provider baked into cache keys
+            llm_model: LLM model baked into cache keys
+            prompt_version: Prompt version baked into cache keys
+            generation_refresh_seconds: How long a read generation number is reused
+            l1: In-process tier in front of Redis (None disables it)
+            pubsub_invalidation: Broadcast invalidations so other workers drop their L1 entries
+            max_connections: Connection pool size (shared by all threads)
+            health_check_interval: Seconds idle before a pooled connection is PINGed on checkout
+            retries: Retries on connection errors/timeouts, with exponential backoff
+            timeout: Longest a call may block on an unreachable Redis, split
+                across the first attempt and the retries
+            fallback: Store used while Redis is unreachable (None disables it)
+            reconnect_interval: Seconds between reconnection attempts while Redis is down
+                (Redis is skipped meanwhile)
+            semantic_cache: Question index consulted on exact misses (None disables it)
+            codec: Cached answer encoding (default: orjson, uncompressed)
+            frequency_days: Days of question counts kept for cache warming
+            frequency_flush_seconds: How often locally buffered counts are sent to Redis
         """
-        self.ttl = timedelta(hours=ttl_hours)
+        # Hard TTL (Redis expiry); with stale-while-revalidate, answers turn
+        # stale after the soft TTL but are still served until the hard one
+        self.ttl = timedelta(hours=ttl_hours + stale_ttl_hours)
+        self.freshness = SoftExpiry(ttl_hours * 3600 if stale_ttl_hours > 0 else None)
+        self.namespace = namespace
+        self.batch_size = batch_size
+        
+        # Sorted set of cached keys scored by expiry time: lets stats and
+        # clearing avoid KEYS, which blocks a shared Redis for O(N)
+        self.index_key = f"{namespace}:index"
+        
+        # Knowledge-base generation: part of every key, so invalidating all
+        # answers is one INCR and stale entries simply age out through TTL
+        self.generation_key = f"{namespace}:generation"
+        self.generation_refresh_seconds = generation_refresh_seconds
+        self._generation = 0
+        self._generation_read_at = 0.0
+        # Old generations are pruned by a background thread, never by the invalidating request
+        self._prune_generation = 0
+        self._prune_thread = None
+        self._prune_lock = threading.Lock()
+        
+        # Answers depend on who generated them and with which prompt
+        self.key_context = f"{llm_provider or ''}|{llm_model or ''}|{prompt_version}"
         self.redis_client = None
         self.enabled = False
         
+        # L1: hot answers served from process memory, no network hop
+        self.l1 = l1
+        self.invalidations = None
+        
+        # While Redis is down it is skipped; a background thread reconnects
+        self.reconnector = Reconnector(reconnect_interval)
+        self._invalidate_on_reconnect = False
+        
+        # Fallback: answers survive a Redis outage on local disk and are
+        # written back once Redis is reachable again
+        self.fallback = None
+        if fallback is not None:
+            # Entries live as long as they would in Redis
+            fallback.ttl_seconds = self.ttl.total_seconds()
+            self.fallback = OutageFallback(fallback)
+        self._fallback_replace_lock = threading.Lock()
+        
+        # Values are binary (versioned codec), so responses are not decoded
+        self.codec = codec or AnswerCodec()
+        
+        # Question frequency (per-day sorted sets) for cache warming; counts
+        # are buffered locally so the hot path stays free of extra round trips
+        self.frequency_days = frequency_days
+        self.frequency_flush_seconds = frequency_flush_seconds
+        self._query_counts = Counter()
+        self._query_counts_flushed_at = time.monotonic()
+        self._query_counts_lock = threading.Lock()
+        
+        # Near-duplicate questions ("what's a ..." / "What is a ...?") reuse answers
+        self.semantic = semantic_cache
+        
+        # Each attempt gets an equal share of the timeout, so retries cannot
+        # stretch a call on a dead connection to (retries + 1) full timeouts
+        self.timeout = timeout
+        socket_timeout = timeout / (retries + 1)
+        
+        # Connection settings, reused by AsyncRedisCacheManager
+        self.connection_params = {
+            'host': host,
+            'port': port,
+            'decode_responses': False,
+            'socket_timeout': socket_timeout,
+            'socket_connect_timeout': socket_timeout,
+            'health_check_interval': health_check_interval,
+            'max_connections': max_connections
+        }
+        
+        # Add password only if provided
+        if password:
+            self.connection_params['password'] = password
+        
+        self.retries = retries
+        
         try:
-            # Connect to local Redis
-            connection_params = {
-                'host': host,
-                'port': port,
-                'decode_responses': True,
-                'socket_timeout': 5,
-                'socket_connect_timeout': 5
-            }
-            
-            # Add password only if provided
-            if password:
-                connection_params['password'] = password
-            
-            self.redis_client = redis.Redis(**connection_params)
+            # Pooled client: threads share warm connections; transient
+            # errors are retried with backoff instead of failing the request
+            self.pool = redis.BlockingConnectionPool(timeout=timeout, **self.connection_params)
+            self.redis_client = redis.Redis(
+                connection_pool=self.pool,
+                retry=Retry(ExponentialBackoff(), retries),
+                retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+            )
+            if pubsub_invalidation and self.l1 is not None:
+                self.invalidations = InvalidationListener(
+                    self.redis_client, f"{namespace}:invalidate", self.l1,
+                    # Pick up the new generation on the next lookup
+                    on_clear_all=self._refresh_generation
+                )
             
             # Test connection
             self.redis_client.ping()
             self.enabled = True
             logger.info("✅ Redis cache connected successfully")
             
+            if self.invalidations is not None:
+                self.invalidations.start()
+            
         except Exception as e:
             logger.warning(f"⚠️ Redis cache unavailable: {e}")
-            logger.warning("💡 Continuing without cache - responses will not be cached")
             self.enabled = False
+            if self.fallback is not None:
+                logger.warning(f"💡 Using local fallback cache at {self.fallback.path} until Redis is back")
+            elif self.l1 is not None:
+                logger.warning("💡 Caching in process memory only until Redis is back")
+            else:
+                logger.warning("💡 Continuing without cache until Redis is back - responses will not be cached")
+            if self.redis_client is not None:
+                self._start_reconnect()
+    
+    @classmethod
+    def from_config(
+        cls, config, llm_provider: str = None, llm_model: str = None, embeddings=None
+    ) -> "RedisCacheManager":
+        """
+        Answer cache configured from the application settings
+        
+        Args:
+            config: Config / settings object (answer cache section)
+            llm_provider: LLM provider baked into cache keys
+            llm_model: LLM model baked into cache keys
+            embeddings: Question embeddings for the semantic tier (used with ENABLE_SEMANTIC_CACHE)
+        """
+        return cls(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            password=config.REDIS_PASSWORD,
+            ttl_hours=24,  # 24 hour cache
+            stale_ttl_hours=config.CACHE_STALE_TTL_HOURS,
+            llm_provider=llm_provider,
+            llm_model=llm_model,
+            prompt_version=config.PROMPT_VERSION,
+            l1=(
+                LocalLRUCache(config.L1_CACHE_MAX_BYTES, config.L1_CACHE_TTL_SECONDS)
+                if config.L1_CACHE_MAX_BYTES > 0 else None
+            ),
+            pubsub_invalidation=config.CACHE_PUBSUB_INVALIDATION,
+            max_connections=config.REDIS_MAX_CONNECTIONS,
+            health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+            retries=config.REDIS_RETRIES,
+            timeout=config.REDIS_TIMEOUT_SECONDS,
+            fallback=(
+                SQLiteCache(config.CACHE_FALLBACK_PATH, config.CACHE_FALLBACK_MAX_BYTES)
+                if config.CACHE_FALLBACK_PATH else None
+            ),
+            reconnect_interval=config.REDIS_RECONNECT_INTERVAL,
+            semantic_cache=(
+                SemanticAnswerCache(
+                    embeddings,
+                    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                    max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+                    sample_rate=config.SEMANTIC_CACHE_SAMPLE_RATE
+                )
+                if config.ENABLE_SEMANTIC_CACHE and embeddings is not None else None
+            ),
+            codec=AnswerCodec(
+                config.CACHE_FORMAT,
+                compression=config.CACHE_COMPRESSION or None,
+                compress_min_bytes=config.CACHE_COMPRESS_MIN_BYTES
+            ),
+            frequency_days=config.CACHE_WARM_DAYS
+        )
+    
+    @property
+    def has_local_tier(self) -> bool:
+        """Whether answers can be cached without Redis"""
+        return self.l1 is not None or self.fallback is not None
+    
+    def _on_redis_error(self, error: Exception):
+        """Stop using Redis (local tiers only) when it becomes unreachable, until it reconnects"""
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)) and self.enabled:
+            tier = "local fallback cache" if self.fallback is not None else "local tiers only"
+            logger.warning(f"⚠️ Redis connection lost ({error}) - using {tier} until it is back")
+            self.enabled = False
+            self._start_reconnect()
+    
+    def _start_reconnect(self):
+        self.reconnector.start(self.redis_client.ping, self._resume)
+    
+    def _resume(self):
+        """
+        Redis is back: sync the generation, write back the outage's answers and use Redis again
+        
+        Answers cached during the outage are keyed with the generation this
+        process last knew (0 if it started while Redis was down). When the
+        knowledge base changed here during the outage, a new generation is
+        started and they are re-keyed to it: invalidating cleared the
+        fallback store, so every remaining answer reflects the new knowledge
+        base. Otherwise only answers of Redis's current generation are
+        written back; the rest may predate another worker's invalidation
+        and are dropped.
+        """
+        if self._invalidate_on_reconnect:
+            # The knowledge base changed during the outage
+            generation = self.bump_generation()
+            self._invalidate_on_reconnect = False
+            rekey = True
+        else:
+            generation = self._read_generation()
+            rekey = False
+        if self.fallback is not None:
+            self.fallback.write_back(
+                lambda entries: self._write_pending(entries, generation, rekey), self.batch_size
+            )
+        
+        self.enabled = True
+        if self.invalidations is not None:
+            self.invalidations.start()
+    
+    def _write_pending(self, entries: List[PendingEntry], generation: int, rekey: bool):
+        """
+        Copy fallback entries into Redis, keeping their remaining TTL
+        
+        Entries of other generations are moved to generation (rekey) or dropped.
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        dropped = []
+        for cache_key, cached_data, source_files, remaining in entries:
+            if self._generation_of(cache_key) != generation:
+                if not rekey:
+                    dropped.append(cache_key)
+                    continue
+                cache_key = self._with_generation(cache_key, generation)
+            self._queue_write(pipe, cache_key, cached_data, source_files, ttl_seconds=remaining)
+        pipe.execute()
+        
+        for cache_key in dropped:
+            self.fallback.store.delete(cache_key)
+        if dropped:
+            logger.info(f"🗑️ Dropped {len(dropped)} fallback answers of an outdated cache generation")
+    
+    def _from_fallback(self, cache_key: str) -> Optional[Dict]:
+        """Response from the fallback store (promoted to L1), or None"""
+        if self.fallback is None:
+            return None
+        cached_data = self.fallback.store.get(cache_key)
+        if cached_data is None:
+            return None
+        return self._decode_hit(cache_key, cached_data)
+    
+    def _publish_invalidation(self, data: str):
+        """Tell other workers to drop L1 entries (no-op without pub/sub)"""
+        if self.invalidations is not None:
+            self.invalidations.publish(data)
+    
+    def _refresh_generation(self):
+        """Re-read the generation on the next lookup"""
+        self._generation_read_at = 0.0
+    
+    def _read_generation(self) -> int:
+        """Read the generation from Redis now (even while marked unavailable)"""
+        self._generation = int(self.redis_client.get(self.generation_key) or 0)
+        self._generation_read_at = time.monotonic()
+        return self._generation
+    
+    def _get_generation(self) -> int:
+        """Current knowledge-base generation (re-read at most every refresh interval)"""
+        now = time.monotonic()
+        if self.enabled and now - self._generation_read_at >= self.generation_refresh_seconds:
+            try:
+                self._read_generation()
+            except Exception as e:
+                logger.error(f"Error reading cache generation: {e}")
+        return self._generation
+    
+    def bump_generation(self) -> int:
+        """
+        Start a new generation: every existing answer stops matching (O(1))
+        
+        The old generations' entries are then deleted in batches by a
+        background thread, so the index only counts answers that can still
+        be served.
+        """
+        self._generation = int(self.redis_client.incr(self.generation_key))
+        self._generation_read_at = time.monotonic()
+        logger.info(f"🔄 Cache generation is now {self._generation}")
+        self._schedule_prune(self._generation)
+        return self._generation
+    
+    def _schedule_prune(self, generation: int) -> None:
+        """Prune generations before generation in the background (bumps during a prune coalesce)"""
+        with self._prune_lock:
+            self._prune_generation = max(self._prune_generation, generation)
+            if self._prune_thread is not None:
+                return  # The running prune picks the new generation up when it is done
+            self._prune_thread = threading.Thread(target=self._prune_loop, name="cache-prune", daemon=True)
+            self._prune_thread.start()
+    
+    def _prune_loop(self) -> None:
+        pruned = 0
+        while True:
+            with self._prune_lock:
+                generation = self._prune_generation
+                if generation <= pruned:
+                    self._prune_thread = None
+                    return
+            self.prune_old_generations(generation)
+            pruned = generation
+    
+    def _generation_of(self, cache_key) -> Optional[int]:
+        """Generation part of a cache key (None for keys of another layout)"""
+        if isinstance(cache_key, bytes):
+            cache_key = cache_key.decode()
+        try:
+            return int(cache_key.rsplit(":", 2)[1])
+        except (IndexError, ValueError):
+            return None
+    
+    def _with_generation(self, cache_key: str, generation: int) -> str:
+        """The same question's key in another generation"""
+        prefix, _, digest = cache_key.rsplit(":", 2)
+        return f"{prefix}:{generation}:{digest}"
+    
+    def prune_old_generations(self, current: int) -> int:
+        """
+        Delete indexed answers of generations before current (ZSCAN + batched UNLINK)
+        
+        Returns:
+            Answers deleted
+        """
+        deleted = 0
+        try:
+            batch = []
+            for cache_key, _ in self.redis_client.zscan_iter(self.index_key, count=self.batch_size):
+                generation = self._generation_of(cache_key)
+                if generation is not None and generation < current:
+                    batch.append(cache_key)
+                if len(batch) >= self.batch_size:
+                    deleted += self._unlink_indexed(batch)
+                    batch = []
+            if batch:
+                deleted += self._unlink_indexed(batch)
+        except Exception as e:
+            logger.error(f"Error pruning old cache generations: {e}")
+        if deleted:
+            logger.info(f"🗑️ Pruned {deleted} answers of old cache generations")
+        return deleted
+    
+    def _unlink_indexed(self, keys: List[bytes]) -> int:
+        """UNLINK keys and drop them from the index (one round trip)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.unlink(*keys)
+        pipe.zrem(self.index_key, *keys)
+        return pipe.execute()[0]
+    
+    def _source_key(self, filename: str) -> str:
+        return f"{self.namespace}:source:{filename}"
     
     def _generate_cache_key(self, question: str) -> str:
         """
@@ -70,80 +456,169 @@ class RedisCacheManager:
             question: User question
             
         Returns:
-            SHA256 hash of the normalized question
+            Namespaced key: generation + SHA256 of the normalized question,
+            LLM provider/model and prompt version
         """
+        return self._key_for(question, self._get_generation())
+    
+    def _key_for(self, question: str, generation: int) -> str:
+        """Cache key for a question in a given generation"""
         # Normalize: lowercase, strip whitespace
         normalized = question.lower().strip()
         
         # Generate hash
-        hash_object = hashlib.sha256(normalized.encode())
-        cache_key = f"mira:qa:{hash_object.hexdigest()}"
+        hash_object = hashlib.sha256(f"{normalized}|{self.key_context}".encode())
+        return f"{self.namespace}:{generation}:{hash_object.hexdigest()}"
+    
+    def _from_l1(self, cache_key: str) -> Optional[Dict]:
+        """Response from the L1 tier, marked as cached"""
+        if self.l1 is None:
+            return None
+        response = self.l1.get(cache_key)
+        if response is None:
+            return None
+        response = dict(response)
+        response['from_cache'] = True
+        return self.freshness.check(response)
+    
+    def _decode_hit(self, cache_key: str, cached_data: bytes) -> Dict:
+        """Deserialize a Redis hit, promote it to L1 and mark it as cached"""
+        response = self.codec.decode(cached_data)
+        if self.l1 is not None:
+            self.l1.set(cache_key, dict(response), len(cached_data))
+        response['from_cache'] = True
+        return self.freshness.check(response)
+    
+    def _encode(self, cache_key: str, response: Dict) -> bytes:
+        """Serialize a response for Redis and write it through to L1"""
+        # Remove cache indicator if present
+        response_to_cache = response.copy()
+        response_to_cache.pop('from_cache', None)
+        response_to_cache.pop('stale', None)
+        self.freshness.stamp(response_to_cache)
         
-        return cache_key
+        cached_data = self.codec.encode(response_to_cache)
+        if self.l1 is not None:
+            self.l1.set(cache_key, response_to_cache, len(cached_data))
+        return cached_data
+    
+    def _queue_write(
+        self, pipe, cache_key: str, cached_data: bytes,
+        source_files: List[str] = None, ttl_seconds: float = None
+    ) -> None:
+        """Queue SET EX + index (+ source sets) on a sync or asyncio pipeline"""
+        ttl = max(1, int(self.ttl.total_seconds() if ttl_seconds is None else ttl_seconds))
+        pipe.set(cache_key, cached_data, ex=ttl)
+        pipe.zadd(self.index_key, {cache_key: time.time() + ttl})
+        for filename in set(source_files or []):
+            pipe.sadd(self._source_key(filename), cache_key)
+            pipe.expire(self._source_key(filename), self.ttl)
     
-    def get_cached_answer(self, question: str) -> Optional[Dict]:
+    def get_cached_answer(self, question: str, semantic: bool = True) -> Optional[Dict]:
         """
         Retrieve cached answer for a question
         
+        Falls back to the answer of the most similar cached question when
+        there is no exact match and a semantic cache is configured.
+        
         Args:
             question: User question
+            semantic: Allow a near-duplicate match (off for conversation-scoped questions)
             
         Returns:
             Cached response dict or None if not found
         """
-        if not self.enabled:
+        response = self._get_exact(question)
+        if response is not None or self.semantic is None or not semantic:
+            return response
+        
+        try:
+            return self.semantic.find_answer(question, self._get_exact)
+        except Exception as e:
+            logger.error(f"Error in semantic cache lookup: {e}")
+            return None
+    
+    def _get_exact(self, question: str) -> Optional[Dict]:
+        """Look a question up by its exact key: L1, then Redis (or the fallback)"""
+        if not self.enabled and not self.has_local_tier:
             return None
         
+        cache_key = None
         try:
             cache_key = self._generate_cache_key(question)
+            
+            response = self._from_l1(cache_key)
+            if response is not None:
+                logger.info(f"🎯 L1 cache HIT for question: {question[:50]}...")
+                return response
+            
+            if not self.enabled:
+                response = self._from_fallback(cache_key)
+                if response is not None:
+                    logger.info(f"🎯 Fallback cache HIT for question: {question[:50]}...")
+                return response
+            
             cached_data = self.redis_client.get(cache_key)
             
             if cached_data:
                 logger.info(f"🎯 Cache HIT for question: {question[:50]}...")
-                response = json.loads(cached_data)
-                
-                # Add cache indicator
-                response['from_cache'] = True
-                
-                return response
+                return self._decode_hit(cache_key, cached_data)
             else:
                 logger.info(f"❌ Cache MISS for question: {question[:50]}...")
                 return None
                 
         except Exception as e:
             logger.error(f"Error retrieving from cache: {e}")
+            self._on_redis_error(e)
+            if not self.enabled and cache_key is not None:
+                return self._from_fallback(cache_key)
             return None
     
-    def cache_answer(self, question: str, response: Dict) -> bool:
+    def cache_answer(
+        self, question: str, response: Dict, source_files: List[str] = None, semantic: bool = True
+    ) -> bool:
         """
         Cache a question-answer pair
         
         Args:
             question: User question
             response: Response dictionary to cache
+            source_files: Knowledge-base files the answer was built from
+                (lets invalidate_source drop just those answers)
+            semantic: Index the question for near-duplicate matches
             
         Returns:
             True if cached successfully, False otherwise
         """
-        if not self.enabled:
+        cached = self._cache_exact(question, response, source_files)
+        if cached and self.semantic is not None and semantic:
+            try:
+                self.semantic.add(question)
+            except Exception as e:
+                logger.error(f"Error indexing question for semantic cache: {e}")
+        return cached
+    
+    def _cache_exact(self, question: str, response: Dict, source_files: List[str] = None) -> bool:
+        """Store an answer under the question's exact key"""
+        if not self.enabled and not self.has_local_tier:
             return False
         
+        cache_key = cached_data = None
         try:
             cache_key = self._generate_cache_key(question)
             
-            # Remove cache indicator if present
-            response_to_cache = response.copy()
-            response_to_cache.pop('from_cache', None)
+            # Write-through: L1 first, so this worker serves it even if Redis is down
+            cached_data = self._encode(cache_key, response)
             
-            # Serialize response
-            cached_data = json.dumps(response_to_cache)
+            if not self.enabled:
+                if self.fallback is not None:
+                    self.fallback.store.set(cache_key, cached_data, source_files)
+                return True
             
-            # Store with TTL
-            success = self.redis_client.setex(
-                cache_key,
-                self.ttl,
-                cached_data
-            )
+            # Store with TTL and index the key (one round trip)
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_write(pipe, cache_key, cached_data, source_files)
+            success = pipe.execute()[0]
             
             if success:
                 logger.info(f"💾 Cached answer for: {question[:50]}...")
@@ -154,45 +629,328 @@ class RedisCacheManager:
                 
         except Exception as e:
             logger.error(f"Error caching answer: {e}")
+            self._on_redis_error(e)
+            if not self.enabled and cached_data is not None and self.fallback is not None:
+                self.fallback.store.set(cache_key, cached_data, source_files)
+                return True
             return False
     
-    def invalidate_cache(self, question: str = None) -> bool:
+    def get_many(self, questions: List[str]) -> List[Optional[Dict]]:
+        """
+        Look up several questions: L1 first, then one MGET for the rest
+        
+        Returns:
+            Cached responses (None for misses), in the order of questions
+        """
+        generation = self._get_generation()
+        keys = [self._key_for(question, generation) for question in questions]
+        results = [self._from_l1(key) for key in keys]
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        
+        if self.enabled:
+            try:
+                values = self.redis_client.mget([keys[i] for i in missing])
+                for i, cached_data in zip(missing, values):
+                    if cached_data:
+                        results[i] = self._decode_hit(keys[i], cached_data)
+                return results
+            except Exception as e:
+                logger.error(f"Error retrieving batch from cache: {e}")
+                self._on_redis_error(e)
+        
+        if not self.enabled:
+            for i in missing:
+                results[i] = self._from_fallback(keys[i])
+        return results
+    
+    def cache_many(self, entries: List[Tuple[str, Dict, List[str]]]) -> bool:
+        """
+        Cache several (question, response, source_files) entries in one pipeline
+        
+        Returns:
+            True if all were cached
+        """
+        if not entries:
+            return True
+        if not self.enabled and not self.has_local_tier:
+            return False
+        
+        generation = self._get_generation()
+        writes = []
+        for question, response, source_files in entries:
+            cache_key = self._key_for(question, generation)
+            writes.append((cache_key, self._encode(cache_key, response), source_files))
+        
+        if self.enabled:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for cache_key, cached_data, source_files in writes:
+                    self._queue_write(pipe, cache_key, cached_data, source_files)
+                pipe.execute()
+                logger.info(f"💾 Cached {len(writes)} answers")
+                return True
+            except Exception as e:
+                logger.error(f"Error caching batch: {e}")
+                self._on_redis_error(e)
+                if self.enabled:
+                    return False
+        
+        if self.fallback is not None:
+            for cache_key, cached_data, source_files in writes:
+                self.fallback.store.set(cache_key, cached_data, source_files)
+        return True
+    
+    def replace_answer(
+        self, question: str, expected_answer: str, response: Dict, source_files: List[str] = None
+    ) -> bool:
+        """
+        Overwrite a cached answer only if it still is expected_answer
+        
+        Compare-and-set on the question's key (WATCH / MULTI): an entry that
+        was invalidated, expired or regenerated by another worker in the
+        meantime is left alone.
+        
+        Returns:
+            True if the answer was replaced
+        """
+        if not self.enabled and not self.has_local_tier:
+            return False
+        
+        cache_key = self._generate_cache_key(question)
+        if self.enabled:
+            try:
+                with self.redis_client.pipeline(transaction=True) as pipe:
+                    pipe.watch(cache_key)
+                    cached_data = pipe.get(cache_key)
+                    if not cached_data or self.codec.decode(cached_data).get("answer") != expected_answer:
+                        return False
+                    pipe.multi()
+                    self._queue_write(pipe, cache_key, self._encode(cache_key, response), source_files)
+                    pipe.execute()
+                logger.info(f"💾 Replaced cached answer for: {question[:50]}...")
+                return True
+            except redis.WatchError:
+                # Changed between GET and EXEC: drop what _encode wrote to L1
+                if self.l1 is not None:
+                    self.l1.delete(cache_key)
+                return False
+            except Exception as e:
+                logger.error(f"Error replacing cached answer: {e}")
+                self._on_redis_error(e)
+                if self.enabled:
+                    return False
+        
+        if self.fallback is None:
+            return False
+        with self._fallback_replace_lock:
+            cached_data = self.fallback.store.get(cache_key)
+            if cached_data is None or self.codec.decode(cached_data).get("answer") != expected_answer:
+                return False
+            self.fallback.store.set(cache_key, self._encode(cache_key, response), source_files)
+        return True
+    
+    def _unlink_batches(self, keys) -> int:
+        """UNLINK keys in batches (memory is reclaimed off the main thread)"""
+        deleted = 0
+        batch = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= self.batch_size:
+                deleted += self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.redis_client.unlink(*batch)
+        return deleted
+    
+    def invalidate_cache(self, question: str = None, purge: bool = False, scan: bool = False) -> bool:
         """
         Invalidate cache for a specific question or all cached answers
         
         Args:
             question: Specific question to invalidate (None = clear all)
+            purge: Also delete old entries now instead of letting TTL expire them
+            scan: With purge, also SCAN for unindexed keys (e.g. written before the index existed)
             
         Returns:
             True if successful
         """
+        if not question and self.semantic is not None:
+            self.semantic.clear()
+        
         if not self.enabled:
-            return False
+            if not question:
+                # Redis still holds the old answers: start a new generation once it is back
+                self._invalidate_on_reconnect = True
+            if not self.has_local_tier:
+                return not question
+            local_tiers = [tier for tier in (self.l1, self.fallback and self.fallback.store) if tier is not None]
+            if question:
+                cache_key = self._generate_cache_key(question)
+                deleted = False
+                for tier in local_tiers:
+                    deleted = tier.delete(cache_key) or deleted
+                return deleted
+            for tier in local_tiers:
+                tier.clear()
+            return True
         
         try:
             if question:
                 # Invalidate specific question
                 cache_key = self._generate_cache_key(question)
-                deleted = self.redis_client.delete(cache_key)
+                if self.l1 is not None:
+                    self.l1.delete(cache_key)
+                self._publish_invalidation(cache_key)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.unlink(cache_key)
+                pipe.zrem(self.index_key, cache_key)
+                deleted = pipe.execute()[0]
                 logger.info(f"🗑️ Invalidated cache for: {question[:50]}...")
                 return deleted > 0
+            
+            # New generation: old answers no longer match any key
+            self.bump_generation()
+            if self.l1 is not None:
+                self.l1.clear()
+            self._publish_invalidation("*")
+            if not purge:
+                return True
+            
+            # Clear all indexed keys, one bounded batch at a time
+            deleted = 0
+            while True:
+                keys = self.redis_client.zrange(self.index_key, 0, self.batch_size - 1)
+                if not keys:
+                    break
+                deleted += self._unlink_indexed(keys)
+            
+            if scan:
+                # Incremental SCAN never blocks the server like KEYS does
+                deleted += self._unlink_batches(
+                    key for key in self.redis_client.scan_iter(
+                        match=f"{self.namespace}:*", count=self.batch_size
+                    )
+                    if key.decode() not in (self.index_key, self.generation_key)
+                )
+            
+            if deleted:
+                logger.info(f"🗑️ Cleared {deleted} cached answers")
             else:
-                # Clear all Mira cache keys
-                pattern = "mira:qa:*"
-                keys = self.redis_client.keys(pattern)
-                
-                if keys:
-                    deleted = self.redis_client.delete(*keys)
-                    logger.info(f"🗑️ Cleared {deleted} cached answers")
-                    return True
-                else:
-                    logger.info("💡 No cache entries to clear")
-                    return True
+                logger.info("💡 No cache entries to clear")
+            return True
                     
         except Exception as e:
             logger.error(f"Error invalidating cache: {e}")
             return False
     
+    def invalidate_source(self, filename: str) -> int:
+        """
+        Invalidate only answers built from a given knowledge-base file
+        
+        Args:
+            filename: Source PDF filename
+            
+        Returns:
+            Number of cached answers deleted
+        """
+        if self.l1 is not None:
+            # L1 entries are not tracked per source; dropping them all is cheap
+            self.l1.clear()
+        if not self.enabled:
+            # Redis is not tracked per source while down: start a new generation once it is back
+            self._invalidate_on_reconnect = True
+            return self.fallback.store.delete_source(filename) if self.fallback is not None else 0
+        
+        try:
+            self._publish_invalidation("*")
+            source_key = self._source_key(filename)
+            keys = list(self.redis_client.sscan_iter(source_key, count=self.batch_size))
+            deleted = 0
+            
+            for start in range(0, len(keys), self.batch_size):
+                deleted += self._unlink_indexed(keys[start:start + self.batch_size])
+            
+            self.redis_client.unlink(source_key)
+            logger.info(f"🗑️ Invalidated {deleted} cached answers citing {filename}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error invalidating cache for {filename}: {e}")
+            return 0
+    
+    def _frequency_key(self, day: datetime) -> str:
+        return f"{self.namespace}:frequency:{day:%Y%m%d}"
+    
+    def record_query(self, question: str) -> None:
+        """Count a question for cache warming (flushed to Redis periodically)"""
+        self._flush_query_counts(self._count_query(question))
+    
+    def _count_query(self, question: str) -> Optional[Counter]:
+        """Buffer a question's count; returns the buffered counts once they are due for a flush"""
+        # Same normalization as the cache key, so spellings share one counter
+        normalized = question.lower().strip()
+        if not normalized:
+            return None
+        
+        with self._query_counts_lock:
+            self._query_counts[normalized] += 1
+            if time.monotonic() - self._query_counts_flushed_at < self.frequency_flush_seconds:
+                return None
+            counts, self._query_counts = self._query_counts, Counter()
+            self._query_counts_flushed_at = time.monotonic()
+        return counts
+    
+    def _queue_query_counts(self, pipe, counts: Counter) -> None:
+        key = self._frequency_key(datetime.now())
+        for question, count in counts.items():
+            pipe.zincrby(key, count, question)
+        pipe.expire(key, timedelta(days=self.frequency_days + 1))
+    
+    def _flush_query_counts(self, counts: Optional[Counter]) -> None:
+        if not self.enabled or not counts:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_query_counts(pipe, counts)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording question frequency: {e}")
+    
+    def top_queries(self, limit: int = 100, days: int = None) -> List[Tuple[str, int]]:
+        """
+        Most frequent questions over the last days (Redis counter)
+        
+        Returns:
+            (question, count) pairs, most frequent first
+        """
+        with self._query_counts_lock:
+            totals = Counter(self._query_counts)
+        if not self.enabled:
+            return totals.most_common(limit)
+        
+        try:
+            today = datetime.now()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for offset in range(days or self.frequency_days):
+                # Union of per-day top lists approximates the overall top N
+                pipe.zrevrange(self._frequency_key(today - timedelta(days=offset)), 0, limit - 1, withscores=True)
+            for day in pipe.execute():
+                for question, count in day:
+                    totals[question.decode()] += int(count)
+        except Exception as e:
+            logger.error(f"Error reading question frequency: {e}")
+        return totals.most_common(limit)
+    
+    def _count_cached_answers(self) -> int:
+        """Live cached answers: drop expired index entries, then ZCARD (O(log N))"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zremrangebyscore(self.index_key, "-inf", time.time())
+        pipe.zcard(self.index_key)
+        return pipe.execute()[1]
+    
     def get_cache_stats(self) -> Dict:
         """
         Get cache statistics
@@ -200,23 +958,31 @@ class RedisCacheManager:
         Returns:
             Dictionary with cache stats
         """
+        tiers = {
+            "l1": self.l1.get_stats() if self.l1 is not None else None,
+            "fallback": self.fallback.store.get_stats() if self.fallback is not None else None,
+            "semantic": self.semantic.get_stats() if self.semantic is not None else None
+        }
+        
         if not self.enabled:
             return {
                 "enabled": False,
-                "message": "Redis cache not available"
+                "message": "Redis cache not available",
+                **tiers
             }
         
         try:
             # Count cached entries
-            pattern = "mira:qa:*"
-            keys = self.redis_client.keys(pattern)
+            cached_answers = self._count_cached_answers()
             
             # Get Redis info
             info = self.redis_client.info('stats')
             
             return {
                 "enabled": True,
-                "cached_answers": len(keys),
+                "cached_answers": cached_answers,
+                "generation": self._get_generation(),
+                **tiers,
                 "total_connections": info.get('total_connections_received', 0),
                 "total_commands": info.get('total_commands_processed', 0),
                 "keyspace_hits": info.get('keyspace_hits', 0),
@@ -231,7 +997,8 @@ class RedisCacheManager:
             logger.error(f"Error getting cache stats: {e}")
             return {
                 "enabled": True,
-                "error": str(e)
+                "error": str(e),
+                **tiers
             }
     
     def _calculate_hit_rate(self, hits: int, misses: int) -> str:
@@ -245,9 +1012,21 @@ class RedisCacheManager:
     
     def close(self):
         """Close Redis connection"""
+        self.reconnector.close()
+        prune_thread = self._prune_thread
+        if prune_thread is not None:
+            prune_thread.join(timeout=self.timeout)
+        with self._query_counts_lock:
+            counts, self._query_counts = self._query_counts, Counter()
+        self._flush_query_counts(counts)
+        if self.fallback is not None:
+            self.fallback.close()
+        if self.invalidations is not None:
+            self.invalidations.close()
         if self.redis_client:
             try:
                 self.redis_client.close()
+                self.pool.disconnect()
                 logger.info("🔌 Redis connection closed")
             except Exception as e:
                 logger.error(f"Error closing Redis connection: {e}")
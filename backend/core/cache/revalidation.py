@@ -0,0 +1,96 @@
+"""
+Stale-While-Revalidate
+Regenerates soft-expired cached answers in the background
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from backend.core.cache.redis_manager import RedisCacheManager
+
+logger = logging.getLogger(__name__)
+
+
+class StaleRevalidator:
+    """
+    Runs at most one background refresh per question
+
+    A per-process set stops duplicate refreshes within a worker; a short
+    Redis claim (SET NX EX) stops other workers from refreshing the same
+    answer at the same time.
+    """
+
+    def __init__(self, cache: RedisCacheManager, max_workers: int = 2, claim_seconds: int = 60):
+        """
+        Args:
+            cache: Cache manager holding the stale answers
+            max_workers: Concurrent background refreshes
+            claim_seconds: How long a worker owns a refresh
+        """
+        self.cache = cache
+        self.claim_seconds = claim_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="revalidate")
+
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    def _claim(self, question: str) -> bool:
+        """Claim the refresh across workers (always granted without Redis)"""
+        cache = self.cache
+        if not cache.enabled:
+            return True
+        try:
+            claim_key = f"{cache._generate_cache_key(question)}:refresh"
+            return bool(cache.redis_client.set(claim_key, b"1", nx=True, ex=self.claim_seconds))
+        except Exception as e:
+            logger.error(f"Error claiming answer refresh: {e}")
+            cache._on_redis_error(e)
+            return True
+
+    def submit(self, question: str, fn: Callable[[], Any]) -> bool:
+        """
+        Schedule fn (which regenerates and re-caches the answer) unless a
+        refresh for the question is already running
+
+        Returns:
+            True if a refresh was scheduled
+        """
+        key = question.lower().strip()
+        with self._lock:
+            if key in self._in_progress:
+                return False
+            self._in_progress.add(key)
+
+        if not self._claim(question):
+            with self._lock:
+                self._in_progress.discard(key)
+            return False
+
+        logger.info(f"♻️ Serving stale answer, refreshing in background: {question[:50]}...")
+        self.refreshes += 1
+        self.executor.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key: str, fn: Callable[[], Any]) -> None:
+        try:
+            fn()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Background answer refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._in_progress.discard(key)
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_progress": len(self._in_progress),
+            "refreshes": self.refreshes,
+            "failures": self.failures
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
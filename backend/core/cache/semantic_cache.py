@@ -0,0 +1,190 @@
+"""
+Semantic Question Index
+Maps a new question to a previously cached, near-identical one
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cosine-similarity index over cached questions
+
+    Only questions are stored here; answers stay in the exact cache. A hit
+    returns the cached question's text, which is then looked up through the
+    normal key path, so generation bumps and source invalidations apply to
+    semantic hits too; a matched question whose answer is gone is dropped
+    from the index. The index is per process and bounded (oldest entries
+    are dropped first).
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = 0.93,
+        max_entries: int = 10000,
+        sample_rate: float = 0.05,
+        max_samples: int = 50
+    ):
+        """
+        Args:
+            embeddings: LangChain embeddings (query vectors are L2-normalized here)
+            threshold: Minimum cosine similarity counted as the same question
+            max_entries: Questions kept in the index
+            sample_rate: Fraction of semantic hits recorded for false-hit review
+            max_samples: Recorded hits kept
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.sample_rate = sample_rate
+
+        # Ring buffer of unit vectors: row i holds question _rows[i]
+        self._matrix: Optional[np.ndarray] = None
+        self._rows = [None] * max_entries
+        self._row_of: Dict[str, int] = {}
+        self._next_row = 0
+        self._used_rows = 0
+        self._lock = threading.Lock()
+
+        # Embeddings of recent lookups, reused when the answer is then cached
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        self.lookups = 0
+        self.hits = 0
+        self.near_threshold_hits = 0
+        self.samples = deque(maxlen=max_samples)
+
+    def _normalize(self, question: str) -> str:
+        return question.lower().strip()
+
+    def _embed(self, normalized: str) -> np.ndarray:
+        with self._lock:
+            vector = self._recent.pop(normalized, None)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(normalized), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+        with self._lock:
+            self._recent[normalized] = vector
+            while len(self._recent) > 256:
+                self._recent.popitem(last=False)
+        return vector
+
+    def lookup(self, question: str) -> Optional[Tuple[str, float]]:
+        """Most similar cached question above the threshold, as (question, similarity)"""
+        normalized = self._normalize(question)
+        vector = self._embed(normalized)
+
+        with self._lock:
+            self.lookups += 1
+            if not self._used_rows:
+                return None
+
+            scores = self._matrix[:self._used_rows] @ vector
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            matched = self._rows[best]
+
+        if matched is None or similarity < self.threshold or matched == normalized:
+            return None
+        return matched, similarity
+
+    def _record_hit(self, question: str, matched: str, similarity: float) -> None:
+        with self._lock:
+            self.hits += 1
+            if similarity < self.threshold + 0.02:
+                self.near_threshold_hits += 1
+            if random.random() < self.sample_rate:
+                self.samples.append({
+                    "question": question,
+                    "matched_question": matched,
+                    "similarity": round(similarity, 4)
+                })
+        logger.info(f"🧭 Semantic cache match ({similarity:.3f}): {question[:50]}... → {matched[:50]}...")
+
+    def find_answer(self, question: str, get_exact: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Answer cached for the most similar question, marked with the match
+
+        Args:
+            question: Question that missed the exact cache
+            get_exact: Exact-key lookup of a question's cached answer
+        """
+        match = self.lookup(question)
+        if match is None:
+            return None
+
+        matched_question, similarity = match
+        response = get_exact(matched_question)
+        if response is None:
+            # Expired or invalidated: stop it from winning over valid neighbours
+            self.remove(matched_question)
+            return None
+
+        self._record_hit(question, matched_question, similarity)
+        response['semantic_match'] = {
+            "question": matched_question,
+            "similarity": round(similarity, 4)
+        }
+        return response
+
+    def add(self, question: str) -> None:
+        """Index a question whose answer was just cached"""
+        normalized = self._normalize(question)
+        vector = self._embed(normalized)
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            row = self._row_of.get(normalized)
+            if row is None:
+                # Overwrite the oldest slot once the buffer is full
+                row = self._next_row
+                evicted = self._rows[row]
+                if evicted is not None:
+                    del self._row_of[evicted]
+                self._rows[row] = normalized
+                self._row_of[normalized] = row
+                self._next_row = (row + 1) % self.max_entries
+                self._used_rows = max(self._used_rows, row + 1)
+            self._matrix[row] = vector
+
+    def remove(self, question: str) -> None:
+        """Drop a question from the index (its row is reused when the buffer wraps)"""
+        normalized = self._normalize(question)
+        with self._lock:
+            row = self._row_of.pop(normalized, None)
+            if row is not None:
+                self._rows[row] = None
+                self._matrix[row] = 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._rows = [None] * self.max_entries
+            self._row_of.clear()
+            self._next_row = 0
+            self._used_rows = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._row_of),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": f"{(self.hits / self.lookups) * 100:.2f}%" if self.lookups else "0%",
+                "near_threshold_hits": self.near_threshold_hits,
+                "sampled_hits": list(self.samples)
+            }
@@ -0,0 +1,112 @@
+"""
+Cached Answer Serialization
+Versioned binary encoding (orjson / msgpack, optional zstd) for cache entries
+"""
+
+import json
+import logging
+from typing import Dict, Union
+
+# Fast codecs (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Header byte: low bits = format, high bit = zstd-compressed payload.
+# Legacy entries are plain JSON text and start with "{" (0x7b), which no
+# header value uses, so old and new entries can be read side by side.
+FORMAT_ORJSON = 0x01
+FORMAT_MSGPACK = 0x02
+COMPRESSED = 0x80
+
+FORMATS = {"json": None, "orjson": FORMAT_ORJSON, "msgpack": FORMAT_MSGPACK}
+
+
+class AnswerCodec:
+    """
+    Encode/decode cached responses
+
+    Every reader understands every format, so the write format can be
+    changed (or rolled back to "json", the legacy text encoding older
+    workers read) without flushing the cache.
+    """
+
+    def __init__(self, format: str = "orjson", compression: str = None, compress_min_bytes: int = 1024, level: int = 3):
+        """
+        Args:
+            format: "orjson", "msgpack" or "json" (legacy, no header byte)
+            compression: "zstd" or None
+            compress_min_bytes: Smaller payloads are stored uncompressed
+            level: zstd compression level
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown cache format: {format}")
+        if format == "orjson" and not ORJSON_AVAILABLE:
+            logger.warning("⚠️ orjson not installed - caching answers as JSON text")
+            format = "json"
+        if format == "msgpack" and not MSGPACK_AVAILABLE:
+            logger.warning("⚠️ msgpack not installed - caching answers as JSON text")
+            format = "json"
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            logger.warning("⚠️ zstandard not installed - cached answers will not be compressed")
+            compression = None
+        if compression and format == "json":
+            # Legacy text entries carry no header to flag compression
+            compression = None
+
+        self.format = format
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level) if compression else None
+        self._decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+    def encode(self, response: Dict) -> bytes:
+        if self.format == "json":
+            return json.dumps(response).encode()
+
+        header = FORMATS[self.format]
+        if self.format == "orjson":
+            payload = orjson.dumps(response)
+        else:
+            payload = msgpack.packb(response, use_bin_type=True)
+
+        if self._compressor is not None and len(payload) >= self.compress_min_bytes:
+            header |= COMPRESSED
+            payload = self._compressor.compress(payload)
+        return bytes((header,)) + payload
+
+    def decode(self, data: Union[bytes, str]) -> Dict:
+        if isinstance(data, str) or data[:1] == b"{":
+            return json.loads(data)
+
+        header = data[0]
+        payload = data[1:]
+        if header & COMPRESSED:
+            if self._decompressor is None:
+                raise ValueError("Cached entry is zstd-compressed but zstandard is not installed")
+            payload = self._decompressor.decompress(payload)
+
+        fmt = header & ~COMPRESSED
+        if fmt == FORMAT_ORJSON:
+            return orjson.loads(payload) if ORJSON_AVAILABLE else json.loads(payload)
+        if fmt == FORMAT_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise ValueError("Cached entry is msgpack-encoded but msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False)
+        raise ValueError(f"Unknown cache entry header: {header:#04x}")
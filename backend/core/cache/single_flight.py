@@ -0,0 +1,281 @@
+"""
+Single-Flight Request Coalescing
+Concurrent misses for the same question share one computation
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from redis.exceptions import LockError
+
+from backend.core.cache.async_redis_manager import AsyncRedisCacheManager
+from backend.core.cache.redis_manager import RedisCacheManager
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight computation that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Per-process coalescing: the first caller for a key runs fn, callers
+    arriving while it runs block and receive a copy of its result (or its
+    exception)
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _key(self, question: str) -> str:
+        return question.lower().strip()
+
+    def do(self, question: str, fn: Callable[[], Any]) -> Any:
+        key = self._key(question)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.leaders += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"🔗 Waiting for in-flight answer: {question[:50]}...")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return dict(call.result) if isinstance(call.result, dict) else call.result
+
+        try:
+            call.result = self._run(question, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run(self, question: str, fn: Callable[[], Any]) -> Any:
+        return fn()
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
+
+
+class RedisSingleFlight(SingleFlight):
+    """
+    Coalescing across workers: per-process single-flight, then a Redis lock
+
+    The worker holding the lock computes (and caches) the answer; other
+    workers poll the cache until it appears, the lock is released or
+    wait_timeout passes, and only then compute themselves. Without Redis it
+    behaves like SingleFlight.
+    """
+
+    def __init__(
+        self,
+        cache: RedisCacheManager,
+        lock_timeout: float = 60,
+        wait_timeout: float = 30,
+        poll_interval: float = 0.1
+    ):
+        """
+        Args:
+            cache: Cache manager the leader writes the answer to
+            lock_timeout: Lock expiry (covers a crashed leader)
+            wait_timeout: Max time to wait for another worker's answer
+            poll_interval: Seconds between cache checks while waiting
+        """
+        super().__init__()
+        self.cache = cache
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.remote_waits = 0
+
+    def _run(self, question: str, fn: Callable[[], Any]) -> Any:
+        cache = self.cache
+        if not cache.enabled:
+            return fn()
+
+        lock = cache.redis_client.lock(
+            f"{cache._generate_cache_key(question)}:lock", timeout=self.lock_timeout
+        )
+        try:
+            acquired = lock.acquire(blocking=False)
+        except Exception as e:
+            logger.error(f"Error acquiring answer lock: {e}")
+            cache._on_redis_error(e)
+            return fn()
+
+        if acquired:
+            try:
+                return fn()
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # Expired while computing; another worker may hold it now
+                    pass
+                except Exception as e:
+                    logger.error(f"Error releasing answer lock: {e}")
+
+        # Another worker is generating this answer: wait for it to be cached
+        self.remote_waits += 1
+        logger.info(f"🔗 Another worker is answering: {question[:50]}...")
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                response = cache._get_exact(question)
+                if response is not None:
+                    return response
+                if not lock.locked():
+                    return cache._get_exact(question) or fn()
+        except Exception as e:
+            logger.error(f"Error waiting for answer lock: {e}")
+        return fn()
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["remote_waits"] = self.remote_waits
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    Per-process coalescing for the async request path: the first coroutine
+    for a key starts fn as a task, coroutines arriving while it runs await
+    the same task and receive a copy of its result
+
+    The task is shielded, so a caller that disconnects does not cancel the
+    answer the other callers are waiting for.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, question: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = question.lower().strip()
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(self._run(question, fn))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.leaders += 1
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        logger.info(f"🔗 Waiting for in-flight answer: {question[:50]}...")
+        result = await asyncio.shield(task)
+        return dict(result) if isinstance(result, dict) else result
+
+    async def _run(self, question: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await fn()
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
+
+
+class AsyncRedisSingleFlight(AsyncSingleFlight):
+    """
+    Async counterpart of RedisSingleFlight: per-process coalescing, then a
+    Redis lock (same key, so sync and async workers coalesce with each other)
+    """
+
+    def __init__(
+        self,
+        cache: AsyncRedisCacheManager,
+        lock_timeout: float = 60,
+        wait_timeout: float = 30,
+        poll_interval: float = 0.1
+    ):
+        """
+        Args:
+            cache: Async cache manager the leader writes the answer to
+            lock_timeout: Lock expiry (covers a crashed leader)
+            wait_timeout: Max time to wait for another worker's answer
+            poll_interval: Seconds between cache checks while waiting
+        """
+        super().__init__()
+        self.cache = cache
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.remote_waits = 0
+
+    async def _get_exact(self, question: str) -> Any:
+        return (await self.cache.get_many([question]))[0]
+
+    async def _run(self, question: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        cache = self.cache
+        if not cache.enabled:
+            return await fn()
+
+        key = cache.cache._key_for(question, await cache._get_generation())
+        lock = cache.redis_client.lock(f"{key}:lock", timeout=self.lock_timeout)
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except Exception as e:
+            logger.error(f"Error acquiring answer lock: {e}")
+            cache.cache._on_redis_error(e)
+            return await fn()
+
+        if acquired:
+            try:
+                return await fn()
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    # Expired while computing; another worker may hold it now
+                    pass
+                except Exception as e:
+                    logger.error(f"Error releasing answer lock: {e}")
+
+        # Another worker is generating this answer: wait for it to be cached
+        self.remote_waits += 1
+        logger.info(f"🔗 Another worker is answering: {question[:50]}...")
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                response = await self._get_exact(question)
+                if response is not None:
+                    return response
+                if not await lock.locked():
+                    return await self._get_exact(question) or await fn()
+        except Exception as e:
+            logger.error(f"Error waiting for answer lock: {e}")
+        return await fn()
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["remote_waits"] = self.remote_waits
+        return stats
@@ -0,0 +1,152 @@
+"""
+SQLite Fallback Cache
+Size-bounded on-disk answer store used while Redis is unreachable
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCache:
+    """
+    Persistent key/value store with TTL and LRU eviction by total bytes
+
+    Entries written while Redis is down are flagged "pending" so they can be
+    written back once it recovers. Survives restarts, so an outage that
+    spans a redeploy still serves previously generated answers.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 24 * 3600):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Total payload budget; least recently used entries are evicted
+            ttl_seconds: Entry lifetime
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                sources TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                pending INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_pending ON answers (pending)")
+        self._purge_expired()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Serialized value for a key, or None if missing/expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM answers WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE answers SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: bytes, source_files: List[str] = None, pending: bool = True) -> None:
+        """Store a serialized value, evicting least recently used entries to fit"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, sources, size, expires_at, accessed_at, pending) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, value, json.dumps(sorted(set(source_files or []))), size,
+                 now + self.ttl_seconds, now, int(pending))
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop oldest-accessed entries until back under budget
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM answers ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM answers WHERE key = ?", victims)
+
+    def _purge_expired(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM answers WHERE key = ?", (key,)).rowcount > 0
+
+    def delete_source(self, filename: str) -> int:
+        """Delete entries built from a given source file"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM answers WHERE EXISTS "
+                "(SELECT 1 FROM json_each(answers.sources) WHERE value = ?)",
+                (filename,)
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+
+    def pending(self, limit: int = 500) -> List[Tuple[str, bytes, List[str], float]]:
+        """Up to limit unsynced, unexpired entries as (key, value, sources, seconds left)"""
+        self._purge_expired()
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, sources, expires_at FROM answers WHERE pending = 1 LIMIT ?", (limit,)
+            ).fetchall()
+        return [(key, value, json.loads(sources), expires_at - now) for key, value, sources, expires_at in rows]
+
+    def mark_synced(self, keys: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("UPDATE answers SET pending = 0 WHERE key = ?", [(key,) for key in keys])
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries, size, pending = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(pending), 0) FROM answers"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "pending_write_back": pending
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
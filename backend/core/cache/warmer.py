@@ -0,0 +1,161 @@
+"""
+Cache Warming
+Regenerates answers to frequent recent questions before traffic arrives
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.core.cache.redis_manager import RedisCacheManager
+
+logger = logging.getLogger(__name__)
+
+# "2024-01-31 12:00:00 - service - INFO - ❓ Question: ..." (backend/utils/logger.py format)
+_QUESTION_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - \S+ - INFO - \W*Question: (.+)$")
+
+
+def top_questions_from_logs(log_dir: Path, limit: int = 100, days: int = 7) -> List[Tuple[str, int]]:
+    """
+    Most frequent questions in app.log (and its rotated copies) over the last days
+
+    Returns:
+        (question, count) pairs, most frequent first; the latest spelling of
+        each normalized question is kept
+    """
+    since = datetime.now() - timedelta(days=days)
+    counts = Counter()
+    spelling: Dict[str, str] = {}
+
+    log_files = sorted(Path(log_dir).glob("app.log*"), key=lambda path: path.stat().st_mtime)
+    for log_file in log_files:
+        with open(log_file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = _QUESTION_LINE.match(line.rstrip("\n"))
+                if not match:
+                    continue
+                if datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S") < since:
+                    continue
+                question = match.group(2).strip()
+                normalized = question.lower()
+                counts[normalized] += 1
+                spelling[normalized] = question
+
+    return [(spelling[normalized], count) for normalized, count in counts.most_common(limit)]
+
+
+class CacheWarmer:
+    """
+    Background warming job: skips questions that are already cached and
+    regenerates the rest with at most max_concurrency in flight and at
+    most rate_per_second started per second
+    """
+
+    def __init__(
+        self,
+        cache: RedisCacheManager,
+        generate: Callable[[str], Dict],
+        max_concurrency: int = 2,
+        rate_per_second: float = 0.5
+    ):
+        """
+        Args:
+            cache: Answer cache to populate
+            generate: Answers a question and caches the result
+            max_concurrency: Concurrent generations (LLM calls)
+            rate_per_second: Max generations started per second
+        """
+        self.cache = cache
+        self.generate = generate
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {"candidates": 0, "already_cached": 0, "warmed": 0, "failed": 0, "running": False}
+
+    def collect(self, limit: int = 100, log_dir: Path = None, days: int = 7) -> List[str]:
+        """Candidate questions: Redis frequency counter merged with request logs"""
+        counts = Counter()
+        spelling: Dict[str, str] = {}
+        sources = [self.cache.top_queries(limit, days)]
+        if log_dir is not None and Path(log_dir).exists():
+            sources.append(top_questions_from_logs(log_dir, limit, days))
+
+        for source in sources:
+            for question, count in source:
+                normalized = question.lower().strip()
+                # Both sources see the same requests: keep the larger count
+                counts[normalized] = max(counts[normalized], count)
+                spelling.setdefault(normalized, question)
+
+        return [spelling[normalized] for normalized, _ in counts.most_common(limit)]
+
+    def warm(self, questions: List[str]) -> Dict:
+        """Regenerate uncached answers (blocking); returns run statistics"""
+        self.stats.update(candidates=len(questions), already_cached=0, warmed=0, failed=0, running=True)
+
+        cached = self.cache.get_many(questions)
+        missing = [question for question, hit in zip(questions, cached) if hit is None]
+        self.stats["already_cached"] = len(questions) - len(missing)
+        logger.info(f"🔥 Warming cache: {len(missing)} of {len(questions)} frequent questions are not cached")
+
+        interval = 1.0 / self.rate_per_second if self.rate_per_second > 0 else 0.0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="warm") as executor:
+            next_start = time.monotonic()
+            for question in missing:
+                # Rate limit: space out generation starts
+                if self._stop.wait(max(0.0, next_start - time.monotonic())):
+                    break
+                next_start = max(next_start, time.monotonic()) + interval
+                executor.submit(self._warm_one, question)
+
+        self.stats["running"] = False
+        logger.info(
+            f"🔥 Cache warming done: {self.stats['warmed']} warmed, "
+            f"{self.stats['failed']} failed, {self.stats['already_cached']} already cached"
+        )
+        return dict(self.stats)
+
+    def _warm_one(self, question: str) -> None:
+        if self._stop.is_set():
+            return
+        try:
+            response = self.generate(question)
+        except Exception as e:
+            response = None
+            logger.warning(f"Cache warming failed for '{question[:50]}': {e}")
+
+        # Error answers are returned but not cached
+        warmed = response is not None and response.get("source_type") != "error"
+        with self._stats_lock:
+            self.stats["warmed" if warmed else "failed"] += 1
+
+    def start(self, limit: int = 100, log_dir: Path = None, days: int = 7) -> bool:
+        """Collect candidates and warm them in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            logger.info("🔥 Cache warming already running")
+            return False
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=lambda: self.warm(self.collect(limit, log_dir, days)),
+            name="cache-warmer",
+            daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            return dict(self.stats)
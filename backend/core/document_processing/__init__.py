@@ -1,9 +1,12 @@
 """
 Document Processing Module
-PDF processing, OCR, and text chunking
+PDF processing, OCR, text chunking, and RAG context packing
 """
 
 from .pdf_processor import PDFProcessor
 from .text_chunker import TextChunker
+from .fast_splitter import FastRecursiveSplitter
+from .deduplicator import ChunkDeduplicator
+from .context_builder import ContextBuilder
 
-__all__ = ["PDFProcessor", "TextChunker"]
+__all__ = ["PDFProcessor", "TextChunker", "FastRecursiveSplitter", "ChunkDeduplicator", "ContextBuilder"]
@@ -0,0 +1,225 @@
+"""
+RAG Context Packing
+Fits the highest-scoring retrieved chunks into a token budget for the prompt
+"""
+
+import logging
+import re
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+
+def approximate_tokens(text: str) -> int:
+    """Token estimate without a tokenizer (~4 characters per token in English)"""
+    return (len(text) + 3) // 4
+
+
+class ContextBuilder:
+    """
+    Builds the {context} block of RAG prompts
+
+    Chunks are taken in descending relevance score and packed until
+    max_tokens is reached; the first chunk is truncated rather than dropped
+    if it alone is over budget. Text a chunk shares with an already packed
+    neighbour (the splitter's chunk overlap) is removed, using start_index
+    metadata when both chunks come from the same page and a suffix/prefix
+    match of up to max_overlap_chars otherwise. With trim_sentences, each
+    chunk keeps only the sentences that share a word with the question.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        max_overlap_chars: Optional[int] = 200,
+        trim_sentences: bool = False,
+        token_counter: Optional[Callable[[str], int]] = None,
+        min_overlap_chars: int = 20,
+        window: int = 1000
+    ):
+        """
+        Args:
+            max_tokens: Token budget for the context block
+            max_overlap_chars: Longest shared text looked for between chunks
+                (None: up to the shorter chunk)
+            trim_sentences: Keep only query-relevant sentences of each chunk
+            token_counter: Counts tokens in a string (default: approximate)
+            min_overlap_chars: Shorter suffix/prefix matches are coincidence
+            window: Recent prompt sizes kept for percentiles
+        """
+        self.max_tokens = max_tokens
+        self.max_overlap_chars = max_overlap_chars
+        self.trim_sentences = trim_sentences
+        self.count_tokens = token_counter or approximate_tokens
+        self.min_overlap_chars = min_overlap_chars
+
+        self._lock = threading.Lock()
+        self.prompt_tokens: deque = deque(maxlen=window)
+        self.context_tokens: deque = deque(maxlen=window)
+        self.stats = {
+            "requests": 0,
+            "chunks_in": 0,
+            "chunks_packed": 0,
+            "chunks_truncated": 0,
+            "overlap_chars_removed": 0,
+            "sentences_dropped": 0
+        }
+
+    # ----- overlap -----
+
+    @staticmethod
+    def _span(document: Document) -> Optional[Tuple[str, object, int]]:
+        metadata = document.metadata
+        if "start_index" not in metadata:
+            return None
+        source = metadata.get("filename") or metadata.get("source")
+        return source, metadata.get("page"), metadata["start_index"]
+
+    def _text_overlap(self, before: str, after: str) -> int:
+        """Length of the longest suffix of before that starts after"""
+        longest = min(len(before), len(after))
+        if self.max_overlap_chars is not None:
+            longest = min(longest, self.max_overlap_chars)
+        for length in range(longest, self.min_overlap_chars - 1, -1):
+            if before.endswith(after[:length]):
+                return length
+        return 0
+
+    @staticmethod
+    def _subtract(pieces: List[Tuple[int, str]], cut_start: int, cut_end: int) -> List[Tuple[int, str]]:
+        """(start_index, text) pieces minus the character range [cut_start, cut_end)"""
+        kept = []
+        for start, text in pieces:
+            end = start + len(text)
+            if cut_end <= start or cut_start >= end:
+                kept.append((start, text))
+                continue
+            # Keep what lies on either side of the shared range
+            if start < cut_start:
+                kept.append((start, text[:cut_start - start]))
+            if cut_end < end:
+                kept.append((cut_end, text[cut_end - start:]))
+        return kept
+
+    def _strip_overlap(self, document: Document, packed: List[Document]) -> str:
+        """document's text minus what packed neighbours already contain"""
+        span = self._span(document)
+        pieces = [(span[2] if span else 0, document.page_content)]
+        for other in packed:
+            if not pieces:
+                break
+            other_text = other.page_content
+            other_span = self._span(other)
+            if span and other_span and span[:2] == other_span[:2]:
+                pieces = self._subtract(pieces, other_span[2], other_span[2] + len(other_text))
+                continue
+            start, text = pieces[0]
+            head = self._text_overlap(other_text, text)
+            if head:
+                pieces[0] = (start + head, text[head:])
+            start, text = pieces[-1]
+            tail = self._text_overlap(text, other_text)
+            if tail:
+                pieces[-1] = (start, text[:-tail])
+            pieces = [(start, text) for start, text in pieces if text]
+        return " ".join(text.strip() for _, text in pieces if text.strip())
+
+    # ----- sentence trimming -----
+
+    def _trim(self, text: str, query_words: set) -> str:
+        sentences = _SENTENCE_END.split(text)
+        if len(sentences) < 3 or not query_words:
+            return text
+        kept = [s for s in sentences if query_words & set(_WORD.findall(s.lower()))]
+        if not kept:
+            # Nothing matches word for word: the embedding match is still the best signal
+            return text
+        with self._lock:
+            self.stats["sentences_dropped"] += len(sentences) - len(kept)
+        return " ".join(kept)
+
+    # ----- packing -----
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Leading part of text within budget tokens, cut at a sentence if possible"""
+        cut = text[:max(1, len(text) * budget // max(1, self.count_tokens(text)))]
+        while cut and self.count_tokens(cut) > budget:
+            cut = cut[:int(len(cut) * 0.9)]
+        sentence_end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+        return cut[:sentence_end + 1] if sentence_end > len(cut) // 2 else cut
+
+    def build(self, question: str, documents: List[Document], scores: List[float] = None) -> str:
+        """Context block for documents, best-scoring first, within the token budget"""
+        if scores is None or len(scores) != len(documents):
+            scores = [0.0] * len(documents)
+        ranked = [doc for _, doc in sorted(zip(scores, documents), key=lambda pair: -pair[0])]
+        query_words = {word for word in _WORD.findall(question.lower()) if len(word) > 2}
+
+        packed: List[Document] = []
+        parts: List[str] = []
+        used = overlap_removed = truncated = 0
+        separator_tokens = self.count_tokens("\n\n")
+        for document in ranked:
+            text = self._strip_overlap(document, packed)
+            overlap = len(document.page_content.strip()) - len(text)
+            if self.trim_sentences:
+                text = self._trim(text, query_words)
+            if not text:
+                continue
+
+            tokens = self.count_tokens(text) + (separator_tokens if parts else 0)
+            if used + tokens > self.max_tokens:
+                if parts:
+                    # A lower-scoring but shorter chunk may still fit
+                    continue
+                text = self._truncate(text, self.max_tokens)
+                tokens = self.count_tokens(text)
+                truncated += 1
+            packed.append(document)
+            parts.append(text)
+            used += tokens
+            overlap_removed += overlap
+
+        context = "\n\n".join(parts)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["chunks_in"] += len(documents)
+            self.stats["chunks_packed"] += len(parts)
+            self.stats["chunks_truncated"] += truncated
+            self.stats["overlap_chars_removed"] += max(0, overlap_removed)
+            self.context_tokens.append(used)
+        return context
+
+    def record_prompt(self, prompt: str) -> int:
+        """Count and record the tokens of a fully rendered prompt"""
+        tokens = self.count_tokens(prompt)
+        with self._lock:
+            self.prompt_tokens.append(tokens)
+        return tokens
+
+    @staticmethod
+    def _summary(values: List[int]) -> Dict:
+        if not values:
+            return {"p50": None, "p95": None, "max": None}
+        ordered = sorted(values)
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "max": ordered[-1]
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "max_tokens": self.max_tokens,
+                "context_tokens": self._summary(list(self.context_tokens)),
+                "prompt_tokens": self._summary(list(self.prompt_tokens))
+            }
@@ -0,0 +1,243 @@
+"""
+Chunk Deduplication
+Drops exact and near-duplicate chunks (repeated headers, boilerplate, revisions) before embedding
+"""
+
+import hashlib
+import logging
+import re
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.core.vector_store.chunk_ids import make_chunk_id
+from backend.core.vector_store.occurrences import StoredChunk, chunk_location
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _Entry:
+    """Hashes of one kept (stored) chunk"""
+
+    __slots__ = ("filename", "fingerprint", "digests")
+
+    def __init__(self, filename: str, fingerprint: Optional[int]):
+        self.filename = filename
+        self.fingerprint = fingerprint
+        self.digests: List[bytes] = []
+
+
+class ChunkDeduplicator:
+    """
+    Exact (content hash) + near-duplicate (64-bit SimHash) chunk filter
+
+    The first occurrence of a chunk is kept; later copies are dropped and
+    returned as occurrences of the kept chunk's ID, for the vector store to
+    record in the chunk's metadata. Only hashes are held, for at most
+    max_entries kept chunks (least recently matched evicted first); after a
+    restart they are rebuilt from the store with load(). Kept chunks get
+    their hashes as "content_hash" / "simhash" metadata so that rebuild
+    does not re-hash the corpus.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 4,
+        shingle_size: int = 3,
+        min_shingles: int = 8,
+        max_entries: int = 100000
+    ):
+        """
+        Args:
+            max_distance: Max SimHash Hamming distance counted as near-duplicate
+            shingle_size: Words per shingle
+            min_shingles: Shorter chunks are only deduplicated exactly
+            max_entries: Kept chunks remembered (bounds memory)
+        """
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.max_entries = max_entries
+
+        # Pigeonhole: fingerprints within max_distance share at least one band
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()  # chunk ID -> hashes
+        self._exact: Dict[bytes, str] = {}  # content digest -> kept chunk ID
+        self._buckets: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self.stats = self._empty_stats()
+
+    def _empty_stats(self) -> Dict:
+        return {
+            "chunks_in": 0,
+            "chunks_out": 0,
+            "exact_duplicates": 0,
+            "near_duplicates": 0,
+            "bytes_saved": 0
+        }
+
+    def _normalize(self, text: str) -> str:
+        return _WHITESPACE.sub(" ", text).strip().lower()
+
+    @staticmethod
+    def _digest(normalized: str) -> bytes:
+        return hashlib.sha1(normalized.encode()).digest()[:12]
+
+    def _simhash(self, words: List[str]) -> Optional[int]:
+        """64-bit SimHash over word shingles (None if the text is too short)"""
+        count = len(words) - self.shingle_size + 1
+        if count < self.min_shingles:
+            return None
+
+        hashes = np.array(
+            [
+                int.from_bytes(
+                    hashlib.blake2b(" ".join(words[i:i + self.shingle_size]).encode(), digest_size=8).digest(),
+                    "big"
+                )
+                for i in range(count)
+            ],
+            dtype=">u8"
+        )
+        # Bit matrix (shingles x 64), MSB first; majority vote per bit
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(count, 8), axis=1)
+        votes = bits.sum(axis=0) * 2 > count
+        return int("".join("1" if vote else "0" for vote in votes), 2)
+
+    def _bands(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & mask
+
+    def _find_near(self, fingerprint: int) -> Optional[str]:
+        for key in self._bands(fingerprint):
+            for chunk_id in self._buckets.get(key, ()):
+                other = self._entries[chunk_id].fingerprint
+                if (fingerprint ^ other).bit_count() <= self.max_distance:
+                    return chunk_id
+        return None
+
+    # ----- state -----
+
+    def _remember(self, chunk_id: str, filename: str, digest: bytes, fingerprint: Optional[int]) -> None:
+        entry = self._entries.get(chunk_id)
+        if entry is None:
+            entry = self._entries[chunk_id] = _Entry(filename, fingerprint)
+            if fingerprint is not None:
+                for key in self._bands(fingerprint):
+                    self._buckets[key].add(chunk_id)
+        entry.digests.append(digest)
+        self._exact[digest] = chunk_id
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, chunk_id: str) -> None:
+        entry = self._entries.pop(chunk_id)
+        for digest in entry.digests:
+            if self._exact.get(digest) == chunk_id:
+                del self._exact[digest]
+        if entry.fingerprint is not None:
+            for key in self._bands(entry.fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(chunk_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def load(self, chunks: Iterable[StoredChunk]) -> int:
+        """
+        Remember already-stored chunks, given as (chunk ID, text, metadata)
+
+        Used after a restart (and when chunks are reassigned to another
+        file) so later uploads are deduplicated against the store.
+        """
+        loaded = 0
+        for chunk_id, text, metadata in chunks:
+            if metadata.get("content_hash"):
+                digest = bytes.fromhex(metadata["content_hash"])
+                simhash = metadata.get("simhash")
+                fingerprint = int(simhash, 16) if simhash else None
+            else:
+                normalized = self._normalize(text)
+                digest = self._digest(normalized)
+                fingerprint = self._simhash(normalized.split(" "))
+            self._remember(chunk_id, metadata.get("filename", "Unknown"), digest, fingerprint)
+            loaded += 1
+        return loaded
+
+    # ----- filtering -----
+
+    def deduplicate(self, chunks: List[Document]) -> Tuple[List[Document], Dict[str, List[str]]]:
+        """
+        Drop exact and near duplicates
+
+        Returns:
+            (kept chunks, {kept chunk ID: locations of its dropped copies});
+            kept chunk IDs may belong to chunks stored by earlier uploads
+        """
+        unique = []
+        occurrences: Dict[str, List[str]] = defaultdict(list)
+        batch = self._empty_stats()
+        batch["chunks_in"] = len(chunks)
+
+        for chunk in chunks:
+            normalized = self._normalize(chunk.page_content)
+            digest = self._digest(normalized)
+
+            kept = self._exact.get(digest)
+            if kept is not None:
+                self._entries.move_to_end(kept)
+                occurrences[kept].append(chunk_location(chunk.metadata))
+                batch["exact_duplicates"] += 1
+                batch["bytes_saved"] += len(chunk.page_content.encode())
+                continue
+
+            fingerprint = self._simhash(normalized.split(" "))
+            if fingerprint is not None:
+                kept = self._find_near(fingerprint)
+                if kept is not None:
+                    self._entries.move_to_end(kept)
+                    self._remember(kept, self._entries[kept].filename, digest, None)
+                    occurrences[kept].append(chunk_location(chunk.metadata))
+                    batch["near_duplicates"] += 1
+                    batch["bytes_saved"] += len(chunk.page_content.encode())
+                    continue
+
+            chunk.metadata["content_hash"] = digest.hex()
+            if fingerprint is not None:
+                # Hex: Chroma integers are signed 64-bit
+                chunk.metadata["simhash"] = f"{fingerprint:016x}"
+            self._remember(make_chunk_id(chunk), chunk.metadata.get("filename", "Unknown"), digest, fingerprint)
+            unique.append(chunk)
+
+        batch["chunks_out"] = len(unique)
+        for key, value in batch.items():
+            self.stats[key] += value
+
+        logger.info(
+            f"🧹 Dedup: {batch['chunks_in']} → {batch['chunks_out']} chunks "
+            f"({batch['exact_duplicates']} exact, {batch['near_duplicates']} near, "
+            f"{batch['bytes_saved'] / 1024:.1f} KB saved)"
+        )
+        return unique, dict(occurrences)
+
+    def forget_source(self, filename: str) -> None:
+        """Forget chunks kept from a file (before re-ingesting or deleting it)"""
+        for chunk_id in [chunk_id for chunk_id, entry in self._entries.items() if entry.filename == filename]:
+            self._drop(chunk_id)
+
+    def get_stats(self) -> Dict:
+        """Cumulative deduplication statistics"""
+        return {**self.stats, "remembered": len(self._entries), "max_entries": self.max_entries}
+
+    def reset(self) -> None:
+        """Forget every seen chunk (e.g. before a full rebuild)"""
+        self._entries.clear()
+        self._exact.clear()
+        self._buckets.clear()
+        self.stats = self._empty_stats()
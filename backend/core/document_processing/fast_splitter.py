@@ -0,0 +1,205 @@
+"""
+Offset-Based Recursive Text Splitter
+Drop-in replacement for RecursiveCharacterTextSplitter without intermediate strings
+"""
+
+import copy
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from operator import sub
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
+
+
+class FastRecursiveSplitter:
+    """
+    Recursive splitter that works on (start, end) offsets into the source text
+
+    Produces the same chunks as LangChain's RecursiveCharacterTextSplitter
+    with literal separators, keep_separator=True and strip_whitespace=True.
+    Because kept separators are re-joined with "", every chunk is a
+    contiguous span of the page, so pieces are tracked as boundary offsets
+    and text is only materialized when a chunk is emitted. Each separator
+    level is scanned once with a compiled pattern instead of regex split + per-piece
+    copies.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: List[str] = None,
+        length_function: Optional[Callable[[str], int]] = None,
+        add_start_index: bool = False
+    ):
+        """
+        Args:
+            chunk_size: Max chunk length
+            chunk_overlap: Overlap carried into the next chunk
+            separators: Literal separators, tried in order
+            length_function: Length measure (None = characters, computed from offsets)
+            add_start_index: Record each chunk's page offset as metadata["start_index"]
+        """
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size})"
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+        self.length_function = length_function
+        self.add_start_index = add_start_index
+        self._patterns: Dict[str, Pattern] = {}
+
+    def _pattern(self, separator: str) -> Pattern:
+        """Compiled literal pattern for a separator"""
+        pattern = self._patterns.get(separator)
+        if pattern is None:
+            pattern = self._patterns[separator] = re.compile(re.escape(separator))
+        return pattern
+
+    def _boundaries(self, text: str, start: int, end: int, separators: List[str]) -> Tuple[List[int], List[str]]:
+        """
+        Partition [start, end) before each occurrence of the first separator present
+
+        Returns the piece boundaries [b0, b1, ..., bn] (piece i is
+        [b[i], b[i+1])) and the separators left for recursing into long pieces.
+        """
+        for i, separator in enumerate(separators):
+            if not separator:
+                return list(range(start, end + 1)), []
+
+            # One scan per level: the occurrences both select and split
+            positions = [match.start() for match in self._pattern(separator).finditer(text, start, end)]
+            if not positions:
+                continue
+
+            if positions[0] > start:
+                positions.insert(0, start)
+            positions.append(end)
+            return positions, separators[i + 1:]
+
+        # No separator found: the text is one piece
+        return ([start, end] if end > start else []), []
+
+    def _emit(self, text: str, start: int, end: int, chunks: List[Span]) -> None:
+        """Append a whitespace-trimmed span unless nothing is left"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            chunks.append((start, end))
+
+    def _merge(self, text: str, bounds: List[int], chunks: List[Span]) -> None:
+        """
+        Merge contiguous pieces into chunks, carrying overlap (character lengths)
+
+        With lengths taken from offsets the window sum is bounds[j] - bounds[ws],
+        so chunk ends and overlap starts are found by bisection instead of
+        walking every piece.
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        last = len(bounds) - 1
+        window_start = 0
+        # First piece that would overflow the window
+        index = bisect_right(bounds, bounds[0] + size, 1) - 1
+
+        while index < last:
+            self._emit(text, bounds[window_start], bounds[index], chunks)
+
+            # Drop leading pieces until only the overlap remains and the next piece fits
+            window_start = max(
+                bisect_left(bounds, bounds[index] - overlap, window_start, index),
+                bisect_left(bounds, bounds[index + 1] - size, window_start, index)
+            )
+            index = bisect_right(bounds, bounds[window_start] + size, index + 1) - 1
+
+        self._emit(text, bounds[window_start], bounds[last], chunks)
+
+    def _merge_measured(self, text: str, bounds: List[int], lengths: List[int], chunks: List[Span]) -> None:
+        """Merge contiguous pieces using a custom length function"""
+        window_start = 0
+        total = 0
+
+        for index, length in enumerate(lengths):
+            if total + length > self.chunk_size:
+                if total > self.chunk_size:
+                    logger.warning(
+                        f"Created a chunk of size {total}, which is longer than the specified {self.chunk_size}"
+                    )
+                if index > window_start:
+                    self._emit(text, bounds[window_start], bounds[index], chunks)
+
+                    # Drop leading pieces until only the overlap remains
+                    while total > self.chunk_overlap or (
+                        total + length > self.chunk_size and total > 0
+                    ):
+                        total -= lengths[window_start]
+                        window_start += 1
+            total += length
+
+        self._emit(text, bounds[window_start], bounds[-1], chunks)
+
+    def _split(self, text: str, start: int, end: int, separators: List[str], chunks: List[Span]) -> None:
+        """Split [start, end) with the first separator present, recursing on long pieces"""
+        bounds, remaining = self._boundaries(text, start, end, separators)
+        if not bounds:
+            return
+
+        if self.length_function is None:
+            lengths = list(map(sub, bounds[1:], bounds))
+        else:
+            lengths = [self.length_function(text[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+        run_start = 0
+        for index in [i for i, length in enumerate(lengths) if length >= self.chunk_size]:
+            # Merge the run of small pieces before this long one
+            if index > run_start:
+                self._merge_run(text, bounds[run_start:index + 1], lengths[run_start:index], chunks)
+
+            if not remaining:
+                chunks.append((bounds[index], bounds[index + 1]))
+            else:
+                self._split(text, bounds[index], bounds[index + 1], remaining, chunks)
+            run_start = index + 1
+
+        if run_start < len(lengths):
+            self._merge_run(text, bounds[run_start:], lengths[run_start:], chunks)
+
+    def _merge_run(self, text: str, bounds: List[int], lengths: List[int], chunks: List[Span]) -> None:
+        if self.length_function is None:
+            self._merge(text, bounds, chunks)
+        else:
+            self._merge_measured(text, bounds, lengths, chunks)
+
+    def split_offsets(self, text: str) -> List[Span]:
+        """Chunk boundaries as (start, end) offsets into text"""
+        chunks: List[Span] = []
+        self._split(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        """Materialize chunk strings"""
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split LangChain documents, copying metadata to every chunk"""
+        chunks = []
+        for document in documents:
+            text = document.page_content
+            for start, end in self.split_offsets(text):
+                metadata = copy.deepcopy(document.metadata)
+                if self.add_start_index:
+                    metadata["start_index"] = start
+                chunks.append(Document(page_content=text[start:end], metadata=metadata))
+        return chunks
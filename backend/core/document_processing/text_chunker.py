@@ -8,26 +8,65 @@ from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from backend.config import settings
+from backend.core.document_processing.fast_splitter import FastRecursiveSplitter
+from backend.core.document_processing.tokenization import (
+    TokenLengthFunction, enforce_token_limit, token_chunk_size
+)
 
 logger = logging.getLogger(__name__)
 
+SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
+
 
 class TextChunker:
     """Chunk documents for embedding"""
     
-    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
-        chunk_size = chunk_size or settings.CHUNK_SIZE
-        chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+    def __init__(
+        self,
+        chunk_size: int = None,
+        chunk_overlap: int = None,
+        length_unit: str = None,
+        splitter: str = None
+    ):
+        length_unit = length_unit or settings.CHUNK_LENGTH_UNIT
+        splitter = splitter or settings.CHUNK_SPLITTER
+        
+        if length_unit == "tokens":
+            # Measure in embedding-model tokens so chunks fit the model window
+            chunk_size = chunk_size or token_chunk_size(settings.EMBEDDING_MODEL, settings.EMBEDDING_MAX_TOKENS)
+            chunk_overlap = chunk_overlap or settings.CHUNK_TOKEN_OVERLAP
+            length_function = TokenLengthFunction(settings.EMBEDDING_MODEL)
+        else:
+            chunk_size = chunk_size or settings.CHUNK_SIZE
+            chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+            length_function = len
+        
+        self.length_unit = length_unit
+        self.chunk_size = chunk_size
+        self.length_function = length_function
         
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
-        )
+        if splitter == "native":
+            # Same boundaries as RecursiveCharacterTextSplitter, offset-based
+            self.splitter = FastRecursiveSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=SEPARATORS,
+                length_function=None if length_function is len else length_function,
+                add_start_index=True
+            )
+        else:
+            self.splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+                add_start_index=True,
+                separators=SEPARATORS
+            )
     
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into smaller chunks"""
         chunks = self.splitter.split_documents(documents)
-        logger.info(f"Created {len(chunks)} chunks from {len(documents)} pages")
+        if self.length_unit == "tokens":
+            chunks = enforce_token_limit(chunks, self.length_function, self.chunk_size)
+        logger.info(f"Created {len(chunks)} chunks from {len(documents)} pages ({self.length_unit})")
         return chunks
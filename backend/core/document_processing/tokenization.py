@@ -0,0 +1,113 @@
+"""
+Tokenizer Helpers for Chunking
+Measures text length in embedding-model tokens
+"""
+
+import logging
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str):
+    """Load a fast (Rust) tokenizer once per process"""
+    from transformers import AutoTokenizer
+
+    logger.info(f" Loading tokenizer for {model_name}...")
+    return AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+
+def token_chunk_size(model_name: str, max_tokens: int) -> int:
+    """
+    Largest chunk, in tokens, whose model input fits max_tokens
+
+    The tokenizer adds its special tokens ([CLS]/[SEP] for BERT-style
+    encoders) around every input, so those are subtracted.
+    """
+    return max_tokens - get_tokenizer(model_name).num_special_tokens_to_add(pair=False)
+
+
+class TokenLengthFunction:
+    """
+    Cached token counter usable as a text splitter length_function
+
+    Splitters measure the same separators and pieces many times while
+    merging, so counts are memoized per string.
+    """
+
+    def __init__(self, model_name: str, cache_size: int = 65536):
+        tokenizer = get_tokenizer(model_name)
+        # Call the Rust tokenizer directly, skipping the Python wrapper
+        self._backend = tokenizer.backend_tokenizer
+        self._count = lru_cache(maxsize=cache_size)(self._count_tokens)
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self._backend.encode(text, add_special_tokens=False).ids)
+
+    def __call__(self, text: str) -> int:
+        return self._count(text)
+
+    def windows(self, text: str, max_tokens: int) -> List[Tuple[int, str]]:
+        """
+        Consecutive pieces of text of at most max_tokens tokens each
+
+        Pieces end at a word boundary when one falls in the second half of
+        the window. Returns (offset in text, piece) pairs.
+        """
+        offsets = self._backend.encode(text, add_special_tokens=False).offsets
+        pieces = []
+        first = 0
+        while first < len(offsets):
+            last = min(first + max_tokens, len(offsets))  # exclusive
+            if last < len(offsets):
+                # Prefer cutting before a token that starts a word
+                for candidate in range(last, first + max_tokens // 2, -1):
+                    start = offsets[candidate][0]
+                    if start > 0 and text[start - 1].isspace():
+                        last = candidate
+                        break
+            while True:
+                begin = offsets[first][0]
+                end = offsets[last][0] if last < len(offsets) else len(text)
+                piece = text[begin:end].rstrip()
+                # Re-tokenizing a cut piece can add tokens (split words)
+                if last - first <= 1 or self(piece) <= max_tokens:
+                    break
+                last -= 1
+            if piece:
+                pieces.append((begin, piece))
+            first = last
+        return pieces
+
+
+def enforce_token_limit(
+    chunks: List[Document],
+    length_function: Callable[[str], int],
+    max_tokens: int
+) -> List[Document]:
+    """
+    Re-split chunks whose token count is over max_tokens
+
+    Splitters add up the token counts of the pieces they merge, but the
+    merged text can tokenize to more tokens than that sum, so every chunk
+    is measured again as a whole. Oversized ones are cut into token
+    windows (start_index adjusted).
+    """
+    fitted = []
+    for chunk in chunks:
+        if length_function(chunk.page_content) <= max_tokens:
+            fitted.append(chunk)
+            continue
+        start_index = chunk.metadata.get("start_index")
+        for offset, piece in length_function.windows(chunk.page_content, max_tokens):
+            metadata = dict(chunk.metadata)
+            if start_index is not None:
+                metadata["start_index"] = start_index + offset
+            fitted.append(Document(page_content=piece, metadata=metadata))
+    if len(fitted) != len(chunks):
+        logger.info(f" Re-split {len(fitted) - len(chunks)} extra chunks to fit {max_tokens} tokens")
+    return fitted
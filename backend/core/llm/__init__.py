@@ -3,5 +3,14 @@ LLM Providers and Factory
 """
 
 from .factory import LLMFactory
+from .router import RoutingChatModel, ProviderHealth
+from .mock import MockChatModel
+from .limiter import ProviderLimiter, RateLimitedChatModel, LLMOverloadedError, get_limiter, limiter_stats
+from .registry import LLMRegistry, llm_registry
+from .reflection import BackgroundReflector
 
-__all__ = ["LLMFactory"]
+__all__ = [
+    "LLMFactory", "RoutingChatModel", "ProviderHealth", "MockChatModel",
+    "ProviderLimiter", "RateLimitedChatModel", "LLMOverloadedError", "get_limiter", "limiter_stats",
+    "LLMRegistry", "llm_registry", "BackgroundReflector"
+]
@@ -8,34 +8,98 @@ from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 
 from backend.config import settings
+from backend.core.llm.router import RoutingChatModel
+from backend.core.llm.mock import MockChatModel
+from backend.core.llm.registry import llm_registry
+from backend.core.llm.limiter import RateLimitedChatModel, get_limiter
 
 
 class LLMFactory:
     """Factory for creating LLM instances"""
     
+    MODELS = {
+        "cohere": "command-r-plus-08-2024",
+        "groq": "llama3-8b-8192",
+        "openai": "gpt-3.5-turbo",
+        "mock": "mock"
+    }
+    
+    @staticmethod
+    def _key(provider: str, temperature: float) -> tuple:
+        """Registry key of a provider's client"""
+        return (provider, LLMFactory.MODELS.get(provider), temperature, None)  # provider default max_tokens
+    
     @staticmethod
     def create(provider: str = None, temperature: float = None):
-        """Create an LLM instance based on provider"""
+        """
+        Shared LLM client for a provider, behind that provider's process-wide
+        limiter (concurrency cap, token bucket, requests per minute)
+        
+        Clients come from the process-wide registry keyed by (provider, model,
+        temperature, max_tokens), so callers reuse one client and its
+        keep-alive connections instead of building a new one per call.
+        """
         provider = provider or settings.LLM_PROVIDER
         temperature = temperature if temperature is not None else settings.LLM_TEMPERATURE
-        
+        return llm_registry.get(LLMFactory._key(provider, temperature), lambda: RateLimitedChatModel(
+            model=LLMFactory._build(provider, temperature),
+            limiter=get_limiter(provider, settings)
+        ))
+    
+    @staticmethod
+    def _build(provider: str, temperature: float):
+        """Create the unwrapped LLM instance for a provider"""
         if provider == "cohere":
             return ChatCohere(
-                model="command-r-plus-08-2024",
+                model=LLMFactory.MODELS["cohere"],
                 temperature=temperature,
-                cohere_api_key=settings.COHERE_API_KEY
+                cohere_api_key=settings.COHERE_API_KEY,
+                max_retries=settings.LLM_MAX_RETRIES
             )
         elif provider == "groq":
             return ChatGroq(
-                model_name="llama3-8b-8192",
+                model_name=LLMFactory.MODELS["groq"],
                 temperature=temperature,
-                api_key=settings.GROQ_API_KEY
+                api_key=settings.GROQ_API_KEY,
+                max_retries=settings.LLM_MAX_RETRIES
             )
         elif provider == "openai":
             return ChatOpenAI(
-                model_name="gpt-3.5-turbo",
+                model_name=LLMFactory.MODELS["openai"],
                 temperature=temperature,
-                api_key=settings.OPENAI_API_KEY
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=settings.LLM_MAX_RETRIES
+            )
+        elif provider == "mock":
+            # Offline provider for benchmarks and load tests (no network, no key)
+            return MockChatModel(
+                response=settings.MOCK_LLM_RESPONSE,
+                response_tokens=settings.MOCK_LLM_RESPONSE_TOKENS,
+                latency_ms=settings.MOCK_LLM_LATENCY_MS,
+                latency_sigma=settings.MOCK_LLM_LATENCY_SIGMA,
+                tokens_per_second=settings.MOCK_LLM_TOKENS_PER_SECOND,
+                seed=settings.MOCK_LLM_SEED
             )
         else:
             raise ValueError(f"Unknown LLM provider: {provider}")
+    
+    @staticmethod
+    def create_routed(provider: str = None, temperature: float = None):
+        """
+        Primary provider plus LLM_FALLBACK_PROVIDERS behind a RoutingChatModel
+        (failover, optional hedging); a plain LLM when no fallbacks are set
+        """
+        provider = provider or settings.LLM_PROVIDER
+        temperature = temperature if temperature is not None else settings.LLM_TEMPERATURE
+        names = [provider] + [name for name in settings.LLM_FALLBACK_PROVIDERS if name != provider]
+        if len(names) == 1:
+            return LLMFactory.create(provider, temperature)
+        
+        # Shared too: provider health and the hedge pool survive assistant rebuilds
+        # Keyed by the members' keys: routers over differently configured clients stay apart
+        key = ("routed",) + tuple(LLMFactory._key(name, temperature) for name in names)
+        return llm_registry.get(key, lambda: RoutingChatModel(
+            providers={name: LLMFactory.create(name, temperature) for name in names},
+            hedge=settings.LLM_HEDGE,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE
+        ))
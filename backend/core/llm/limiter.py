@@ -0,0 +1,356 @@
+"""
+LLM Rate Limiting
+Per-provider concurrency cap, token bucket and requests-per-minute limits
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloadedError(RuntimeError):
+    """A provider's limiter queue is full, or a call waited too long for a slot"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """Queued call, woken when it may be able to proceed"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self) -> None:
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class ProviderLimiter:
+    """
+    Admission control for calls to one LLM provider
+
+    A call proceeds when fewer than max_concurrency calls are in flight, the
+    token bucket (requests_per_second, holding up to burst tokens) has a
+    token and fewer than requests_per_minute calls started in the last 60s;
+    0 disables a limit. Other calls wait in a FIFO queue of at most
+    max_queue entries. A call that finds the queue full, or waits longer
+    than max_wait_seconds, raises LLMOverloadedError instead of piling more
+    requests onto a provider that is already returning 429s.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 0,
+        requests_per_second: float = 0,
+        burst: int = 0,
+        requests_per_minute: int = 0,
+        max_queue: int = 64,
+        max_wait_seconds: float = 10,
+        window: int = 1000
+    ):
+        """
+        Args:
+            name: Provider name (for errors and stats)
+            max_concurrency: Calls in flight at once (0 = unlimited)
+            requests_per_second: Token bucket refill rate (0 = unlimited)
+            burst: Token bucket size (0 = one second of requests)
+            requests_per_minute: Calls started per sliding minute (0 = unlimited)
+            max_queue: Calls allowed to wait; more are rejected immediately
+            max_wait_seconds: Longest a call waits before it is rejected
+            window: Recent wait times kept for percentiles
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst or max(1, int(requests_per_second))
+        self.requests_per_minute = requests_per_minute
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+        self._in_flight = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._started: deque = deque()  # start times within the last minute
+
+        self.acquired = 0
+        self.queued = 0
+        self.rejected = 0  # queue full
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.wait_times: deque = deque(maxlen=window)  # seconds, queued calls only
+
+    def _grant(self, now: float) -> Optional[float]:
+        """
+        Take a slot if every limit allows it (caller holds the lock)
+
+        Returns None when granted, otherwise the seconds until a token or
+        minute slot frees up (inf when only a release can help).
+        """
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            return float("inf")
+
+        if self.requests_per_second:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.requests_per_second)
+            self._refilled = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.requests_per_second
+
+        if self.requests_per_minute:
+            while self._started and now - self._started[0] >= 60:
+                self._started.popleft()
+            if len(self._started) >= self.requests_per_minute:
+                return self._started[0] + 60 - now
+            self._started.append(now)
+
+        if self.requests_per_second:
+            self._tokens -= 1
+        self._in_flight += 1
+        self.acquired += 1
+        return None
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        """Queue a call or reject it when the queue is full (caller holds the lock)"""
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LLMOverloadedError(
+                f"LLM provider '{self.name}' is overloaded: {len(self._waiters)} requests already "
+                f"queued (limit {self.max_queue}), try again shortly"
+            )
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+    def _poll(self, waiter: _Waiter, now: float) -> Optional[float]:
+        """
+        Grant the head of the queue a slot (caller holds the lock)
+
+        Returns None once waiter holds a slot, otherwise how long to sleep
+        (inf: until woken by a release or by the call ahead of it).
+        """
+        if self._waiters[0] is not waiter:
+            return float("inf")
+        delay = self._grant(now)
+        if delay is None:
+            self._waiters.popleft()
+            if self._waiters:
+                self._waiters[0].wake()
+        return delay
+
+    def _give_up(self, waiter: _Waiter, waited: float) -> LLMOverloadedError:
+        """Drop a waiter that timed out or was cancelled (caller holds the lock)"""
+        was_head = self._waiters and self._waiters[0] is waiter
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        if was_head and self._waiters:
+            self._waiters[0].wake()
+        return LLMOverloadedError(
+            f"LLM provider '{self.name}' is overloaded: no capacity after waiting {waited:.1f}s, try again shortly"
+        )
+
+    def acquire(self) -> None:
+        """Block until a call may start, or raise LLMOverloadedError"""
+        started = time.monotonic()
+        with self._lock:
+            if not self._waiters and self._grant(started) is None:
+                return
+            waiter = _Waiter()
+            self._enqueue(waiter)
+
+        deadline = started + self.max_wait_seconds
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                delay = self._poll(waiter, now)
+                if delay is None:
+                    self.wait_times.append(now - started)
+                    return
+                if now >= deadline:
+                    self.timeouts += 1
+                    raise self._give_up(waiter, now - started)
+            waiter.event.wait(min(delay, deadline - now))
+            waiter.event.clear()
+
+    async def aacquire(self) -> None:
+        """Async acquire: waits without blocking the event loop"""
+        started = time.monotonic()
+        with self._lock:
+            if not self._waiters and self._grant(started) is None:
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._enqueue(waiter)
+
+        deadline = started + self.max_wait_seconds
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    delay = self._poll(waiter, now)
+                    if delay is None:
+                        self.wait_times.append(now - started)
+                        return
+                    if now >= deadline:
+                        self.timeouts += 1
+                        raise self._give_up(waiter, now - started)
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), min(delay, deadline - now))
+                except asyncio.TimeoutError:
+                    pass
+                waiter.event.clear()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._give_up(waiter, time.monotonic() - started)
+            raise
+
+    def release(self) -> None:
+        """End a call started with acquire/aacquire"""
+        with self._lock:
+            self._in_flight -= 1
+            if self._waiters:
+                self._waiters[0].wake()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            # Under the lock: queued calls append to wait_times
+            waits = sorted(self.wait_times)
+            pick = lambda pct: round(waits[min(len(waits) - 1, int(pct / 100 * len(waits)))] * 1000, 1) if waits else None
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "wait_p50_ms": pick(50),
+                "wait_p95_ms": pick(95),
+                "wait_max_ms": round(waits[-1] * 1000, 1) if waits else None,
+                "limits": {
+                    "max_concurrency": self.max_concurrency,
+                    "requests_per_second": self.requests_per_second,
+                    "burst": self.burst,
+                    "requests_per_minute": self.requests_per_minute,
+                    "max_queue": self.max_queue
+                }
+            }
+
+
+# Provider name -> limiter, shared by every model instance in the process
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, config: Any) -> ProviderLimiter:
+    """
+    Process-wide limiter for a provider
+
+    Limits come from config's LLM_* limiter settings, overridden per
+    provider by LLM_PROVIDER_LIMITS; they are read when the limiter is
+    first created.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = {
+                "max_concurrency": config.LLM_MAX_CONCURRENCY,
+                "requests_per_second": config.LLM_REQUESTS_PER_SECOND,
+                "burst": config.LLM_BURST,
+                "requests_per_minute": config.LLM_REQUESTS_PER_MINUTE,
+                "max_queue": config.LLM_MAX_QUEUE,
+                "max_wait_seconds": config.LLM_QUEUE_TIMEOUT_SECONDS
+            }
+            limits.update(config.LLM_PROVIDER_LIMITS.get(provider, {}))
+            limiter = _limiters[provider] = ProviderLimiter(provider, **limits)
+        return limiter
+
+
+def limiter_stats() -> Dict:
+    """Stats of every provider limiter created so far"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.get_stats() for name, limiter in limiters.items()}
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """
+    Chat model that runs every call to the wrapped model through a
+    ProviderLimiter; streams hold their slot until the last token
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: Any
+    limiter: ProviderLimiter
+
+    @property
+    def _llm_type(self) -> str:
+        return f"rate-limited-{getattr(self.model, '_llm_type', 'llm')}"
+
+    @staticmethod
+    def _chunk(chunk: BaseMessage) -> ChatGenerationChunk:
+        if not isinstance(chunk, BaseMessageChunk):
+            # Models without native streaming yield one full message
+            chunk = AIMessageChunk(content=chunk.content)
+        return ChatGenerationChunk(message=chunk)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        with self.limiter.slot():
+            message = self.model.invoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        async with self.limiter.aslot():
+            message = await self.model.ainvoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with self.limiter.slot():
+            for chunk in self.model.stream(messages, stop=stop, **kwargs):
+                chunk = self._chunk(chunk)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.limiter.aslot():
+            async for chunk in self.model.astream(messages, stop=stop, **kwargs):
+                chunk = self._chunk(chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
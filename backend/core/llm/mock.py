@@ -0,0 +1,118 @@
+"""
+Mock Chat Model
+Offline LLM with simulated latency and failures (benchmarks, failover drills)
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+FILLER_WORDS = (
+    "the data model stores facts and dimensions so that queries over project "
+    "risk scope cost and time stay fast and consistent across every report"
+).split()
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Chat model that answers without network access
+
+    Output is deterministic: response with "{question}" replaced by the last
+    message, padded to response_tokens words with filler chosen from a hash
+    of the prompt. Latency is fixed (latency_sigma=0) or lognormal around
+    latency_ms; with tokens_per_second, generation adds one word per
+    1/tokens_per_second and streams word by word after the first-token
+    latency. failure_rate of the calls raise ConnectionError. A seed makes
+    the latency and failure sequence reproducible.
+    """
+
+    response: str = "This is a mock answer to: {question}"
+    response_tokens: int = 0
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.0
+    tokens_per_second: float = 0.0
+    failure_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    def sample_latency(self) -> float:
+        """Seconds until the first token of the next call"""
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return self._rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+    def _outcome(self) -> bool:
+        return self._rng.random() >= self.failure_rate
+
+    def render(self, messages: List[BaseMessage]) -> List[str]:
+        """Answer words for a prompt (same prompt, same answer)"""
+        prompt = messages[-1].content if messages else ""
+        words = self.response.replace("{question}", str(prompt)).split()
+        if len(words) < self.response_tokens:
+            filler = random.Random(hashlib.sha256(str(prompt).encode()).digest())
+            words += [filler.choice(FILLER_WORDS) for _ in range(self.response_tokens - len(words))]
+        return words
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _result(self, words: List[str]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        latency, ok = self.sample_latency(), self._outcome()
+        words = self.render(messages)
+        time.sleep(latency + len(words) * self._token_delay())
+        if not ok:
+            raise ConnectionError("Mock provider failure")
+        return self._result(words)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        latency, ok = self.sample_latency(), self._outcome()
+        words = self.render(messages)
+        await asyncio.sleep(latency + len(words) * self._token_delay())
+        if not ok:
+            raise ConnectionError("Mock provider failure")
+        return self._result(words)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        latency, ok = self.sample_latency(), self._outcome()
+        time.sleep(latency)
+        if not ok:
+            raise ConnectionError("Mock provider failure")
+        for i, word in enumerate(self.render(messages)):
+            if i:
+                time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        latency, ok = self.sample_latency(), self._outcome()
+        await asyncio.sleep(latency)
+        if not ok:
+            raise ConnectionError("Mock provider failure")
+        for i, word in enumerate(self.render(messages)):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,135 @@
+"""
+Background Self-Reflection
+Grades answers off the request path and upgrades cached answers it improves
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundReflector:
+    """
+    Runs self-reflection on a sample of answers after they are returned
+
+    An answer is checked when its best retrieval score is below
+    low_confidence, or otherwise with probability sample_rate. reflect
+    returns {"quality": ..., "improved_answer": ...}; verdicts are counted,
+    and an improved answer is passed to the job's on_improved callback,
+    which re-caches it and returns whether it did, so later askers get it
+    while the first asker never waits for the second LLM call. At most
+    max_pending checks are queued; beyond that new ones are dropped.
+    """
+
+    def __init__(
+        self,
+        reflect: Callable[[str, str, str], Dict],
+        sample_rate: float = 0.1,
+        low_confidence: float = 0.3,
+        max_workers: int = 1,
+        max_pending: int = 100,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            reflect: (question, answer, context) -> verdict dict
+            sample_rate: Fraction of confident answers checked
+            low_confidence: Answers whose best score is below this are always checked
+            max_workers: Concurrent reflection calls
+            max_pending: Queued checks before new ones are dropped
+            seed: Seed for the sampling decision (reproducible runs)
+        """
+        self.reflect = reflect
+        self.sample_rate = sample_rate
+        self.low_confidence = low_confidence
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reflect")
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.reasons = Counter()
+        self.verdicts = Counter()
+        self.dropped = 0
+        self.failures = 0
+        self.improved_cached = 0
+        self.latencies = deque(maxlen=1000)  # seconds per reflection call
+
+    def reason(self, scores: List[float]) -> Optional[str]:
+        """Why an answer with these retrieval scores should be checked (None: skip)"""
+        if scores and max(scores) < self.low_confidence:
+            return "low_confidence"
+        with self._lock:
+            sampled = self._rng.random() < self.sample_rate
+        return "sampled" if sampled else None
+
+    def submit(
+        self,
+        question: str,
+        answer: str,
+        context: str,
+        scores: List[float],
+        on_improved: Callable[[str], bool]
+    ) -> bool:
+        """
+        Queue a check of an answer if it is sampled or low-confidence
+
+        Returns:
+            True if a check was queued
+        """
+        reason = self.reason(scores)
+        if reason is None:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+            self.reasons[reason] += 1
+        self.executor.submit(self._run, question, answer, context, on_improved)
+        return True
+
+    def _run(self, question: str, answer: str, context: str, on_improved: Callable[[str], bool]) -> None:
+        started = time.perf_counter()
+        try:
+            verdict = self.reflect(question, answer, context)
+            quality = verdict.get("quality", "unknown")
+            with self._lock:
+                self.verdicts[quality] += 1
+                self.latencies.append(time.perf_counter() - started)
+            improved = verdict.get("improved_answer")
+            if improved and on_improved(improved):
+                with self._lock:
+                    self.improved_cached += 1
+                logger.info(f"🪞 Reflection improved a cached answer: {question[:50]}...")
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.error(f"Background reflection failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "pending": self._pending,
+                "checked": dict(self.reasons),
+                "verdicts": dict(self.verdicts),
+                "improved_cached": self.improved_cached,
+                "dropped": self.dropped,
+                "failures": self.failures,
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "sample_rate": self.sample_rate,
+                "low_confidence": self.low_confidence
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,56 @@
+"""
+LLM Client Registry
+Process-wide reuse of LLM clients and their keep-alive HTTP connections
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class LLMRegistry:
+    """
+    LLM clients shared by every caller in the process
+
+    Each provider client owns an HTTP connection pool (and an SSL context),
+    so building one per call pays construction plus a new TCP/TLS handshake
+    on its first request. Clients are built once per key, typically
+    (provider, model, temperature, max_tokens), and reused afterwards,
+    including across assistant rebuilds.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()  # Builders may fetch other clients (routed models)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Client for key, built with build() the first time it is asked for"""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            # Built under the lock: construction takes milliseconds and
+            # concurrent first calls must not create duplicate pools
+            client = self._clients[key] = build()
+            self.misses += 1
+            return client
+
+    def clear(self) -> None:
+        """Forget all clients (the next get builds fresh ones)"""
+        with self._lock:
+            self._clients.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "keys": [" / ".join(str(part) for part in key) for key in self._clients]
+            }
+
+
+# Shared by all LLM factories
+llm_registry = LLMRegistry()
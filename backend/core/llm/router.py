@@ -0,0 +1,316 @@
+"""
+LLM Routing
+Failover and hedged requests across several chat model providers
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+from backend.core.llm.limiter import LLMOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHealth:
+    """
+    Rolling latency and error window for one provider
+
+    After failure_threshold consecutive failures the provider is skipped
+    for cooldown_seconds; the next call after that probes it again.
+    """
+
+    def __init__(self, window: int = 100, failure_threshold: int = 3, cooldown_seconds: float = 30):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.unavailable_until = 0.0
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.unavailable_until = time.monotonic() + self.cooldown_seconds
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    @property
+    def error_rate(self) -> float:
+        outcomes = list(self.outcomes)
+        return 1 - sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank latency percentile in seconds (None without samples)"""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+    def get_stats(self) -> Dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 4),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "available": self.available
+        }
+
+
+class RoutingChatModel(BaseChatModel):
+    """
+    Chat model that spreads calls over several providers
+
+    Providers are tried in configured order, skipping those in cooldown or
+    above max_error_rate (they remain a last resort). A failed call fails
+    over to the next provider. With hedge=True, a call still running after
+    the primary's hedge_percentile latency gets a second request to the
+    next provider and the first answer wins. Streams fail over only before
+    their first token. A provider whose limiter sheds the call
+    (LLMOverloadedError) is skipped without counting against its health.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    providers: Dict[str, Any]  # name -> chat model, in preference order
+    hedge: bool = False
+    hedge_percentile: float = 95
+    hedge_min_samples: int = 20
+    max_error_rate: float = 0.5
+    window: int = 100
+    failure_threshold: int = 3
+    cooldown_seconds: float = 30
+    hedge_workers: int = 64  # Threads for hedged sync calls; queueing here would trigger hedges
+
+    _health: Dict[str, ProviderHealth] = PrivateAttr()
+    _executor: ThreadPoolExecutor = PrivateAttr()
+    _hedges: int = PrivateAttr(default=0)
+    _hedge_wins: int = PrivateAttr(default=0)
+    _stats_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if not self.providers:
+            raise ValueError("RoutingChatModel needs at least one provider")
+        self._health = {
+            name: ProviderHealth(self.window, self.failure_threshold, self.cooldown_seconds)
+            for name in self.providers
+        }
+        self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="llm-hedge")
+
+    @property
+    def _llm_type(self) -> str:
+        return "routing"
+
+    def _ranked(self) -> List[str]:
+        """Provider names in the order to try them"""
+        names = list(self.providers)
+        health = self._health
+        return sorted(names, key=lambda name: (
+            not health[name].available,
+            health[name].error_rate > self.max_error_rate,
+            names.index(name)
+        ))
+
+    def _hedge_deadline(self, name: str) -> Optional[float]:
+        """Seconds to wait before hedging a call to name (None: don't hedge)"""
+        health = self._health[name]
+        if not self.hedge or len(health.latencies) < self.hedge_min_samples:
+            return None
+        return health.percentile(self.hedge_percentile)
+
+    def _count_hedge(self, won: bool = False) -> None:
+        # One instance serves request threads and the event loop (shared via the registry)
+        with self._stats_lock:
+            if won:
+                self._hedge_wins += 1
+            else:
+                self._hedges += 1
+
+    # ----- sync -----
+
+    def _call(self, name: str, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            message = self.providers[name].invoke(messages, stop=stop, **kwargs)
+        except LLMOverloadedError:
+            # Shed by our own limiter: the provider itself is not unhealthy
+            raise
+        except Exception:
+            self._health[name].record(time.perf_counter() - started, False)
+            raise
+        self._health[name].record(time.perf_counter() - started, True)
+        return message
+
+    def _call_hedged(
+        self, primary: str, backup: str, deadline: float, tried: Set[str],
+        messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any
+    ) -> BaseMessage:
+        first = self._executor.submit(self._call, primary, messages, stop, **kwargs)
+        done, _ = wait([first], timeout=deadline)
+        if done:
+            return first.result()
+
+        # The losing request keeps running; its outcome still feeds the stats
+        tried.add(backup)
+        self._count_hedge()
+        logger.info(f"⏱️ {primary} slower than p{self.hedge_percentile:g} ({deadline * 1000:.0f}ms), hedging with {backup}")
+        pending = {first: primary, self._executor.submit(self._call, backup, messages, stop, **kwargs): backup}
+        error = None
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if name == backup:
+                    self._count_hedge(won=True)
+                return future.result()
+        raise error
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self._ranked()
+        tried: Set[str] = set()
+        error = None
+        for i, name in enumerate(order):
+            if name in tried:
+                continue
+            backup = next((other for other in order[i + 1:] if other not in tried), None)
+            deadline = self._hedge_deadline(name) if backup else None
+            tried.add(name)
+            try:
+                if deadline is None:
+                    message = self._call(name, messages, stop, **kwargs)
+                else:
+                    message = self._call_hedged(name, backup, deadline, tried, messages, stop, **kwargs)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                error = e
+                logger.warning(f"⚠️ LLM provider {name} failed ({e}), failing over")
+        raise error
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        error = None
+        for name in self._ranked():
+            started = time.perf_counter()
+            streamed = False
+            try:
+                for chunk in self.providers[name].stream(messages, stop=stop, **kwargs):
+                    streamed = True
+                    if not isinstance(chunk, BaseMessageChunk):
+                        # Models without native streaming yield one full message
+                        chunk = AIMessageChunk(content=chunk.content)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+                    yield ChatGenerationChunk(message=chunk)
+                self._health[name].record(time.perf_counter() - started, True)
+                return
+            except Exception as e:
+                if not isinstance(e, LLMOverloadedError):
+                    self._health[name].record(time.perf_counter() - started, False)
+                if streamed:
+                    # Tokens already reached the caller: can't switch providers now
+                    raise
+                error = e
+                logger.warning(f"⚠️ LLM provider {name} failed ({e}), failing over")
+        raise error
+
+    # ----- async -----
+
+    async def _acall(self, name: str, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            message = await self.providers[name].ainvoke(messages, stop=stop, **kwargs)
+        except LLMOverloadedError:
+            # Shed by our own limiter: the provider itself is not unhealthy
+            raise
+        except Exception:
+            self._health[name].record(time.perf_counter() - started, False)
+            raise
+        self._health[name].record(time.perf_counter() - started, True)
+        return message
+
+    async def _acall_hedged(
+        self, primary: str, backup: str, deadline: float, tried: Set[str],
+        messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any
+    ) -> BaseMessage:
+        first = asyncio.ensure_future(self._acall(primary, messages, stop, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            return first.result()
+
+        tried.add(backup)
+        self._count_hedge()
+        logger.info(f"⏱️ {primary} slower than p{self.hedge_percentile:g} ({deadline * 1000:.0f}ms), hedging with {backup}")
+        pending = {first: primary, asyncio.ensure_future(self._acall(backup, messages, stop, **kwargs)): backup}
+        error = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if name == backup:
+                        self._count_hedge(won=True)
+                    return task.result()
+            raise error
+        finally:
+            # Cancel the losing request (a cancelled call is not recorded)
+            for task in pending:
+                task.cancel()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self._ranked()
+        tried: Set[str] = set()
+        error = None
+        for i, name in enumerate(order):
+            if name in tried:
+                continue
+            backup = next((other for other in order[i + 1:] if other not in tried), None)
+            deadline = self._hedge_deadline(name) if backup else None
+            tried.add(name)
+            try:
+                if deadline is None:
+                    message = await self._acall(name, messages, stop, **kwargs)
+                else:
+                    message = await self._acall_hedged(name, backup, deadline, tried, messages, stop, **kwargs)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                error = e
+                logger.warning(f"⚠️ LLM provider {name} failed ({e}), failing over")
+        raise error
+
+    def get_stats(self) -> Dict:
+        return {
+            "providers": {name: health.get_stats() for name, health in self._health.items()},
+            "order": self._ranked(),
+            "hedges": self._hedges,
+            "hedge_wins": self._hedge_wins
+        }
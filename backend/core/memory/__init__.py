@@ -0,0 +1,9 @@
+"""
+Conversation Memory Module
+Per-session chat history and its compaction for prompts
+"""
+
+from .session_memory import SessionMemory, RedisSessionMemory
+from .history_compactor import HistoryCompactor, extractive_summary
+
+__all__ = ["SessionMemory", "RedisSessionMemory", "HistoryCompactor", "extractive_summary"]
@@ -0,0 +1,216 @@
+"""
+Chat History Compaction
+Recent turns word for word, older turns folded into a running summary
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend.core.memory.session_memory import Message, RedisSessionMemory, SessionMemory
+
+logger = logging.getLogger(__name__)
+
+NO_HISTORY = "No previous conversation"
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.S)
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You keep a running summary of a conversation between a user and an assistant. "
+               "Update the summary with the new messages. Keep names, facts, preferences, decisions "
+               "and open questions; drop greetings and formatting. Reply with the updated summary "
+               "only, in at most {max_words} words."),
+    ("human", "Current summary:\n{summary}\n\nNew messages:\n{messages}")
+])
+
+
+def _label(role: str) -> str:
+    return "Human" if role == "human" else "Assistant"
+
+
+def extractive_summary(summary: str, messages: List[Message], max_chars: int) -> str:
+    """
+    Summary without an LLM: each question plus the first sentence of its
+    answer, appended to the previous summary and cut to its last max_chars
+    """
+    lines = [summary] if summary else []
+    for role, content in messages:
+        text = " ".join(content.split())
+        if role != "human":
+            match = _FIRST_SENTENCE.match(text)
+            text = match.group(1) if match else text
+        lines.append(f"{_label(role)}: {text[:200]}")
+    folded = "\n".join(lines)
+    return folded[-max_chars:] if len(folded) > max_chars else folded
+
+
+class HistoryCompactor:
+    """
+    Prompt-ready chat history with bounded size
+
+    The last keep_turns exchanges of a session are kept word for word;
+    after every exchange a background task moves older messages out of the
+    session store and folds them into the session's running summary (by
+    the LLM, or extractively when llm is None or the call fails). The
+    formatted history string is cached per session until the session
+    changes. With the Redis store, other workers may change a session, so
+    the string is only cached for the in-process store. Clearing a session
+    bumps its epoch, and a fold that started before the clear drops its
+    summary instead of writing it into the fresh session.
+    """
+
+    def __init__(
+        self,
+        memory: Union[SessionMemory, RedisSessionMemory],
+        keep_turns: int = 2,
+        max_summary_chars: int = 1200,
+        llm: Any = None,
+        max_cached: int = 10000,
+        workers: int = 2
+    ):
+        """
+        Args:
+            memory: Session store holding recent messages and summaries
+            keep_turns: Exchanges kept word for word
+            max_summary_chars: Summary length cap
+            llm: Chat model that writes summaries (None: extractive)
+            max_cached: Formatted histories cached before LRU eviction
+            workers: Threads folding old turns into summaries
+        """
+        self.memory = memory
+        self.keep_messages = 2 * keep_turns
+        self.max_summary_chars = max_summary_chars
+        self.llm = llm
+        self.max_cached = max_cached
+        self.cache_formatted = not isinstance(memory, RedisSessionMemory)
+
+        self._formatted: "OrderedDict[str, str]" = OrderedDict()
+        self._folding: Dict[str, List[Message]] = {}  # session -> messages being summarized
+        self._epochs: Dict[str, int] = {}  # session -> clears while it is being folded
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Summary writes vs clears, without blocking format()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="history-compactor")
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "folds": 0, "messages_folded": 0, "llm_failures": 0}
+
+    def _invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._formatted.pop(session_id, None)
+
+    def format(self, session_id: Optional[str]) -> str:
+        """History for prompts: running summary, then recent messages"""
+        if not session_id:
+            return NO_HISTORY
+        with self._lock:
+            cached = self._formatted.get(session_id)
+            if isinstance(cached, str):
+                self._formatted.move_to_end(session_id)
+                self.stats["cache_hits"] += 1
+                return cached
+            self.stats["cache_misses"] += 1
+            # Messages already removed from the store but not summarized yet
+            folding = list(self._folding.get(session_id, []))
+            # Placeholder: an invalidation while we read removes it, and the
+            # (possibly stale) result is then not cached
+            token = self._formatted[session_id] = object()
+
+        summary = self.memory.get_summary(session_id)
+        lines = [f"Summary of earlier conversation: {summary}"] if summary else []
+        for role, content in folding + self.memory.get(session_id):
+            lines.append(f"{_label(role)}: {content}")
+        formatted = "\n".join(lines) if lines else NO_HISTORY
+
+        with self._lock:
+            if self._formatted.get(session_id) is token:
+                if self.cache_formatted and session_id not in self._folding:
+                    self._formatted[session_id] = formatted
+                    while len(self._formatted) > self.max_cached:
+                        self._formatted.popitem(last=False)
+                else:
+                    del self._formatted[session_id]
+        return formatted
+
+    def add_exchange(self, session_id: str, question: str, answer: str) -> None:
+        """Store an exchange and compact the session in the background"""
+        self.memory.add_exchange(session_id, question, answer)
+        self._invalidate(session_id)
+        with self._lock:
+            if session_id in self._folding:
+                return  # The running fold picks up the overflow next time
+            self._folding[session_id] = []
+        self._executor.submit(self._fold, session_id)
+
+    def _summarize(self, summary: str, messages: List[Message]) -> str:
+        if self.llm is not None:
+            try:
+                updated = (SUMMARY_PROMPT | self.llm | StrOutputParser()).invoke({
+                    "summary": summary or "(none)",
+                    "messages": "\n".join(f"{_label(role)}: {content}" for role, content in messages),
+                    "max_words": self.max_summary_chars // 6
+                })
+                return updated.strip()[:self.max_summary_chars]
+            except Exception as e:
+                # Includes LLMOverloadedError: summaries must not compete with answers
+                self.stats["llm_failures"] += 1
+                logger.warning(f"History summary failed ({e}), using extractive summary")
+        return extractive_summary(summary, messages, self.max_summary_chars)
+
+    def _fold(self, session_id: str) -> None:
+        try:
+            with self._write_lock:
+                epoch = self._epochs.get(session_id, 0)
+                older = self.memory.pop_older(session_id, self.keep_messages)
+            if not older:
+                return
+            with self._lock:
+                self._folding[session_id] = older
+                self._formatted.pop(session_id, None)
+
+            summary = self._summarize(self.memory.get_summary(session_id), older)
+            with self._write_lock:
+                if self._epochs.get(session_id, 0) != epoch:
+                    logger.debug(f"Session {session_id} was cleared while folding, summary dropped")
+                    return
+                self.memory.set_summary(session_id, summary)
+            with self._lock:
+                self.stats["folds"] += 1
+                self.stats["messages_folded"] += len(older)
+        except Exception as e:
+            logger.error(f"Error compacting session history: {e}")
+        finally:
+            with self._lock:
+                self._folding.pop(session_id, None)
+                self._epochs.pop(session_id, None)
+                self._formatted.pop(session_id, None)
+
+    def clear(self, session_id: str = None) -> None:
+        """Forget one session, or all of them"""
+        with self._write_lock:
+            self.memory.clear(session_id)
+            with self._lock:
+                # Only sessions being folded need an epoch: their fold checks it before writing
+                for folding in (self._folding if session_id is None else [session_id]):
+                    if folding in self._folding:
+                        self._epochs[folding] = self._epochs.get(folding, 0) + 1
+                if session_id is None:
+                    self._formatted.clear()
+                else:
+                    self._formatted.pop(session_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "keep_messages": self.keep_messages,
+                "summarizer": "llm" if self.llm is not None else "extractive",
+                "cached": sum(isinstance(value, str) for value in self._formatted.values()),
+                "folding": len(self._folding)
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
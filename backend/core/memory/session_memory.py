@@ -0,0 +1,265 @@
+"""
+Per-Session Conversation Memory
+Bounded chat history keyed by session ID (in process or in Redis)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from backend.core.cache.redis_manager import RedisCacheManager
+
+logger = logging.getLogger(__name__)
+
+# (role, content) with role "human" or "ai"
+Message = Tuple[str, str]
+
+
+class SessionMemory:
+    """
+    In-process session histories
+
+    Each session is a ring buffer of its last max_messages messages, each
+    truncated to max_message_chars; beyond max_sessions the least recently
+    used session is evicted, and sessions idle for idle_ttl_seconds are
+    dropped. Memory is therefore bounded by
+    max_sessions * (max_messages + 1) * max_message_chars, the extra message
+    being the session's running summary of older turns.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 10,
+        max_sessions: int = 10000,
+        idle_ttl_seconds: float = 3600,
+        max_message_chars: int = 4000
+    ):
+        """
+        Args:
+            max_messages: Messages kept per session (0 keeps no history)
+            max_sessions: Sessions kept before LRU eviction
+            idle_ttl_seconds: Sessions unused for this long are dropped
+            max_message_chars: Longer messages are truncated
+        """
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_message_chars = max_message_chars
+
+        # session_id -> (deque of messages, last used)
+        self._sessions: "OrderedDict[str, Tuple[deque, float]]" = OrderedDict()
+        self._summaries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _touch(self, session_id: str, create: bool) -> Optional[deque]:
+        """Session buffer marked most recently used (caller holds the lock)"""
+        now = time.monotonic()
+        entry = self._sessions.get(session_id)
+        if entry is not None and now - entry[1] > self.idle_ttl_seconds:
+            del self._sessions[session_id]
+            self._summaries.pop(session_id, None)
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = (deque(maxlen=self.max_messages), now)
+
+        self._sessions[session_id] = (entry[0], now)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            evicted, _ = self._sessions.popitem(last=False)
+            self._summaries.pop(evicted, None)
+            self.evictions += 1
+        return entry[0]
+
+    def get(self, session_id: str) -> List[Message]:
+        """Messages of a session, oldest first"""
+        with self._lock:
+            messages = self._touch(session_id, create=False)
+            return list(messages) if messages else []
+
+    def add_exchange(self, session_id: str, question: str, answer: str) -> None:
+        """Append a question and its answer to a session"""
+        if self.max_messages <= 0:
+            return
+        with self._lock:
+            messages = self._touch(session_id, create=True)
+            messages.append(("human", question[:self.max_message_chars]))
+            messages.append(("ai", answer[:self.max_message_chars]))
+
+    def pop_older(self, session_id: str, keep: int) -> List[Message]:
+        """Remove and return all but the last keep messages of a session"""
+        with self._lock:
+            messages = self._touch(session_id, create=False)
+            older = []
+            while messages and len(messages) > keep:
+                older.append(messages.popleft())
+            return older
+
+    def get_summary(self, session_id: str) -> str:
+        """Running summary of a session's older turns ("" if none)"""
+        with self._lock:
+            return self._summaries.get(session_id, "") if session_id in self._sessions else ""
+
+    def set_summary(self, session_id: str, summary: str) -> None:
+        with self._lock:
+            if self._touch(session_id, create=True) is not None:
+                self._summaries[session_id] = summary[:self.max_message_chars]
+
+    def clear(self, session_id: str = None) -> None:
+        """Forget one session, or all of them"""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+                self._summaries.clear()
+            else:
+                self._sessions.pop(session_id, None)
+                self._summaries.pop(session_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "store": "memory",
+                "sessions": len(self._sessions),
+                "messages": sum(len(messages) for messages, _ in self._sessions.values()),
+                "summaries": len(self._summaries),
+                "max_messages": self.max_messages,
+                "evictions": self.evictions
+            }
+
+
+class RedisSessionMemory:
+    """
+    Session histories in Redis, so any worker can serve any session
+
+    Each session is a list trimmed to the last max_messages entries, plus a
+    summary string; TTLs are renewed on every write. Limits come from the
+    local SessionMemory, which also serves sessions while Redis is
+    unavailable.
+    """
+
+    def __init__(self, cache: RedisCacheManager, local: SessionMemory, namespace: str = "mira:session"):
+        """
+        Args:
+            cache: Cache manager whose Redis connection pool is reused
+            local: Limits, and fallback store while Redis is down
+            namespace: Key prefix for session lists
+        """
+        self.cache = cache
+        self.local = local
+        self.namespace = namespace
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.namespace}:{session_id}"
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"{self.namespace}:{session_id}:summary"
+
+    def get(self, session_id: str) -> List[Message]:
+        if not self.cache.enabled or self.local.max_messages <= 0:
+            return self.local.get(session_id)
+        try:
+            entries = self.cache.redis_client.lrange(self._key(session_id), -self.local.max_messages, -1)
+            return [tuple(json.loads(entry)) for entry in entries]
+        except Exception as e:
+            logger.error(f"Error reading session history: {e}")
+            self.cache._on_redis_error(e)
+            return self.local.get(session_id)
+
+    def add_exchange(self, session_id: str, question: str, answer: str) -> None:
+        local = self.local
+        if local.max_messages <= 0:
+            return
+        if not self.cache.enabled:
+            local.add_exchange(session_id, question, answer)
+            return
+        try:
+            key = self._key(session_id)
+            pipe = self.cache.redis_client.pipeline(transaction=False)
+            pipe.rpush(
+                key,
+                json.dumps(["human", question[:local.max_message_chars]]),
+                json.dumps(["ai", answer[:local.max_message_chars]])
+            )
+            pipe.ltrim(key, -local.max_messages, -1)
+            pipe.expire(key, int(local.idle_ttl_seconds))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error saving session history: {e}")
+            self.cache._on_redis_error(e)
+            local.add_exchange(session_id, question, answer)
+
+    def pop_older(self, session_id: str, keep: int) -> List[Message]:
+        if not self.cache.enabled:
+            return self.local.pop_older(session_id, keep)
+        try:
+            key = self._key(session_id)
+            # MULTI/EXEC: a concurrent append must not land between read and trim
+            pipe = self.cache.redis_client.pipeline(transaction=True)
+            pipe.lrange(key, 0, -keep - 1)
+            if keep > 0:
+                pipe.ltrim(key, -keep, -1)
+            else:
+                pipe.delete(key)
+            entries = pipe.execute()[0]
+            return [tuple(json.loads(entry)) for entry in entries]
+        except Exception as e:
+            logger.error(f"Error trimming session history: {e}")
+            self.cache._on_redis_error(e)
+            return self.local.pop_older(session_id, keep)
+
+    def get_summary(self, session_id: str) -> str:
+        if not self.cache.enabled:
+            return self.local.get_summary(session_id)
+        try:
+            summary = self.cache.redis_client.get(self._summary_key(session_id))
+            return summary.decode() if isinstance(summary, bytes) else (summary or "")
+        except Exception as e:
+            logger.error(f"Error reading session summary: {e}")
+            self.cache._on_redis_error(e)
+            return self.local.get_summary(session_id)
+
+    def set_summary(self, session_id: str, summary: str) -> None:
+        if not self.cache.enabled:
+            self.local.set_summary(session_id, summary)
+            return
+        try:
+            self.cache.redis_client.set(
+                self._summary_key(session_id),
+                summary[:self.local.max_message_chars],
+                ex=int(self.local.idle_ttl_seconds)
+            )
+        except Exception as e:
+            logger.error(f"Error saving session summary: {e}")
+            self.cache._on_redis_error(e)
+            self.local.set_summary(session_id, summary)
+
+    def clear(self, session_id: str = None) -> None:
+        self.local.clear(session_id)
+        if not self.cache.enabled:
+            return
+        try:
+            client = self.cache.redis_client
+            if session_id is not None:
+                client.unlink(self._key(session_id), self._summary_key(session_id))
+                return
+            batch = []
+            for key in client.scan_iter(match=f"{self.namespace}:*", count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    client.unlink(*batch)
+                    batch = []
+            if batch:
+                client.unlink(*batch)
+        except Exception as e:
+            logger.error(f"Error clearing session history: {e}")
+            self.cache._on_redis_error(e)
+
+    def get_stats(self) -> Dict:
+        stats = self.local.get_stats()
+        stats["store"] = "redis" if self.cache.enabled else "memory (redis unavailable)"
+        return stats
@@ -3,5 +3,6 @@ Vector Store Management
 """
 
 from .manager import VectorStoreManager
+from .onnx_embeddings import ONNXEmbeddings
 
-__all__ = ["VectorStoreManager"]
+__all__ = ["VectorStoreManager", "ONNXEmbeddings"]
@@ -0,0 +1,27 @@
+"""
+Deterministic Chunk IDs
+Same chunk content at the same place in the same file always gets the same ID
+"""
+
+import hashlib
+from typing import List
+
+from langchain_core.documents import Document
+
+
+def make_chunk_id(document: Document) -> str:
+    """
+    Build a stable ID from source + page + chunk offset + content hash
+
+    Format: <source hash>-<page>-<start offset>-<content hash>
+    """
+    metadata = document.metadata
+    source = metadata.get("filename") or metadata.get("source", "unknown")
+    source_hash = hashlib.sha1(str(source).encode()).hexdigest()[:12]
+    content_hash = hashlib.sha1(document.page_content.encode()).hexdigest()[:16]
+    return f"{source_hash}-{metadata.get('page', 0)}-{metadata.get('start_index', 0)}-{content_hash}"
+
+
+def make_chunk_ids(documents: List[Document]) -> List[str]:
+    """IDs for a batch of chunks"""
+    return [make_chunk_id(document) for document in documents]
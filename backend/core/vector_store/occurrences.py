@@ -0,0 +1,153 @@
+"""
+Duplicate Chunk Occurrences
+Where else a deduplicated chunk appeared, kept in the chunk's Chroma metadata
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from langchain_core.documents import Document
+
+from backend.core.vector_store.chunk_ids import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+# (chunk ID, text, metadata) of a stored chunk
+StoredChunk = Tuple[str, str, Dict]
+
+BATCH_SIZE = 500
+
+
+def chunk_location(metadata: Dict) -> str:
+    """Where a chunk came from, as recorded in "occurrences" ("file:page")"""
+    return f"{metadata.get('filename', 'Unknown')}:{metadata.get('page', 'N/A')}"
+
+
+def _locations(metadata: Dict) -> List[str]:
+    """Every location of a stored chunk, its own first"""
+    occurrences = metadata.get("occurrences")
+    return occurrences.split("; ") if occurrences else [chunk_location(metadata)]
+
+
+def _filename(location: str) -> str:
+    return location.rsplit(":", 1)[0]
+
+
+def _with_locations(metadata: Dict, locations: List[str]) -> Dict:
+    metadata = dict(metadata)
+    if len(locations) > 1:
+        # Chroma metadata only holds scalars, hence the joined string
+        metadata["occurrences"] = "; ".join(locations)
+        metadata["occurrence_count"] = len(locations)
+    else:
+        metadata.pop("occurrences", None)
+        metadata.pop("occurrence_count", None)
+    return metadata
+
+
+def record_occurrences(collection, occurrences: Dict[str, List[str]]) -> int:
+    """
+    Add the locations of dropped duplicates to their kept chunks' metadata
+
+    Args:
+        collection: Chroma collection
+        occurrences: {kept chunk ID: locations of its dropped copies}
+
+    Returns:
+        Chunks updated
+    """
+    chunk_ids = list(occurrences)
+    updated = 0
+    for start in range(0, len(chunk_ids), BATCH_SIZE):
+        stored = collection.get(ids=chunk_ids[start:start + BATCH_SIZE], include=["metadatas"])
+        ids, metadatas = [], []
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            locations = _locations(metadata)
+            added = [location for location in dict.fromkeys(occurrences[chunk_id]) if location not in locations]
+            if added:
+                ids.append(chunk_id)
+                metadatas.append(_with_locations(metadata, locations + added))
+        if ids:
+            collection.update(ids=ids, metadatas=metadatas)
+            updated += len(ids)
+    return updated
+
+
+def forget_occurrences(collection, filename: str) -> int:
+    """
+    Remove a file's locations from chunks kept for other files
+
+    Returns:
+        Chunks updated
+    """
+    stored = collection.get(where={"occurrence_count": {"$gt": 1}}, include=["metadatas"])
+    ids, metadatas = [], []
+    for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+        if metadata.get("filename") == filename:
+            continue
+        locations = _locations(metadata)
+        remaining = [location for location in locations if _filename(location) != filename]
+        if len(remaining) != len(locations):
+            ids.append(chunk_id)
+            metadatas.append(_with_locations(metadata, remaining))
+    if ids:
+        collection.update(ids=ids, metadatas=metadatas)
+    return len(ids)
+
+
+def release_chunks(collection, chunk_ids: List[str], filename: str) -> List[StoredChunk]:
+    """
+    Delete a file's chunks, handing shared ones over to another file
+
+    A chunk whose duplicates were dropped from other files is the only
+    stored copy of their content, so instead of being deleted it is
+    re-stored (with its existing embedding) under the first remaining
+    location and a new chunk ID.
+
+    Returns:
+        The re-stored chunks
+    """
+    moved: List[StoredChunk] = []
+    for start in range(0, len(chunk_ids), BATCH_SIZE):
+        batch = chunk_ids[start:start + BATCH_SIZE]
+        stored = collection.get(ids=batch, include=["metadatas", "documents", "embeddings"])
+        new_ids, embeddings, documents, metadatas = [], [], [], []
+        for text, embedding, metadata in zip(stored["documents"], stored["embeddings"], stored["metadatas"]):
+            others = [location for location in _locations(metadata) if _filename(location) != filename]
+            if not others:
+                continue
+            owner, page = others[0].rsplit(":", 1)
+            metadata = _with_locations(metadata, others)
+            metadata["filename"] = owner
+            metadata["page"] = int(page) if page.isdigit() else page
+            if metadata.get("source"):
+                metadata["source"] = str(Path(metadata["source"]).with_name(owner))
+            # The offset within the new owner's page is not known
+            metadata.pop("start_index", None)
+
+            new_id = make_chunk_id(Document(page_content=text, metadata=metadata))
+            new_ids.append(new_id)
+            embeddings.append(embedding)
+            documents.append(text)
+            metadatas.append(metadata)
+            moved.append((new_id, text, metadata))
+
+        if new_ids:
+            collection.upsert(ids=new_ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        collection.delete(ids=batch)
+
+    if moved:
+        logger.info(f"🔀 Kept {len(moved)} chunks of {filename} that other files also contain")
+    return moved
+
+
+def iter_chunks(collection, batch_size: int = 1000) -> Iterator[StoredChunk]:
+    """Every stored chunk, one page of the collection at a time"""
+    offset = 0
+    while True:
+        stored = collection.get(include=["metadatas", "documents"], limit=batch_size, offset=offset)
+        if not stored["ids"]:
+            return
+        yield from zip(stored["ids"], stored["documents"], stored["metadatas"])
+        offset += len(stored["ids"])
@@ -0,0 +1,175 @@
+"""
+ONNX Runtime Embeddings
+CPU-friendly sentence-transformers inference with optional int8 quantization
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# ONNX Runtime (optional)
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Accepted cosine distance from the PyTorch vectors of the same model
+FP32_TOLERANCE = 1e-4
+INT8_TOLERANCE = 2e-2
+
+
+class ONNXEmbeddings(Embeddings):
+    """
+    Sentence embeddings served by ONNX Runtime
+
+    Mirrors HuggingFaceEmbeddings(normalize_embeddings=True) for
+    sentence-transformers models: mean pooling over the attention mask
+    followed by L2 normalization.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        model_dir: str = None,
+        quantize: bool = False,
+        max_seq_length: int = 256,
+        batch_size: int = 32,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Load (exporting on first use) the ONNX model
+
+        Args:
+            model_name: HuggingFace model id
+            model_dir: Directory holding the exported model files
+            quantize: Use a dynamically int8-quantized copy of the model
+            max_seq_length: Tokens kept per input (model window)
+            batch_size: Texts per inference call in embed_documents
+            num_threads: intra-op threads for ONNX Runtime (None = default)
+        """
+        if not ONNX_AVAILABLE:
+            raise RuntimeError("ONNX Runtime not available. Install: pip install onnxruntime")
+
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.model_dir = Path(model_dir or Path("data") / "onnx" / model_name.replace("/", "__"))
+        self.quantize = quantize
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+
+        model_path = self._ensure_model()
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        logger.info(f" ONNX embedding model ready: {model_path.name}")
+
+    def _ensure_model(self) -> Path:
+        """Export (and quantize) the model once, then reuse the files"""
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = self.model_dir / "model.onnx"
+        int8_path = self.model_dir / "model.int8.onnx"
+
+        if not fp32_path.exists():
+            self._export(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not int8_path.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(" Quantizing ONNX model to int8...")
+            quantize_dynamic(
+                model_input=str(fp32_path),
+                model_output=str(int8_path),
+                weight_type=QuantType.QInt8
+            )
+
+        return int8_path
+
+    def _export(self, output_path: Path) -> None:
+        """Export the transformer encoder to ONNX via torch"""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        logger.info(f" Exporting {self.model_name} to ONNX...")
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = ["input_ids", "attention_mask", "token_type_ids"]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(output_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts"""
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        feeds = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in encoded
+        }
+        if "token_type_ids" in self._input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+
+        # L2 normalize (matches normalize_embeddings=True)
+        norms = np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents"""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [t.replace("\n", " ") for t in texts[start:start + self.batch_size]]
+            vectors.extend(self._encode(batch).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self._encode([text.replace("\n", " ")])[0].tolist()
@@ -10,13 +10,17 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from pathlib import Path
+from typing import Optional
+import json
 import logging
 
 from backend.services.assistant_service import HybridAssistant
 from backend.config import settings
+from backend.core.llm import LLMOverloadedError, limiter_stats, llm_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -41,6 +45,11 @@ assistant: HybridAssistant = None
 
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None  # Conversation to continue (no history without one)
+
+
+class ClearRequest(BaseModel):
+    session_id: str  # Required: a client may only clear its own conversation
 
 
 class ChatResponse(BaseModel):
@@ -56,6 +65,13 @@ async def startup_event():
     logger.info(f"{settings.APP_NAME} v{settings.VERSION} started")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the assistant's connections and threads"""
+    if assistant is not None:
+        await assistant.aclose()
+
+
 @app.get("/api/status")
 async def get_status():
     """Get backend status"""
@@ -83,12 +99,21 @@ async def initialize():
     global assistant
     
     try:
-        if not settings.COHERE_API_KEY:
+        if settings.LLM_PROVIDER != "mock" and not settings.COHERE_API_KEY:
             raise HTTPException(status_code=400, detail="Cohere API key not configured")
         
         logger.info("Initializing assistant...")
-        assistant = HybridAssistant(llm_provider=settings.LLM_PROVIDER)
-        assistant.initialize(force_rebuild=False)
+        new_assistant = HybridAssistant(llm_provider=settings.LLM_PROVIDER)
+        try:
+            new_assistant.initialize(force_rebuild=False)
+        except Exception:
+            await new_assistant.aclose()
+            raise
+        
+        # Release the replaced instance's pools, threads and executors
+        old_assistant, assistant = assistant, new_assistant
+        if old_assistant is not None:
+            await old_assistant.aclose()
         
         stats = assistant.get_stats()
         pdf_count = len(list(settings.KNOWLEDGE_BASE_PATH.glob("*.pdf"))) if settings.KNOWLEDGE_BASE_PATH.exists() else 0
@@ -114,25 +139,77 @@ async def chat(message: ChatMessage):
         raise HTTPException(status_code=400, detail="Assistant not initialized")
     
     try:
-        result = assistant.ask(message.message)
+        result = await assistant.aask(message.message, message.session_id)
         return ChatResponse(**result)
+    except LLMOverloadedError as e:
+        logger.warning(f"Chat shed: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"})
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(events):
+    """Format assistant stream events as Server-Sent Events"""
+    for event in events:
+        name = event.pop("event")
+        # default=float: relevance scores may be numpy floats
+        yield f"event: {name}\ndata: {json.dumps(event, default=float)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Chat with the assistant, streaming tokens as Server-Sent Events"""
+    global assistant
+    
+    if not assistant or not assistant.is_initialized:
+        raise HTTPException(status_code=400, detail="Assistant not initialized")
+    
+    # Sync generator: Starlette iterates it in a worker thread
+    return StreamingResponse(
+        _sse(assistant.ask_stream(message.message, message.session_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/clear")
-async def clear_history():
-    """Clear chat history"""
+async def clear_history(request: ClearRequest):
+    """Clear one session's chat history"""
     global assistant
     
     if assistant:
-        assistant.clear_history()
+        assistant.clear_memory(request.session_id)
         return {"status": "cleared"}
     
     return {"status": "no_assistant"}
 
 
+@app.delete("/api/documents/{filename}")
+async def delete_document(filename: str):
+    """Remove a PDF's chunks from the knowledge base"""
+    global assistant
+
+    if not assistant or not assistant.is_initialized:
+        raise HTTPException(status_code=400, detail="Assistant not initialized")
+
+    try:
+        deleted = assistant.delete_document(filename)
+        return {"status": "deleted", "filename": filename, "chunks_deleted": deleted}
+    except Exception as e:
+        logger.error(f"Delete failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """LLM limiter queue depth, wait times and shed counts, shared clients and routing health"""
+    stats = {"limits": limiter_stats(), "clients": llm_registry.get_stats()}
+    if assistant and assistant.is_initialized:
+        stats["routing"] = assistant.get_stats()["llm_routing"]
+    return stats
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -3,8 +3,13 @@ Hybrid Personal Assistant
 Answers from Knowledge Base (RAG) OR General Questions
 """
 
+import asyncio
+import hashlib
 import os
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
 # LLM Providers
@@ -13,10 +18,8 @@ from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 
 # Chains & Memory
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.documents import Document
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 
 # Local imports
@@ -24,39 +27,115 @@ from config import Config
 from ocr_processor import PDFProcessor, TextChunker
 from vector_store import VectorStoreManager
 from backend.core.vector_store.semantic_search import SemanticRAGOptimizer
-from backend.core.cache import RedisCacheManager
+from backend.core.cache import (
+    RedisCacheManager, AsyncRedisCacheManager, SingleFlight, RedisSingleFlight, AsyncSingleFlight,
+    AsyncRedisSingleFlight, StaleRevalidator, CacheWarmer
+)
+from backend.core.document_processing.deduplicator import ChunkDeduplicator
+from backend.core.document_processing.context_builder import ContextBuilder
+from backend.core.document_processing.tokenization import TokenLengthFunction, token_chunk_size
+from backend.core.memory import SessionMemory, RedisSessionMemory, HistoryCompactor
+from backend.core.memory.history_compactor import NO_HISTORY
+from backend.core.llm.router import RoutingChatModel
+from backend.core.llm.mock import MockChatModel
+from backend.core.llm.registry import llm_registry
+from backend.core.llm.limiter import RateLimitedChatModel, LLMOverloadedError, get_limiter, limiter_stats
+from backend.utils.logger import LoggerConfig
 
 logger = logging.getLogger(__name__)
 
+# Session used by callers that do not pass one (CLI, single-user setups)
+DEFAULT_SESSION = "default"
+
 
 class LLMFactory:
     """Create LLM instances based on provider"""
     
+    MODELS = {
+        "cohere": "command-r-plus-08-2024",
+        "groq": "llama3-8b-8192",
+        "openai": "gpt-3.5-turbo",
+        "mock": "mock"
+    }
+    
+    @staticmethod
+    def _key(provider: str, temperature: float) -> tuple:
+        """Registry key of a provider's client"""
+        return (provider, LLMFactory.MODELS.get(provider), temperature, None)  # provider default max_tokens
+    
     @staticmethod
     def create(provider: str = None, temperature: float = 0.3):
-        provider = provider or Config.LLM_PROVIDER
+        """
+        Shared LLM client for a provider, behind that provider's process-wide
+        limiter (concurrency cap, token bucket, requests per minute)
         
+        Clients come from the process-wide registry keyed by (provider, model,
+        temperature, max_tokens), so callers reuse one client and its
+        keep-alive connections instead of building a new one per call.
+        """
+        provider = provider or Config.LLM_PROVIDER
+        return llm_registry.get(LLMFactory._key(provider, temperature), lambda: RateLimitedChatModel(
+            model=LLMFactory._build(provider, temperature),
+            limiter=get_limiter(provider, Config)
+        ))
+    
+    @staticmethod
+    def _build(provider: str, temperature: float = 0.3):
         if provider == "cohere":
             return ChatCohere(
-                model="command-r-plus-08-2024",
+                model=LLMFactory.MODELS["cohere"],
                 temperature=temperature,
-                cohere_api_key=Config.COHERE_API_KEY
+                cohere_api_key=Config.COHERE_API_KEY,
+                max_retries=Config.LLM_MAX_RETRIES
             )
         elif provider == "groq":
             return ChatGroq(
-                model_name="llama3-8b-8192",
+                model_name=LLMFactory.MODELS["groq"],
                 temperature=temperature,
-                api_key=Config.GROQ_API_KEY
+                api_key=Config.GROQ_API_KEY,
+                max_retries=Config.LLM_MAX_RETRIES
             )
         elif provider == "openai":
             return ChatOpenAI(
-                model_name="gpt-3.5-turbo",
+                model_name=LLMFactory.MODELS["openai"],
                 temperature=temperature,
-                api_key=Config.OPENAI_API_KEY
+                api_key=Config.OPENAI_API_KEY,
+                max_retries=Config.LLM_MAX_RETRIES
+            )
+        elif provider == "mock":
+            # Offline provider for benchmarks and load tests (no network, no key)
+            return MockChatModel(
+                response=Config.MOCK_LLM_RESPONSE,
+                response_tokens=Config.MOCK_LLM_RESPONSE_TOKENS,
+                latency_ms=Config.MOCK_LLM_LATENCY_MS,
+                latency_sigma=Config.MOCK_LLM_LATENCY_SIGMA,
+                tokens_per_second=Config.MOCK_LLM_TOKENS_PER_SECOND,
+                seed=Config.MOCK_LLM_SEED
             )
         else:
             raise ValueError(f"Unknown provider: {provider}")
 
+    @staticmethod
+    def create_routed(provider: str = None, temperature: float = 0.3):
+        """
+        Primary provider plus LLM_FALLBACK_PROVIDERS behind a RoutingChatModel
+        (failover, optional hedging); a plain LLM when no fallbacks are set
+        """
+        provider = provider or Config.LLM_PROVIDER
+        names = [provider] + [name for name in Config.LLM_FALLBACK_PROVIDERS if name != provider]
+        if len(names) == 1:
+            return LLMFactory.create(provider, temperature)
+        
+        logger.info(f"🔀 Routing LLM calls across: {', '.join(names)}")
+        # Shared too: provider health and the hedge pool survive assistant rebuilds
+        # Keyed by the members' keys: routers over differently configured clients stay apart
+        key = ("routed",) + tuple(LLMFactory._key(name, temperature) for name in names)
+        return llm_registry.get(key, lambda: RoutingChatModel(
+            providers={name: LLMFactory.create(name, temperature) for name in names},
+            hedge=Config.LLM_HEDGE,
+            hedge_percentile=Config.LLM_HEDGE_PERCENTILE
+        ))
+
 
 class HybridAssistant:
     """
@@ -70,17 +149,98 @@ class HybridAssistant:
         
         # Initialize components
         self.pdf_processor = PDFProcessor()
-        self.chunker = TextChunker(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+        if Config.CHUNK_LENGTH_UNIT == "tokens":
+            # Size chunks to the embedding window (the tokenizer's special tokens excluded)
+            self.chunker = TextChunker(
+                token_chunk_size(Config.EMBEDDING_MODEL, Config.EMBEDDING_MAX_TOKENS),
+                Config.CHUNK_TOKEN_OVERLAP,
+                length_unit="tokens",
+                model_name=Config.EMBEDDING_MODEL,
+                splitter=Config.CHUNK_SPLITTER
+            )
+        else:
+            self.chunker = TextChunker(
+                Config.CHUNK_SIZE,
+                Config.CHUNK_OVERLAP,
+                splitter=Config.CHUNK_SPLITTER
+            )
         self.vector_store = VectorStoreManager()
+        self.deduplicator = (
+            ChunkDeduplicator(max_distance=Config.DEDUP_MAX_DISTANCE, max_entries=Config.DEDUP_MAX_ENTRIES)
+            if Config.ENABLE_DEDUP else None
+        )
+        self.context_builder = ContextBuilder(
+            max_tokens=Config.CONTEXT_MAX_TOKENS,
+            max_overlap_chars=Config.context_max_overlap_chars(),
+            trim_sentences=Config.CONTEXT_TRIM_SENTENCES,
+            token_counter=(
+                TokenLengthFunction(Config.EMBEDDING_MODEL) if Config.CONTEXT_TOKEN_COUNT == "tokenizer" else None
+            )
+        )
         self.semantic_rag = None  # Will be initialized after vector store
-        self.cache_manager = RedisCacheManager(ttl_hours=24)  # 24 hour cache
+        self.cache_manager = RedisCacheManager.from_config(
+            Config,
+            llm_provider=self.llm_provider,
+            llm_model=LLMFactory.MODELS.get(self.llm_provider),
+            embeddings=self.vector_store.embeddings
+        )
+        # Non-blocking client for async routes (same keys and L1 tier)
+        self.async_cache_manager = AsyncRedisCacheManager(self.cache_manager)
+        
+        # Request coalescing: "process", "redis" (across workers) or "off"
+        if Config.SINGLE_FLIGHT == "redis":
+            self.single_flight = RedisSingleFlight(self.cache_manager, lock_timeout=Config.SINGLE_FLIGHT_LOCK_TIMEOUT)
+            self.async_single_flight = AsyncRedisSingleFlight(
+                self.async_cache_manager, lock_timeout=Config.SINGLE_FLIGHT_LOCK_TIMEOUT
+            )
+        elif Config.SINGLE_FLIGHT == "process":
+            self.single_flight = SingleFlight()
+            self.async_single_flight = AsyncSingleFlight()
+        else:
+            self.single_flight = None
+            self.async_single_flight = None
+        
+        # Blocking work off the event loop in aask: retrieval (embedding + vector
+        # search) and chat history reads and writes (Redis session memory)
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.ASYNC_RETRIEVAL_WORKERS,
+            thread_name_prefix="retrieval"
+        )
+        
+        # Background refresh of stale (soft-expired) cached answers
+        self.revalidator = (
+            StaleRevalidator(self.cache_manager, max_workers=Config.REVALIDATE_WORKERS)
+            if Config.CACHE_STALE_TTL_HOURS > 0 else None
+        )
+        
+        # Regenerates frequent recent questions after deploys / rebuilds
+        self.cache_warmer = CacheWarmer(
+            self.cache_manager,
+            lambda question: self._generate_answer(question),
+            max_concurrency=Config.CACHE_WARM_CONCURRENCY,
+            rate_per_second=Config.CACHE_WARM_RATE
+        )
         
         # LLM (will be initialized later)
         self.llm = None
         
-        # Conversation memory - using ChatMessageHistory
-        self.chat_history = ChatMessageHistory()
-        self.max_history = 5  # Remember last 5 exchanges for faster processing
+        # Conversation memory per session: ring buffer of the last max_history messages
+        self.max_history = 20  # Safety cap; turns beyond HISTORY_KEEP_TURNS are folded into a summary
+        session_memory = SessionMemory(
+            max_messages=self.max_history,
+            max_sessions=Config.MAX_SESSIONS,
+            idle_ttl_seconds=Config.SESSION_IDLE_TTL_SECONDS
+        )
+        self.memory = (
+            RedisSessionMemory(self.cache_manager, session_memory)
+            if Config.SESSION_STORE == "redis" else session_memory
+        )
+        # Prompt history: recent turns word for word, older ones summarized in the background
+        self.history = HistoryCompactor(
+            self.memory,
+            keep_turns=Config.HISTORY_KEEP_TURNS,
+            max_summary_chars=Config.HISTORY_SUMMARY_MAX_CHARS
+        )
         
         # Chains
         self.rag_chain = None
@@ -100,11 +260,17 @@ class HybridAssistant:
             logger.warning("⚠️ Redis cache is DISABLED - responses will not be cached")
         
         # Create LLM
-        self.llm = LLMFactory.create(self.llm_provider)
+        self.llm = LLMFactory.create_routed(self.llm_provider)
+        if Config.HISTORY_SUMMARIZER == "llm":
+            self.history.llm = LLMFactory.create(self.llm_provider, temperature=0.1)
         
         # Load or build vector store
         if not force_rebuild and self.vector_store.load_vector_store():
             logger.info(" Using existing knowledge base")
+            if self.deduplicator:
+                # Later uploads are deduplicated against what is already stored
+                self.deduplicator.reset()
+                self.deduplicator.load(self.vector_store.iter_chunks())
         else:
             logger.info(" Building knowledge base from PDFs...")
             
@@ -117,8 +283,11 @@ class HybridAssistant:
             documents = self.pdf_processor.process_directory(Config.KNOWLEDGE_BASE_PATH)
             
             if documents:
-                chunks = self.chunker.chunk_documents(documents)
+                if self.deduplicator:
+                    self.deduplicator.reset()
+                chunks, occurrences = self._prepare_chunks(documents)
                 self.vector_store.create_vector_store(chunks)
+                self.vector_store.record_occurrences(occurrences)
             else:
                 logger.warning(" No documents found in knowledge base")
         
@@ -132,8 +301,23 @@ class HybridAssistant:
         self.is_initialized = True
         logger.info(" Assistant initialized successfully!")
         
+        if Config.ENABLE_CACHE_WARMING:
+            self.warm_cache()
+        
         return True
     
+    def _prepare_chunks(self, documents: List[Document]) -> Tuple[List[Document], Dict[str, List[str]]]:
+        """
+        Chunk pages and drop duplicate chunks before embedding
+        
+        Returns:
+            (chunks to store, {kept chunk ID: locations of dropped duplicates})
+        """
+        chunks = self.chunker.chunk_documents(documents)
+        if self.deduplicator:
+            return self.deduplicator.deduplicate(chunks)
+        return chunks, {}
+    
     def _setup_chains(self):
         """Setup RAG and General chains"""
         
@@ -152,23 +336,11 @@ Chat History:
             ("human", "{question}")
         ])
         
+        self.rag_prompt = rag_prompt
         if self.vector_store.vector_store:
-            # Modern LCEL chain
-            def format_docs(docs):
-                return "\n\n".join(doc.page_content for doc in docs)
-            
+            # Context comes from the chunks _retrieve already scored (see _rag_inputs)
+            self.rag_chain = rag_prompt | self.llm | StrOutputParser()
             retriever = self.vector_store.get_retriever()
-            
-            self.rag_chain = (
-                {
-                    "context": retriever | format_docs,
-                    "question": RunnablePassthrough(),
-                    "chat_history": lambda _: self._format_chat_history()
-                }
-                | rag_prompt
-                | self.llm
-                | StrOutputParser()
-            )
             self.retriever = retriever
         else:
             self.rag_chain = None
@@ -190,18 +362,43 @@ Previous conversation:
         
         self.general_chain = general_prompt | self.llm | StrOutputParser()
     
-    def _format_chat_history(self) -> str:
-        """Format chat history for prompts"""
-        messages = self.chat_history.messages[-self.max_history:]  # Last N messages
-        
-        history = []
-        for msg in messages:
-            role = "Human" if msg.type == "human" else "Assistant"
-            history.append(f"{role}: {msg.content}")
+    def _format_chat_history(self, session_id: str = None) -> str:
+        """Format a session's chat history for prompts (none without a session)"""
+        return self.history.format(session_id)
+    
+    def _rag_inputs(
+        self, question: str, relevant_docs: List[Document], scores: List[float], session_id: str = None
+    ) -> Dict:
+        """RAG chain inputs, with the retrieved chunks packed into the context token budget"""
+        inputs = {
+            "question": question,
+            "chat_history": self._format_chat_history(session_id),
+            "context": self.context_builder.build(question, relevant_docs, scores)
+        }
+        prompt_tokens = self.context_builder.record_prompt(self.rag_prompt.format(**inputs))
+        logger.info(f"📦 RAG prompt ≈{prompt_tokens} tokens ({len(relevant_docs)} chunks retrieved)")
+        return inputs
+    
+    def _cache_question(self, question: str, session_id: str = None) -> Optional[str]:
+        """
+        Cache lookup text for a question asked within a conversation
         
-        return "\n".join(history) if history else "No previous conversation"
+        Answers generated with chat history in the prompt are cached under
+        the question plus a digest of that history, so they are only reused
+        for the same conversation state. Returns None when there is no
+        history and the shared cache entry applies.
+        """
+        history = self._format_chat_history(session_id)
+        if history == NO_HISTORY:
+            return None
+        digest = hashlib.sha256(history.encode()).hexdigest()[:16]
+        return f"{question} [conversation {digest}]"
+    
+    def _remember(self, session_id: Optional[str], question: str, answer: str) -> None:
+        if session_id:
+            self.history.add_exchange(session_id, question, answer)
     
-    def ask(self, question: str) -> Dict:
+    def ask(self, question: str, session_id: str = DEFAULT_SESSION) -> Dict:
         """
         Main method to ask questions
         Automatically decides: RAG or General response
@@ -215,16 +412,294 @@ Previous conversation:
         
         logger.info(f"❓ Question: {question}")
         
+        self.cache_manager.record_query(question)
+        
         # Check cache first
         logger.info(f"🔍 Cache enabled: {self.cache_manager.enabled}")
-        cached_response = self.cache_manager.get_cached_answer(question)
+        cache_question = self._cache_question(question, session_id)
+        cached_response = self.cache_manager.get_cached_answer(
+            cache_question or question, semantic=cache_question is None
+        )
         if cached_response:
             logger.info("⚡ Returning cached response")
             cached_response['from_cache'] = True
+            self._remember(session_id, question, cached_response["answer"])
+            if cached_response.get('stale') and self.revalidator and cache_question is None:
+                # Answer now, regenerate the entry that actually expired
+                stale_question = cached_response.get('semantic_match', {}).get('question', question)
+                self.revalidator.submit(stale_question, lambda: self._generate_answer(stale_question))
             return cached_response
         
         logger.info("📝 Cache miss - generating new response")
         
+        # Concurrent misses for the same question share one generation
+        generate = lambda: self._generate_answer(question, session_id, cache_question)
+        if self.single_flight is None:
+            response = generate()
+        else:
+            response = self.single_flight.do(cache_question or question, generate)
+        
+        # Every session that shared the generation records the exchange
+        if response["source_type"] != "error":
+            self._remember(session_id, question, response["answer"])
+        return response
+    
+    async def aask(self, question: str, session_id: str = DEFAULT_SESSION) -> Dict:
+        """
+        Async variant of ask for the FastAPI handlers
+        
+        Redis goes through the asyncio client, LLM calls through ainvoke and
+        retrieval (embedding + vector search) and chat history through a
+        thread pool, so a slow request never blocks the event loop.
+        """
+        if not self.is_initialized:
+            return {
+                "answer": " Assistant not initialized. Call initialize() first.",
+                "source_type": "error",
+                "sources": []
+            }
+        
+        logger.info(f"❓ Question: {question}")
+        await self.async_cache_manager.record_query(question)
+        
+        loop = asyncio.get_running_loop()
+        cache_question = await loop.run_in_executor(self.executor, self._cache_question, question, session_id)
+        cached_response = await self.async_cache_manager.get_cached_answer(
+            cache_question or question, semantic=cache_question is None
+        )
+        if cached_response:
+            logger.info("⚡ Returning cached response")
+            cached_response['from_cache'] = True
+            await loop.run_in_executor(self.executor, self._remember, session_id, question, cached_response["answer"])
+            if cached_response.get('stale') and self.revalidator and cache_question is None:
+                stale_question = cached_response.get('semantic_match', {}).get('question', question)
+                # The cross-worker claim is a Redis round trip: keep it off the event loop
+                await loop.run_in_executor(
+                    self.executor, self.revalidator.submit,
+                    stale_question, lambda: self._generate_answer(stale_question)
+                )
+            return cached_response
+        
+        logger.info("📝 Cache miss - generating new response")
+        
+        generate = lambda: self._agenerate_answer(question, session_id, cache_question)
+        if self.async_single_flight is None:
+            response = await generate()
+        else:
+            response = await self.async_single_flight.do(cache_question or question, generate)
+        
+        if response["source_type"] != "error":
+            await loop.run_in_executor(self.executor, self._remember, session_id, question, response["answer"])
+        return response
+    
+    async def _agenerate_answer(self, question: str, session_id: str = None, cache_question: str = None) -> Dict:
+        """Async counterpart of _generate_answer"""
+        loop = asyncio.get_running_loop()
+        relevant_docs, scores = await loop.run_in_executor(self.executor, self._retrieve, question)
+        if relevant_docs:
+            response = await self._aanswer_from_knowledge_base(question, relevant_docs, scores, session_id)
+        else:
+            response = await self._aanswer_general_question(question, session_id)
+        
+        if response["source_type"] != "error":
+            await self.async_cache_manager.cache_answer(
+                cache_question or question, response, self._source_files(relevant_docs),
+                semantic=cache_question is None
+            )
+        return response
+    
+    async def _aanswer_from_knowledge_base(
+        self, 
+        question: str, 
+        relevant_docs: List[Document],
+        scores: List[float],
+        session_id: str = None
+    ) -> Dict:
+        """Async counterpart of _answer_from_knowledge_base"""
+        loop = asyncio.get_running_loop()
+        try:
+            inputs = await loop.run_in_executor(
+                self.executor, self._rag_inputs, question, relevant_docs, scores, session_id
+            )
+            answer = await self.rag_chain.ainvoke(inputs)
+            
+            return {
+                "answer": answer,
+                "source_type": "knowledge_base",
+                "sources": self._format_sources(relevant_docs, scores)
+            }
+            
+        except LLMOverloadedError:
+            # Shed load fast rather than retrying through the general chain
+            raise
+        except Exception as e:
+            logger.error(f"RAG error: {e}")
+            return await self._aanswer_general_question(question, session_id)
+    
+    async def _aanswer_general_question(self, question: str, session_id: str = None) -> Dict:
+        """Async counterpart of _answer_general_question"""
+        loop = asyncio.get_running_loop()
+        try:
+            answer = await self.general_chain.ainvoke({
+                "question": question,
+                "chat_history": await loop.run_in_executor(self.executor, self._format_chat_history, session_id)
+            })
+            
+            return {
+                "answer": answer,
+                "source_type": "general_knowledge",
+                "sources": []
+            }
+            
+        except LLMOverloadedError:
+            # Surfaced as HTTP 503 rather than cached as an answer
+            raise
+        except Exception as e:
+            logger.error(f"General chain error: {e}")
+            return {
+                "answer": f"Sorry, I encountered an error: {str(e)}",
+                "source_type": "error",
+                "sources": []
+            }
+    
+    def ask_stream(self, question: str, session_id: str = DEFAULT_SESSION) -> Iterator[Dict]:
+        """
+        Streaming variant of ask
+        
+        Yields a "metadata" event (source type and sources), then "token"
+        events as the LLM produces them, then a "done" event with time to
+        first token and total time. Metadata waits for the first token, so
+        a knowledge-base answer that fails before it falls back to the
+        general chain as in ask. The answer is cached once the stream
+        completes; self-reflection is skipped since tokens are already sent.
+        """
+        started = time.perf_counter()
+        if not self.is_initialized:
+            yield {"event": "error", "message": "Assistant not initialized. Call initialize() first."}
+            return
+        
+        logger.info(f"❓ Question: {question}")
+        self.cache_manager.record_query(question)
+        
+        cache_question = self._cache_question(question, session_id)
+        cached_response = self.cache_manager.get_cached_answer(
+            cache_question or question, semantic=cache_question is None
+        )
+        if cached_response:
+            logger.info("⚡ Streaming cached response")
+            self._remember(session_id, question, cached_response["answer"])
+            if cached_response.get('stale') and self.revalidator and cache_question is None:
+                stale_question = cached_response.get('semantic_match', {}).get('question', question)
+                self.revalidator.submit(stale_question, lambda: self._generate_answer(stale_question))
+            yield {
+                "event": "metadata",
+                "source_type": cached_response["source_type"],
+                "sources": cached_response["sources"],
+                "from_cache": True
+            }
+            yield {"event": "token", "text": cached_response["answer"]}
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            yield {"event": "done", "ttft_ms": round(elapsed_ms, 1), "total_ms": round(elapsed_ms, 1)}
+            return
+        
+        relevant_docs, scores = self._retrieve(question)
+        source_type, sources, tokens = "general_knowledge", [], None
+        try:
+            if relevant_docs:
+                try:
+                    first, tokens = self._first_token(
+                        self.rag_chain.stream(self._rag_inputs(question, relevant_docs, scores, session_id))
+                    )
+                    source_type = "knowledge_base"
+                    sources = self._format_sources(relevant_docs, scores)
+                except LLMOverloadedError:
+                    # Shed load fast rather than retrying through the general chain
+                    raise
+                except Exception as e:
+                    # Nothing sent yet: answer from general knowledge instead
+                    logger.error(f"RAG error: {e}")
+                    relevant_docs, scores = [], []
+            if tokens is None:
+                first, tokens = self._first_token(self.general_chain.stream({
+                    "question": question,
+                    "chat_history": self._format_chat_history(session_id)
+                }))
+        except Exception as e:
+            logger.error(f"Streaming error: {e}")
+            yield {"event": "error", "message": str(e)}
+            return
+        
+        yield {"event": "metadata", "source_type": source_type, "sources": sources, "from_cache": False}
+        
+        parts = []
+        first_token_at = None
+        if first:
+            first_token_at = time.perf_counter()
+            parts.append(first)
+            yield {"event": "token", "text": first}
+        try:
+            for token in tokens:
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(token)
+                yield {"event": "token", "text": token}
+        except Exception as e:
+            # Partial answers are never cached
+            logger.error(f"Streaming error: {e}")
+            yield {"event": "error", "message": str(e)}
+            return
+        
+        answer = "".join(parts)
+        self._remember(session_id, question, answer)
+        self.cache_manager.cache_answer(
+            cache_question or question,
+            {"answer": answer, "source_type": source_type, "sources": sources},
+            self._source_files(relevant_docs),
+            semantic=cache_question is None
+        )
+        
+        finished = time.perf_counter()
+        ttft_ms = ((first_token_at or finished) - started) * 1000
+        total_ms = (finished - started) * 1000
+        logger.info(f"⏱️ Streamed answer: first token {ttft_ms:.0f}ms, total {total_ms:.0f}ms")
+        yield {"event": "done", "ttft_ms": round(ttft_ms, 1), "total_ms": round(total_ms, 1)}
+    
+    @staticmethod
+    def _first_token(tokens: Iterator[str]) -> Tuple[str, Iterator[str]]:
+        """First non-empty token of a stream ("" if none) and the rest of it"""
+        tokens = iter(tokens)
+        for token in tokens:
+            if token:
+                return token, tokens
+        return "", tokens
+    
+    def _generate_answer(self, question: str, session_id: str = None, cache_question: str = None) -> Dict:
+        """
+        Answer a question that missed the cache (RAG or general) and cache it
+        
+        Reads the session's chat history but does not record the exchange:
+        ask / aask do, for every session sharing this generation. Without a
+        session_id (warming, background refresh) no chat history is read.
+        """
+        relevant_docs, scores = self._retrieve(question)
+        if relevant_docs:
+            response = self._answer_from_knowledge_base(question, relevant_docs, scores, session_id)
+        else:
+            response = self._answer_general_question(question, session_id)
+        
+        # Cache the response (general responses too, but never an error message:
+        # it would be served for the full TTL after the LLM recovers)
+        if response["source_type"] != "error":
+            self.cache_manager.cache_answer(
+                cache_question or question, response, self._source_files(relevant_docs),
+                semantic=cache_question is None
+            )
+        return response
+    
+    def _retrieve(self, question: str) -> Tuple[List[Document], List[float]]:
+        """Route a question: relevant knowledge-base documents, or none for a general answer"""
         # Use semantic RAG optimizer for faster, more accurate search
         if self.semantic_rag and self.vector_store.vector_store:
             logger.info("🚀 Using enhanced semantic search")
@@ -242,10 +717,7 @@ Previous conversation:
                 
                 if best_score > 0.3:  # Threshold for relevance
                     logger.info(f"✅ Using knowledge base ({len(relevant_docs)} docs, score: {best_score:.3f})")
-                    response = self._answer_from_knowledge_base(question, relevant_docs, scores)
-                    # Cache the response
-                    self.cache_manager.cache_answer(question, response)
-                    return response
+                    return relevant_docs, scores
         
         # Fallback to original method if semantic RAG not available
         is_relevant, relevant_docs, scores = self.vector_store.is_query_relevant(
@@ -255,45 +727,29 @@ Previous conversation:
         
         if is_relevant and self.rag_chain and len(relevant_docs) > 0:
             logger.info(f"📚 Using knowledge base (fallback, {len(relevant_docs)} docs)")
-            response = self._answer_from_knowledge_base(question, relevant_docs, scores)
-            # Cache the response
-            self.cache_manager.cache_answer(question, response)
-            return response
-        else:
-            # Use general LLM for random questions
-            logger.info("🌐 Using general knowledge")
-            response = self._answer_general_question(question)
-            # Cache general responses too
-            self.cache_manager.cache_answer(question, response)
-            return response
+            return relevant_docs, scores
+        
+        # Use general LLM for random questions
+        logger.info("🌐 Using general knowledge")
+        return [], []
     
     def _answer_from_knowledge_base(
         self, 
         question: str, 
         relevant_docs: List[Document],
-        scores: List[float]
+        scores: List[float],
+        session_id: str = None
     ) -> Dict:
         """Answer using RAG from knowledge base"""
         logger.info(" Answering from Knowledge Base (RAG)")
         
         try:
             # Get answer from RAG chain
-            answer = self.rag_chain.invoke(question)
+            answer = self.rag_chain.invoke(
+                self._rag_inputs(question, relevant_docs, scores, session_id)
+            )
             
-            # Update memory
-            self.chat_history.add_user_message(question)
-            self.chat_history.add_ai_message(answer)
-            
-            # Format sources from relevant_docs
-            sources = []
-            for i, doc in enumerate(relevant_docs[:3]):  # Top 3 sources for faster processing
-                sources.append({
-                    "content": doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content,
-                    "source": doc.metadata.get("filename", "Unknown"),
-                    "page": doc.metadata.get("page", "N/A"),
-                    "extraction_method": doc.metadata.get("extraction_method", "unknown"),
-                    "relevance": scores[i] if i < len(scores) else None
-                })
+            sources = self._format_sources(relevant_docs, scores)
             
             return {
                 "answer": answer,
@@ -301,35 +757,50 @@ Previous conversation:
                 "sources": sources
             }
             
+        except LLMOverloadedError:
+            # Shed load fast rather than retrying through the general chain
+            raise
         except Exception as e:
             logger.error(f"RAG error: {e}")
             import traceback
             traceback.print_exc()
             # Fallback to general
-            return self._answer_general_question(question)
+            return self._answer_general_question(question, session_id)
     
-    def _answer_general_question(self, question: str) -> Dict:
+    def _format_sources(self, relevant_docs: List[Document], scores: List[float]) -> List[Dict]:
+        """Source metadata returned alongside knowledge-base answers"""
+        sources = []
+        for i, doc in enumerate(relevant_docs[:3]):  # Top 3 sources for faster processing
+            sources.append({
+                "content": doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content,
+                "source": doc.metadata.get("filename", "Unknown"),
+                "page": doc.metadata.get("page", "N/A"),
+                "extraction_method": doc.metadata.get("extraction_method", "unknown"),
+                "relevance": scores[i] if i < len(scores) else None
+            })
+        return sources
+    
+    def _answer_general_question(self, question: str, session_id: str = None) -> Dict:
         """Answer general questions using LLM directly"""
         logger.info(" Answering as General Question")
         
         try:
-            chat_history = self._format_chat_history()
+            chat_history = self._format_chat_history(session_id)
             
             answer = self.general_chain.invoke({
                 "question": question,
                 "chat_history": chat_history
             })
             
-            # Update memory manually for general chain
-            self.chat_history.add_user_message(question)
-            self.chat_history.add_ai_message(answer)
-            
             return {
                 "answer": answer,
                 "source_type": "general_knowledge",
                 "sources": []
             }
             
+        except LLMOverloadedError:
+            # Surfaced as HTTP 503 rather than cached as an answer
+            raise
         except Exception as e:
             logger.error(f"General chain error: {e}")
             import traceback
@@ -386,21 +857,23 @@ Previous conversation:
         ]
     
     def add_document(self, pdf_path: str) -> bool:
-        """Add a new PDF to knowledge base"""
+        """Add (or re-add) a PDF to the knowledge base, syncing only changed chunks"""
         try:
+            filename = Path(pdf_path).name
             documents = self.pdf_processor.extract_text_from_pdf(pdf_path)
-            chunks = self.chunker.chunk_documents(documents)
-            self.vector_store.add_documents(chunks)
             
-            # Reinitialize RAG chain with updated retriever
-            self._setup_chains()
+            # Re-ingesting a file must not dedup its chunks against its old version
+            if self.deduplicator:
+                self.deduplicator.forget_source(filename)
+                self.vector_store.forget_occurrences(filename)
             
-            # Clear semantic search cache
-            if self.semantic_rag:
-                self.semantic_rag.clear_cache()
+            chunks, occurrences = self._prepare_chunks(documents)
+            result = self.vector_store.update_document(filename, chunks)
+            self.vector_store.record_occurrences(occurrences)
+            if self.deduplicator:
+                self.deduplicator.load(result["moved"])
             
-            # Clear Redis cache when adding new documents
-            self.cache_manager.invalidate_cache()
+            self._on_knowledge_base_changed(filename, content_added=result["added"] > 0)
             
             logger.info(f" Added {pdf_path} to knowledge base")
             return True
@@ -409,9 +882,45 @@ Previous conversation:
             logger.error(f"Error adding document: {e}")
             return False
     
-    def clear_memory(self):
-        """Clear conversation history and Redis cache"""
-        self.chat_history.clear()
+    def delete_document(self, filename: str) -> int:
+        """Remove a PDF's chunks from the knowledge base, returns chunks deleted"""
+        # Chunks other files also contain are handed over to them, not dropped
+        deleted, moved = self.vector_store.delete_document(filename)
+        
+        if self.deduplicator:
+            self.deduplicator.forget_source(filename)
+            self.deduplicator.load(moved)
+        
+        self._on_knowledge_base_changed(filename, content_added=False)
+        return deleted
+    
+    def _on_knowledge_base_changed(self, filename: str, content_added: bool):
+        """Keep chains, search caches and cached answers in sync with the vector store"""
+        # Reinitialize RAG chain with updated retriever
+        self._setup_chains()
+        
+        # Clear semantic search cache
+        if self.semantic_rag:
+            self.semantic_rag.clear_cache()
+        
+        if content_added:
+            # New content can change any answer: start a new cache generation
+            self.cache_manager.invalidate_cache()
+        else:
+            # Only removals: drop just the answers built from this file
+            self.cache_manager.invalidate_source(filename)
+    
+    @staticmethod
+    def _source_files(documents: List[Document]) -> List[str]:
+        """Knowledge-base files behind an answer (for source-level invalidation)"""
+        return [doc.metadata["filename"] for doc in documents if doc.metadata.get("filename")]
+    
+    def clear_memory(self, session_id: str = None):
+        """Clear one session's history, or all sessions and the Redis cache"""
+        self.history.clear(session_id)
+        if session_id:
+            logger.info(f"🧹 Conversation memory cleared ({session_id})")
+            return
         self.cache_manager.invalidate_cache()
         logger.info("🧹 Conversation memory and cache cleared")
     
@@ -419,13 +928,56 @@ Previous conversation:
         """Get cache statistics"""
         return self.cache_manager.get_cache_stats()
     
+    def warm_cache(self, limit: int = None, background: bool = True) -> Dict:
+        """
+        Pre-generate answers to the most frequent recent questions
+        (Redis query counter + request logs) that are not cached yet
+        """
+        limit = limit or Config.CACHE_WARM_LIMIT
+        if background:
+            started = self.cache_warmer.start(limit, LoggerConfig.LOG_DIR, Config.CACHE_WARM_DAYS)
+            return {"started": started, **self.cache_warmer.get_stats()}
+        questions = self.cache_warmer.collect(limit, LoggerConfig.LOG_DIR, Config.CACHE_WARM_DAYS)
+        return self.cache_warmer.warm(questions)
+    
     def get_stats(self) -> Dict:
         """Get assistant statistics"""
         stats = {
             "llm_provider": self.llm_provider,
             "is_initialized": self.is_initialized,
             "vector_store": self.vector_store.get_stats(),
-            "memory_messages": len(self.chat_history.messages),
+            "memory": self.memory.get_stats(),
+            "history": self.history.get_stats(),
+            "llm_routing": self.llm.get_stats() if isinstance(self.llm, RoutingChatModel) else None,
+            "llm_limits": limiter_stats(),
+            "llm_clients": llm_registry.get_stats(),
+            "deduplication": self.deduplicator.get_stats() if self.deduplicator else None,
+            "context": self.context_builder.get_stats(),
+            "single_flight": self.single_flight.get_stats() if self.single_flight else None,
+            "async_single_flight": self.async_single_flight.get_stats() if self.async_single_flight else None,
+            "revalidation": self.revalidator.get_stats() if self.revalidator else None,
+            "cache_warming": self.cache_warmer.get_stats(),
             "cache": self.get_cache_stats()
         }
-        return stats
\ No newline at end of file
+        return stats
+    
+    def close(self):
+        """
+        Release connections, threads and executors
+        
+        Call before replacing or discarding the assistant; LLM clients are
+        shared through the registry and stay open.
+        """
+        self.is_initialized = False
+        self.cache_warmer.stop()
+        if self.revalidator is not None:
+            self.revalidator.shutdown()
+        self.history.shutdown()
+        self.executor.shutdown(wait=False)
+        self.cache_manager.close()
+        logger.info("🔌 Assistant closed")
+    
+    async def aclose(self):
+        """close() for async callers: also closes the asyncio Redis pool"""
+        await self.async_cache_manager.close()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
\ No newline at end of file
@@ -64,7 +64,7 @@ export default function Home() {
   const [copiedIndex, setCopiedIndex] = useState<number | null>(null)
   const [hoveredMessage, setHoveredMessage] = useState<number | null>(null)
   const [chatSessions, setChatSessions] = useState<ChatSession[]>([])
-  const [currentSessionId, setCurrentSessionId] = useState<string>('default')
+  const [currentSessionId, setCurrentSessionId] = useState<string>(() => `chat_${Date.now()}`)
   const [searchQuery, setSearchQuery] = useState('')
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLTextAreaElement>(null)
@@ -146,7 +146,8 @@ export default function Home() {
 
     try {
       const response = await axios.post('http://localhost:8000/api/chat', {
-        message: input
+        message: input,
+        session_id: currentSessionId
       })
 
       const assistantMessage: Message = {
@@ -182,7 +183,7 @@ export default function Home() {
     setMessages([])
     localStorage.removeItem('chat_messages')
     try {
-      await axios.post('http://localhost:8000/api/clear')
+      await axios.post('http://localhost:8000/api/clear', { session_id: currentSessionId })
     } catch (error) {
       console.error('Failed to clear:', error)
     }
@@ -119,7 +119,7 @@ def run_cli():
                 print(f"\n📊 Statistics:")
                 print(f"   Provider: {stats['llm_provider']}")
                 print(f"   KB Documents: {stats['vector_store'].get('document_count', 0)}")
-                print(f"   Memory Messages: {stats['memory_messages']}")
+                print(f"   Memory Messages: {stats['memory']['messages']}")
                 continue
             
             elif cmd == 'help':
@@ -181,6 +181,8 @@ def run_cli():
         except Exception as e:
             print(f"\n Error: {e}")
             logger.exception("Error in main loop")
+    
+    assistant.close()
 
 
 if __name__ == "__main__":
@@ -190,20 +190,60 @@ class PDFProcessor:
 class TextChunker:
     """Chunk documents for embedding"""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_unit: str = "chars",
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        splitter: str = "native"
+    ):
+        """
+        Args:
+            chunk_size: Max chunk length (characters or tokens)
+            chunk_overlap: Overlap between chunks (same unit)
+            length_unit: "chars" or "tokens" (embedding-model word-pieces)
+            model_name: Embedding model whose tokenizer measures "tokens"
+            splitter: "native" (offset-based, faster) or "langchain"
+        """
         from langchain_text_splitters import RecursiveCharacterTextSplitter
         
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
-        )
+        if length_unit == "tokens":
+            from backend.core.document_processing.tokenization import TokenLengthFunction
+            length_function = TokenLengthFunction(model_name)
+        else:
+            length_function = len
+        
+        separators = ["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
+        self.length_unit = length_unit
+        self.chunk_size = chunk_size
+        self.length_function = length_function
+        
+        if splitter == "native":
+            from backend.core.document_processing.fast_splitter import FastRecursiveSplitter
+            self.splitter = FastRecursiveSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=separators,
+                length_function=None if length_function is len else length_function,
+                add_start_index=True
+            )
+        else:
+            self.splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+                add_start_index=True,
+                separators=separators
+            )
     
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into smaller chunks"""
         chunks = self.splitter.split_documents(documents)
-        logger.info(f" Created {len(chunks)} chunks from {len(documents)} pages")
+        if self.length_unit == "tokens":
+            from backend.core.document_processing.tokenization import enforce_token_limit
+            chunks = enforce_token_limit(chunks, self.length_function, self.chunk_size)
+        logger.info(f" Created {len(chunks)} chunks from {len(documents)} pages ({self.length_unit})")
         return chunks
 
 
@@ -0,0 +1,532 @@
+"""
+Performance Benchmarks
+Run from the project root: python scripts/benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+SAMPLE_QUERIES = [
+    "What is a data warehouse?",
+    "Explain the difference between OLTP and OLAP systems",
+    "What are the phases of the software project management lifecycle?",
+    "How does dimensional modeling work?",
+    "Define a fact table and a dimension table",
+    "What is risk management in software projects?",
+    "Describe the ETL process",
+    "Why do projects fail?",
+]
+
+
+def _timeit(fn, repeat: int):
+    """Run fn repeat times and return the list of durations in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _percentile(values, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _report(name: str, timings, items_per_call: int = 1):
+    """Print latency and throughput for a set of timings"""
+    mean = statistics.mean(timings)
+    print(
+        f"  {name:<28} p50={_percentile(timings, 50):8.2f}ms "
+        f"p95={_percentile(timings, 95):8.2f}ms "
+        f"throughput={items_per_call * 1000 / mean:10.1f}/s"
+    )
+
+
+# ===== Embeddings =====
+
+def bench_embeddings(args):
+    """Compare PyTorch and ONNX Runtime embedding backends"""
+    import numpy as np
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from backend.config import settings
+    from backend.core.vector_store.onnx_embeddings import ONNXEmbeddings, FP32_TOLERANCE, INT8_TOLERANCE
+
+    documents = (SAMPLE_QUERIES * ((args.batch // len(SAMPLE_QUERIES)) + 1))[:args.batch]
+    documents = [f"{text} " * 20 for text in documents]  # chunk-sized inputs
+
+    backends = {
+        "torch": HuggingFaceEmbeddings(
+            model_name=settings.EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        ),
+        "onnx-fp32": ONNXEmbeddings(
+            model_name=settings.EMBEDDING_MODEL,
+            model_dir=str(settings.ONNX_MODEL_DIR / settings.EMBEDDING_MODEL.replace("/", "__"))
+        ),
+        "onnx-int8": ONNXEmbeddings(
+            model_name=settings.EMBEDDING_MODEL,
+            model_dir=str(settings.ONNX_MODEL_DIR / settings.EMBEDDING_MODEL.replace("/", "__")),
+            quantize=True
+        ),
+    }
+
+    # Tolerance check against the PyTorch reference
+    reference = np.array(backends["torch"].embed_documents(documents))
+    tolerances = {
+        "onnx-fp32": args.fp32_tolerance or FP32_TOLERANCE,
+        "onnx-int8": args.int8_tolerance or INT8_TOLERANCE
+    }
+    failed = False
+
+    print("\nVector agreement with PyTorch (cosine similarity):")
+    for name, tolerance in tolerances.items():
+        vectors = np.array(backends[name].embed_documents(documents))
+        cosine = (reference * vectors).sum(axis=1)
+        ok = cosine.min() >= 1 - tolerance
+        failed = failed or not ok
+        print(f"  {name:<28} min={cosine.min():.5f} mean={cosine.mean():.5f} "
+              f"tolerance={tolerance} {'OK' if ok else 'FAIL'}")
+
+    print(f"\nQuery latency (single query, {args.repeat} runs):")
+    for name, backend in backends.items():
+        backend.embed_query(SAMPLE_QUERIES[0])  # warm-up
+        timings = _timeit(lambda: backend.embed_query(SAMPLE_QUERIES[0]), args.repeat)
+        _report(name, timings)
+
+    print(f"\nIngestion throughput (batch of {len(documents)} chunks):")
+    for name, backend in backends.items():
+        timings = _timeit(lambda: backend.embed_documents(documents), max(1, args.repeat // 10))
+        _report(name, timings, items_per_call=len(documents))
+
+    return 1 if failed else 0
+
+
+# ===== Chunking =====
+
+def _load_pages(args):
+    """Pages from PDFs in --pdf-dir, or synthetic pages"""
+    import random
+    from langchain_core.documents import Document
+
+    if args.pdf_dir:
+        from ocr_processor import PDFProcessor
+        return PDFProcessor().process_directory(args.pdf_dir)
+
+    random.seed(0)
+    words = "data warehouse fact dimension schema project risk scope. quality, cost! time? model".split()
+    pages = []
+    for page in range(args.pages):
+        # PDF-like layout: short extracted lines, occasional paragraph gaps
+        paragraphs = [
+            "\n".join(
+                " ".join(random.choice(words) for _ in range(random.randint(8, 14)))
+                for _ in range(random.randint(5, 20))
+            )
+            for _ in range(random.randint(2, 4))
+        ]
+        pages.append(Document(
+            page_content="\n\n".join(paragraphs),
+            metadata={"source": "synthetic.pdf", "filename": "synthetic.pdf", "page": page + 1}
+        ))
+    return pages
+
+
+def bench_chunking(args):
+    """Compare the native offset splitter with RecursiveCharacterTextSplitter"""
+    import tracemalloc
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from backend.core.document_processing.fast_splitter import FastRecursiveSplitter
+    from backend.core.document_processing.text_chunker import SEPARATORS
+
+    pages = _load_pages(args)
+    splitters = {
+        "langchain": RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            length_function=len,
+            separators=SEPARATORS
+        ),
+        "native": FastRecursiveSplitter(
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            separators=SEPARATORS
+        ),
+    }
+
+    runs = {
+        "langchain": lambda page: splitters["langchain"].split_text(page.page_content),
+        "native (offsets)": lambda page: splitters["native"].split_offsets(page.page_content),
+        "native (materialized)": lambda page: splitters["native"].split_text(page.page_content),
+    }
+
+    print(f"\nChunking {len(pages)} pages (size={args.chunk_size}, overlap={args.chunk_overlap}):")
+    for name, run in runs.items():
+        start = time.perf_counter()
+        chunk_count = sum(len(run(page)) for page in pages)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        results = [run(page) for page in pages]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del results
+
+        print(f"  {name:<28} pages/s={len(pages) / elapsed:10.1f} "
+              f"chunks={chunk_count:7d} peak_mem={peak / 1024 / 1024:8.2f}MB")
+
+    identical = all(runs["langchain"](page) == runs["native (materialized)"](page) for page in pages)
+    print(f"\nBoundaries identical: {identical}")
+    return 0 if identical else 1
+
+
+# ===== Redis cache keys =====
+
+def _probe_latency(client, stop, samples):
+    """Ping Redis continuously; the slowest ping shows how long the server was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.ping()
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+def _while_probing(client, fn):
+    """Run fn while probing; returns (result, duration ms, max ping ms)"""
+    import threading
+
+    stop, samples = threading.Event(), []
+    probe = threading.Thread(target=_probe_latency, args=(client, stop, samples))
+    probe.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    stop.set()
+    probe.join()
+    return result, elapsed, max(samples) if samples else 0.0
+
+
+def bench_cache_keys(args):
+    """KEYS-based vs indexed/SCAN-based stats and invalidation at scale"""
+    import redis
+    from backend.core.cache.redis_manager import RedisCacheManager
+
+    namespace = "mira:bench"
+    cache = RedisCacheManager(host=args.host, port=args.port, namespace=namespace)
+    if not cache.enabled:
+        print("Redis not available")
+        return 1
+    probe_client = redis.Redis(host=args.host, port=args.port)
+
+    def populate():
+        payload = '{"answer": "cached", "source_type": "general_knowledge", "sources": []}'
+        expiry = time.time() + cache.ttl.total_seconds()
+        for start in range(0, args.keys, 10000):
+            pipe = cache.redis_client.pipeline(transaction=False)
+            batch = {f"{namespace}:{i:064x}": expiry for i in range(start, min(start + 10000, args.keys))}
+            for key in batch:
+                pipe.set(key, payload, ex=cache.ttl)
+            pipe.zadd(cache.index_key, batch)
+            pipe.execute()
+
+    print(f"\nPopulating {args.keys} cached answers...")
+    populate()
+
+    print("\nStats (count cached answers):")
+    count, elapsed, blocked = _while_probing(probe_client, lambda: len(cache.redis_client.keys(f"{namespace}:*")))
+    print(f"  {'KEYS':<28} count={count:9d} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+    count, elapsed, blocked = _while_probing(probe_client, cache._count_cached_answers)
+    print(f"  {'index (ZCARD)':<28} count={count:9d} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+
+    print("\nInvalidate all:")
+    _, elapsed, blocked = _while_probing(probe_client, lambda: cache.invalidate_cache())
+    print(f"  {'generation bump':<28} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+    _, elapsed, blocked = _while_probing(probe_client, lambda: cache.invalidate_cache(purge=True))
+    print(f"  {'index + batched UNLINK':<28} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+
+    populate()
+    cache.redis_client.delete(cache.index_key)
+    _, elapsed, blocked = _while_probing(probe_client, lambda: cache.invalidate_cache(purge=True, scan=True))
+    print(f"  {'SCAN + batched UNLINK':<28} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+
+    populate()
+
+    def keys_and_delete():
+        keys = cache.redis_client.keys(f"{namespace}:*")
+        return cache.redis_client.delete(*keys) if keys else 0
+
+    _, elapsed, blocked = _while_probing(probe_client, keys_and_delete)
+    print(f"  {'KEYS + DEL (old)':<28} time={elapsed:9.1f}ms max_ping={blocked:8.1f}ms")
+    return 0
+
+
+# ===== Cache serialization =====
+
+def _sample_response(index: int, source_count: int):
+    """Knowledge-base response shaped like _answer_from_knowledge_base output"""
+    import random
+
+    random.seed(index)
+    words = "data warehouse fact dimension schema project risk scope quality cost time model".split()
+    text = lambda n: " ".join(random.choice(words) for _ in range(n))
+    return {
+        "answer": text(150),
+        "source_type": "knowledge_base",
+        "sources": [
+            {
+                "title": f"Source: lecture_{index % 12}.pdf",
+                "page": f"Page {index % 40 + 1}",
+                "content": text(50)[:300] + "...",
+                "relevance_score": f"{random.random():.2%}",
+                "extraction_method": "TEXT"
+            }
+            for _ in range(source_count)
+        ]
+    }
+
+
+def bench_serialization(args):
+    """Bytes per entry and encode/decode time: legacy JSON vs binary codecs"""
+    import json
+    from backend.core.cache.serialization import (
+        AnswerCodec, MSGPACK_AVAILABLE, ORJSON_AVAILABLE, ZSTD_AVAILABLE
+    )
+
+    responses = [_sample_response(i, args.sources) for i in range(args.entries)]
+
+    codecs = {"json (current)": None}
+    if ORJSON_AVAILABLE:
+        codecs["orjson"] = AnswerCodec("orjson")
+    if MSGPACK_AVAILABLE:
+        codecs["msgpack"] = AnswerCodec("msgpack")
+    if ZSTD_AVAILABLE:
+        for fmt in ("orjson", "msgpack"):
+            if fmt in codecs:
+                codecs[f"{fmt}+zstd"] = AnswerCodec(fmt, compression="zstd", compress_min_bytes=0)
+
+    print(f"\nEncoding {len(responses)} responses ({args.sources} sources each):")
+    for name, codec in codecs.items():
+        if codec is None:
+            # What cache_answer did before: JSON text, decoded by redis-py
+            encode = lambda response: json.dumps(response)
+            decode = json.loads
+        else:
+            encode, decode = codec.encode, codec.decode
+
+        encoded = [encode(response) for response in responses]
+        assert [decode(data) for data in encoded] == responses
+
+        size = statistics.mean(len(data.encode() if isinstance(data, str) else data) for data in encoded)
+        encode_ms = _timeit(lambda: [encode(response) for response in responses], args.repeat)
+        decode_ms = _timeit(lambda: [decode(data) for data in encoded], args.repeat)
+        print(
+            f"  {name:<28} bytes/entry={size:8.0f} "
+            f"encode={statistics.median(encode_ms) * 1000 / len(responses):7.2f}us "
+            f"decode={statistics.median(decode_ms) * 1000 / len(responses):7.2f}us"
+        )
+    return 0
+
+
+# ===== Load test =====
+
+def bench_load(args):
+    """Throughput of a running API worker as the number of in-flight requests grows"""
+    import itertools
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    run_id = int(time.time())
+    counter = itertools.count()
+
+    def question():
+        index = next(counter)
+        text = SAMPLE_QUERIES[index % len(SAMPLE_QUERIES)]
+        # Unique questions miss the answer cache and exercise the full path
+        return text if args.cached else f"{text} (load {run_id}-{index})"
+
+    def send(session):
+        start = time.perf_counter()
+        response = session.post(args.url, json={"message": question()}, timeout=args.timeout)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    print(f"\nPOST {args.url} ({args.requests} requests per level, {'cached' if args.cached else 'unique'} questions):")
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        sessions = [requests.Session() for _ in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(send, sessions[i % concurrency]) for i in range(args.requests)]
+            timings, errors = [], 0
+            for future in futures:
+                try:
+                    timings.append(future.result())
+                except Exception:
+                    errors += 1
+        elapsed = time.perf_counter() - start
+
+        if not timings:
+            print(f"  in_flight={concurrency:<4} all {errors} requests failed")
+            continue
+        print(
+            f"  in_flight={concurrency:<4} p50={_percentile(timings, 50):8.1f}ms "
+            f"p95={_percentile(timings, 95):8.1f}ms "
+            f"throughput={len(timings) / elapsed:8.1f} req/s errors={errors}"
+        )
+    return 0
+
+
+# ===== LLM routing =====
+
+def bench_routing(args):
+    """Single provider vs failover vs hedging, on simulated providers (offline)"""
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.core.llm.mock import MockChatModel
+    from backend.core.llm.router import RoutingChatModel
+
+    def providers():
+        # Primary: faster median, heavy tail, some failures; secondary: slower but steady
+        return {
+            "primary": MockChatModel(
+                latency_ms=args.latency_ms, latency_sigma=args.sigma,
+                failure_rate=args.failure_rate, seed=1
+            ),
+            "secondary": MockChatModel(latency_ms=args.latency_ms * 1.3, latency_sigma=args.sigma / 3, seed=2)
+        }
+
+    setups = {
+        "primary only": lambda: providers()["primary"],
+        "failover": lambda: RoutingChatModel(providers=providers()),
+        "failover + hedge": lambda: RoutingChatModel(
+            providers=providers(), hedge=True, hedge_percentile=args.hedge_percentile
+        )
+    }
+
+    print(
+        f"\n{args.requests} calls, {args.concurrency} in flight "
+        f"(primary median {args.latency_ms:.0f}ms, sigma {args.sigma}, {args.failure_rate:.0%} failures):"
+    )
+    for name, build in setups.items():
+        llm = build()
+
+        def call():
+            start = time.perf_counter()
+            llm.invoke("What is a data warehouse?")
+            return (time.perf_counter() - start) * 1000
+
+        timings, errors = [], 0
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for future in [executor.submit(call) for _ in range(args.requests)]:
+                try:
+                    timings.append(future.result())
+                except Exception:
+                    errors += 1
+
+        hedges = f" hedges={llm.get_stats()['hedges']}" if isinstance(llm, RoutingChatModel) else ""
+        print(
+            f"  {name:<28} p50={_percentile(timings, 50):8.1f}ms "
+            f"p95={_percentile(timings, 95):8.1f}ms p99={_percentile(timings, 99):8.1f}ms "
+            f"errors={errors}{hedges}"
+        )
+    return 0
+
+
+# ===== LLM clients =====
+
+def bench_llm_clients(args):
+    """New LLM client per call vs the shared registry client"""
+    from assistant import LLMFactory
+    from config import Config
+
+    provider = args.provider or Config.LLM_PROVIDER
+    temperature = 0.1
+
+    print(f"\nClient construction ({provider}, {args.repeat} calls):")
+    build = _timeit(lambda: LLMFactory._build(provider, temperature), args.repeat)
+    LLMFactory.create(provider, temperature)  # first call builds the shared client
+    shared = _timeit(lambda: LLMFactory.create(provider, temperature), args.repeat)
+    _report("new client per call", build)
+    _report("registry (shared)", shared)
+
+    if args.invoke:
+        # Needs the provider's API key; a fresh client also opens a new TLS connection
+        print(f"\nCall latency ({args.invoke} sequential calls):")
+        question = SAMPLE_QUERIES[0]
+        fresh = _timeit(lambda: LLMFactory._build(provider, temperature).invoke(question), args.invoke)
+        llm = LLMFactory.create(provider, temperature)
+        llm.invoke(question)  # warm the connection pool
+        reused = _timeit(lambda: llm.invoke(question), args.invoke)
+        _report("new client per call", fresh)
+        _report("registry (keep-alive)", reused)
+        print(f"  saved per call: {statistics.median(fresh) - statistics.median(reused):.1f}ms (p50)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mira performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    embeddings = subparsers.add_parser("embeddings", help="PyTorch vs ONNX Runtime embeddings")
+    embeddings.add_argument("--repeat", type=int, default=50)
+    embeddings.add_argument("--batch", type=int, default=64)
+    embeddings.add_argument("--fp32-tolerance", type=float, default=None, help="Default: FP32_TOLERANCE")
+    embeddings.add_argument("--int8-tolerance", type=float, default=None, help="Default: INT8_TOLERANCE")
+    embeddings.set_defaults(func=bench_embeddings)
+
+    chunking = subparsers.add_parser("chunking", help="Native splitter vs RecursiveCharacterTextSplitter")
+    chunking.add_argument("--pdf-dir", default=None, help="Chunk real PDFs instead of synthetic pages")
+    chunking.add_argument("--pages", type=int, default=2000)
+    chunking.add_argument("--chunk-size", type=int, default=1000)
+    chunking.add_argument("--chunk-overlap", type=int, default=200)
+    chunking.set_defaults(func=bench_chunking)
+
+    cache_keys = subparsers.add_parser("cache-keys", help="KEYS vs index/SCAN stats and invalidation")
+    cache_keys.add_argument("--host", default="127.0.0.1")
+    cache_keys.add_argument("--port", type=int, default=6379)
+    cache_keys.add_argument("--keys", type=int, default=1_000_000)
+    cache_keys.set_defaults(func=bench_cache_keys)
+
+    serialization = subparsers.add_parser("serialization", help="Cached answer encodings: size and speed")
+    serialization.add_argument("--entries", type=int, default=2000)
+    serialization.add_argument("--sources", type=int, default=3)
+    serialization.add_argument("--repeat", type=int, default=20)
+    serialization.set_defaults(func=bench_serialization)
+
+    load = subparsers.add_parser("load", help="Concurrent /api/chat requests (LLM_PROVIDER=mock for offline runs)")
+    load.add_argument("--url", default="http://127.0.0.1:8000/api/chat")
+    load.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated in-flight levels")
+    load.add_argument("--requests", type=int, default=200, help="Requests per level")
+    load.add_argument("--timeout", type=float, default=120)
+    load.add_argument("--cached", action="store_true", help="Repeat sample questions (cache hits)")
+    load.set_defaults(func=bench_load)
+
+    routing = subparsers.add_parser("routing", help="LLM failover and hedging on simulated providers")
+    routing.add_argument("--requests", type=int, default=400)
+    routing.add_argument("--concurrency", type=int, default=16)
+    routing.add_argument("--latency-ms", type=float, default=200)
+    routing.add_argument("--sigma", type=float, default=0.8, help="Lognormal latency spread of the primary")
+    routing.add_argument("--failure-rate", type=float, default=0.05)
+    routing.add_argument("--hedge-percentile", type=float, default=90)
+    routing.set_defaults(func=bench_routing)
+
+    llm_clients = subparsers.add_parser("llm-clients", help="LLM client per call vs shared registry client")
+    llm_clients.add_argument("--provider", default=None, help="Defaults to LLM_PROVIDER")
+    llm_clients.add_argument("--repeat", type=int, default=50)
+    llm_clients.add_argument("--invoke", type=int, default=0, help="Also time this many real calls (API key needed)")
+    llm_clients.set_defaults(func=bench_llm_clients)
+    
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Shared fixtures: an in-process Redis server (fakeredis) for cache tests"""
+
+import threading
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def redis_server():
+    """(host, port) of a fakeredis server speaking the Redis protocol over TCP"""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    """Client on the shared server, emptied before each test"""
+    import redis
+
+    host, port = redis_server
+    client = redis.Redis(host=host, port=port)
+    client.flushall()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def make_cache(redis_server, redis_client):
+    """Factory for RedisCacheManagers on the fakeredis server, closed after the test"""
+    from backend.core.cache import RedisCacheManager
+
+    host, port = redis_server
+    managers = []
+
+    def make(**kwargs):
+        manager = RedisCacheManager(host=host, port=port, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def make_assistant(redis_server, redis_client, tmp_path, monkeypatch):
+    """
+    Factory for HybridAssistants on a MockChatModel, caching on the fakeredis
+    server; retrieval returns the given documents (none: general answers)
+    """
+    for module in ("langchain_cohere", "langchain_groq", "langchain_openai", "langchain_community"):
+        pytest.importorskip(module)
+    from langchain_core.output_parsers import StrOutputParser
+
+    import assistant as assistant_module
+    from config import Config
+    from vector_store import VectorStoreManager
+    from backend.core.llm.mock import MockChatModel
+
+    host, port = redis_server
+    monkeypatch.setattr(Config, "REDIS_HOST", host)
+    monkeypatch.setattr(Config, "REDIS_PORT", port)
+    monkeypatch.setattr(Config, "CACHE_FALLBACK_PATH", str(tmp_path / "fallback.sqlite3"))
+    # No embedding model download: retrieval is replaced below
+    monkeypatch.setattr(VectorStoreManager, "_create_embeddings", lambda self: None)
+    assistants = []
+
+    def make(documents=(), llm=None, **config):
+        for name, value in config.items():
+            monkeypatch.setattr(Config, name, value)
+        assistant = assistant_module.HybridAssistant(llm_provider="mock")
+        assistants.append(assistant)
+        assistant.llm = llm or MockChatModel()
+        assistant._setup_chains()
+        if documents:
+            assistant.rag_chain = assistant.rag_prompt | assistant.llm | StrOutputParser()
+        assistant._retrieve = lambda question: (list(documents), [0.9] * len(documents))
+        assistant.is_initialized = True
+        return assistant
+
+    yield make
+    for assistant in assistants:
+        assistant.close()
@@ -0,0 +1,100 @@
+"""Assistant request path: coalescing across sessions and workers, and chat history"""
+
+import asyncio
+import threading
+
+import pytest
+
+for module in ("langchain_cohere", "langchain_groq", "langchain_openai", "langchain_community"):
+    pytest.importorskip(module)
+
+from backend.core.cache import AsyncRedisSingleFlight
+from backend.core.llm.mock import MockChatModel
+
+
+def test_aask_coalesces_across_workers_with_redis_single_flight(make_assistant):
+    workers = [
+        make_assistant(llm=MockChatModel(response="Answer", latency_ms=200), SINGLE_FLIGHT="redis")
+        for _ in range(2)
+    ]
+    assert isinstance(workers[0].async_single_flight, AsyncRedisSingleFlight)
+    for worker in workers:
+        worker.async_single_flight.poll_interval = 0.02
+
+    async def main():
+        leader = asyncio.ensure_future(workers[0].aask("What is new?", None))
+        await asyncio.sleep(0.05)
+        results = [await workers[1].aask("What is new?", None), await leader]
+        for worker in workers:
+            await worker.async_cache_manager.close()
+        return results
+
+    results = asyncio.run(main())
+
+    assert [result["answer"] for result in results] == ["Answer", "Answer"]
+    assert workers[1].async_single_flight.get_stats()["remote_waits"] == 1
+
+
+def test_coalesced_sessions_all_record_the_exchange(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(response="Answer", latency_ms=200))
+    results = {}
+
+    def ask(session_id):
+        results[session_id] = assistant.ask("What is new?", session_id)
+
+    threads = [threading.Thread(target=ask, args=(session_id,)) for session_id in ("s1", "s2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert assistant.single_flight.get_stats()["coalesced"] == 1
+    for session_id in ("s1", "s2"):
+        assert results[session_id]["answer"] == "Answer"
+        history = assistant._format_chat_history(session_id)
+        assert "What is new?" in history and "Answer" in history
+
+
+def test_coalesced_async_sessions_all_record_the_exchange(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(response="Answer", latency_ms=200))
+
+    async def main():
+        results = await asyncio.gather(assistant.aask("What is new?", "s1"), assistant.aask("What is new?", "s2"))
+        await assistant.async_cache_manager.close()
+        return results
+
+    results = asyncio.run(main())
+
+    assert assistant.async_single_flight.get_stats()["coalesced"] == 1
+    assert [result["answer"] for result in results] == ["Answer", "Answer"]
+    for session_id in ("s1", "s2"):
+        history = assistant._format_chat_history(session_id)
+        assert "What is new?" in history and "Answer" in history
+
+
+def test_error_answers_are_not_recorded(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(failure_rate=1.0))
+
+    assert assistant.ask("What is new?", "s1")["source_type"] == "error"
+
+    assert "What is new?" not in assistant._format_chat_history("s1")
+
+
+def test_aask_claims_stale_refreshes_off_the_event_loop(make_assistant):
+    assistant = make_assistant(CACHE_STALE_TTL_HOURS=1)
+    threads = []
+    submit = assistant.revalidator.submit
+    assistant.revalidator.submit = lambda *args: threads.append(threading.current_thread()) or submit(*args)
+
+    async def stale_hit(question, semantic=True):
+        return {"answer": "Old answer", "source_type": "general_knowledge", "sources": [], "stale": True}
+
+    assistant.async_cache_manager.get_cached_answer = stale_hit
+
+    async def main():
+        response = await assistant.aask("What is new?", None)
+        await assistant.async_cache_manager.close()
+        return response
+
+    assert asyncio.run(main())["answer"] == "Old answer"
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
@@ -0,0 +1,76 @@
+"""Token-sized chunks fit the embedding model's input window"""
+
+import random
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from langchain_core.documents import Document
+
+from config import Config
+from ocr_processor import TextChunker
+from backend.core.document_processing.text_chunker import TextChunker as BackendTextChunker
+from backend.core.document_processing.tokenization import (
+    TokenLengthFunction, enforce_token_limit, get_tokenizer, token_chunk_size
+)
+
+VOCABULARY = [
+    "warehouse", "fact", "dimension", "OLTP/OLAP", "schema-on-read", "ETL", "3.14159",
+    "naïve", "(SCD-2)", "e-mail:", "données", "数据仓库", "antidisestablishmentarianism"
+]
+
+
+def _pages(count: int = 10):
+    """PDF-like pages mixing words, punctuation, numbers and glued runs"""
+    rng = random.Random(0)
+    pages = []
+    for page in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(800)]
+        text = "".join(word + rng.choice([" ", " ", " ", "", "\n", "\n\n", ". ", ", "]) for word in words)
+        pages.append(Document(page_content=text, metadata={"source": "sample.pdf", "page": page}))
+    return pages
+
+
+@pytest.mark.parametrize("splitter", ["native", "langchain"])
+@pytest.mark.parametrize("chunker_class", [TextChunker, BackendTextChunker])
+def test_every_chunk_fits_the_model_window(chunker_class, splitter):
+    if chunker_class is TextChunker:
+        chunker = TextChunker(
+            token_chunk_size(Config.EMBEDDING_MODEL, Config.EMBEDDING_MAX_TOKENS),
+            Config.CHUNK_TOKEN_OVERLAP,
+            length_unit="tokens",
+            model_name=Config.EMBEDDING_MODEL,
+            splitter=splitter
+        )
+    else:
+        chunker = BackendTextChunker(length_unit="tokens", splitter=splitter)
+    tokenizer = get_tokenizer(Config.EMBEDDING_MODEL)
+
+    chunks = chunker.chunk_documents(_pages())
+
+    assert chunks
+    for chunk in chunks:
+        # Full model input, special tokens included
+        assert len(tokenizer(chunk.page_content)["input_ids"]) <= Config.EMBEDDING_MAX_TOKENS
+
+
+def test_oversized_chunk_is_cut_into_windows():
+    count = TokenLengthFunction(Config.EMBEDDING_MODEL)
+    text = " ".join(["antidisestablishmentarianism"] * 200) + " " + "x" * 500
+    chunk = Document(page_content=text, metadata={"source": "sample.pdf", "start_index": 100})
+
+    fitted = enforce_token_limit([chunk], count, 50)
+
+    assert len(fitted) > 1
+    for piece in fitted:
+        assert count(piece.page_content) <= 50
+        offset = piece.metadata["start_index"] - 100
+        assert text[offset:offset + len(piece.page_content)] == piece.page_content
+    assert "".join(piece.page_content for piece in fitted).replace(" ", "") == text.replace(" ", "")
+
+
+def test_chunks_within_the_limit_are_kept():
+    count = TokenLengthFunction(Config.EMBEDDING_MODEL)
+    chunk = Document(page_content="A short chunk.", metadata={"start_index": 0})
+    assert enforce_token_limit([chunk], count, 50) == [chunk]
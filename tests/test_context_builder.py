@@ -0,0 +1,100 @@
+"""RAG context packing: overlap between neighbouring chunks is sent once"""
+
+import random
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+
+from backend.core.document_processing.context_builder import ContextBuilder
+
+PAGE = (
+    "Employees accrue vacation monthly. "
+    "Unused days carry over for one year. "
+    "Requests go to the line manager. "
+    "Approval takes up to five days. "
+    "Sick leave is tracked separately."
+)
+
+
+def _chunk(start: int, end: int, page: int = 1) -> Document:
+    return Document(page_content=PAGE[start:end], metadata={"filename": "policy.pdf", "page": page, "start_index": start})
+
+
+def _strip(document: Document, *packed: Document) -> str:
+    return ContextBuilder()._strip_overlap(document, list(packed))
+
+
+def test_drops_the_head_shared_with_an_earlier_neighbour():
+    neighbour, chunk = _chunk(0, 70), _chunk(35, 140)
+
+    assert _strip(chunk, neighbour) == PAGE[70:140].strip()
+
+
+def test_drops_the_tail_shared_with_a_later_neighbour():
+    chunk, neighbour = _chunk(0, 100), _chunk(70, 140)
+
+    assert _strip(chunk, neighbour) == PAGE[0:70].strip()
+
+
+def test_keeps_both_sides_of_a_contained_neighbour():
+    chunk, neighbour = _chunk(0, len(PAGE)), _chunk(35, 105)
+
+    assert _strip(chunk, neighbour) == f"{PAGE[0:35].strip()} {PAGE[105:].strip()}"
+
+
+def test_chunk_inside_a_neighbour_is_dropped():
+    chunk, neighbour = _chunk(35, 105), _chunk(0, len(PAGE))
+
+    assert _strip(chunk, neighbour) == ""
+
+
+def test_neighbours_on_both_sides():
+    chunk = _chunk(20, 120)
+
+    assert _strip(chunk, _chunk(0, 50), _chunk(90, 160)) == PAGE[50:90].strip()
+
+
+def test_chunks_of_other_pages_are_compared_by_text():
+    neighbour = Document(page_content=PAGE[0:70], metadata={"filename": "policy.pdf", "page": 2})
+    chunk = Document(page_content=PAGE[35:140], metadata={"filename": "policy.pdf", "page": 1})
+
+    assert _strip(chunk, neighbour) == PAGE[70:140].strip()
+
+
+def test_build_sends_shared_text_once():
+    builder = ContextBuilder(max_tokens=1000)
+    first, second = _chunk(0, 105), _chunk(70, len(PAGE))
+
+    context = builder.build("vacation approval", [first, second], [0.9, 0.8])
+
+    assert context == f"{PAGE[0:105].strip()}\n\n{PAGE[105:].strip()}"
+    assert builder.get_stats()["overlap_chars_removed"] == 35
+
+
+def test_uncapped_text_match_strips_long_overlaps():
+    words = random.Random(0).choices(PAGE.split(), k=120)
+    long_page = " ".join(f"{word}{i}" for i, word in enumerate(words))  # No repeated runs
+    neighbour = Document(page_content=long_page[0:400], metadata={"filename": "policy.pdf", "page": 2})
+    chunk = Document(page_content=long_page[60:500], metadata={"filename": "policy.pdf", "page": 1})
+
+    # 340 shared characters: more than a 200-character cap looks for
+    assert ContextBuilder(max_overlap_chars=200)._strip_overlap(chunk, [neighbour]) == long_page[60:500]
+    assert ContextBuilder(max_overlap_chars=None)._strip_overlap(chunk, [neighbour]) == long_page[400:500].strip()
+
+
+@pytest.mark.parametrize("unit,configured,expected", [
+    ("chars", None, 200),
+    ("tokens", None, None),
+    ("tokens", 600, 600),
+])
+def test_overlap_cap_follows_the_splitter(monkeypatch, unit, configured, expected):
+    from backend.config import Settings
+
+    monkeypatch.setattr(Settings, "CHUNK_OVERLAP", 200)
+    monkeypatch.setattr(Settings, "CHUNK_LENGTH_UNIT", unit)
+    monkeypatch.setattr(Settings, "CONTEXT_MAX_OVERLAP_CHARS", configured)
+
+    assert Settings.context_max_overlap_chars() == expected
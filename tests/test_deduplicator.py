@@ -0,0 +1,135 @@
+"""Chunk deduplication and duplicate occurrences kept in the vector store"""
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+
+from backend.core.document_processing.deduplicator import ChunkDeduplicator
+from backend.core.vector_store.chunk_ids import make_chunk_id
+from backend.core.vector_store.occurrences import (
+    forget_occurrences, iter_chunks, record_occurrences, release_chunks
+)
+
+BOILERPLATE = (
+    "This document is confidential and intended solely for the use of the individual or entity to whom "
+    "it is addressed. If you have received it in error please notify the sender immediately and delete it "
+    "from your system. Any review, retransmission, dissemination or other use of this information by "
+    "persons other than the intended recipient is prohibited and may be unlawful."
+)
+
+
+def chunk(text: str, filename: str, page: int, start_index: int = 0) -> Document:
+    return Document(
+        page_content=text,
+        metadata={"source": f"kb/{filename}", "filename": filename, "page": page, "start_index": start_index}
+    )
+
+
+def test_exact_and_near_duplicates_are_dropped():
+    dedup = ChunkDeduplicator()
+    kept = chunk(BOILERPLATE, "a.pdf", 1)
+    chunks = [
+        kept,
+        chunk(BOILERPLATE.upper(), "b.pdf", 4),  # same after normalization
+        chunk(BOILERPLATE.replace("unlawful", "illegal"), "c.pdf", 2),  # near duplicate
+        chunk("A fact table stores the measurements of a business process.", "a.pdf", 2)
+    ]
+
+    unique, occurrences = dedup.deduplicate(chunks)
+
+    assert [c.page_content for c in unique] == [BOILERPLATE, chunks[3].page_content]
+    assert occurrences == {make_chunk_id(kept): ["b.pdf:4", "c.pdf:2"]}
+    assert kept.metadata["content_hash"] and kept.metadata["simhash"]
+    stats = dedup.get_stats()
+    assert (stats["exact_duplicates"], stats["near_duplicates"]) == (1, 1)
+
+
+def test_memory_is_bounded():
+    dedup = ChunkDeduplicator(max_entries=10)
+    dedup.deduplicate([chunk(f"chunk number {i} " * 10, "a.pdf", i) for i in range(50)])
+    assert dedup.get_stats()["remembered"] == 10
+    assert len(dedup._exact) == 10
+
+
+def test_state_is_rebuilt_from_stored_chunks():
+    first = ChunkDeduplicator()
+    kept = chunk(BOILERPLATE, "a.pdf", 1)
+    first.deduplicate([kept, chunk("Short text.", "a.pdf", 2)])
+    stored = [(make_chunk_id(kept), kept.page_content, kept.metadata)]
+    # Chunks stored before hashes were kept in metadata are hashed again
+    legacy = chunk("Short text.", "a.pdf", 2)
+    stored.append((make_chunk_id(legacy), legacy.page_content, legacy.metadata))
+
+    restarted = ChunkDeduplicator()
+    assert restarted.load(stored) == 2
+    unique, occurrences = restarted.deduplicate([chunk(BOILERPLATE, "b.pdf", 7), chunk("short  text.", "b.pdf", 8)])
+
+    assert unique == []
+    assert occurrences == {stored[0][0]: ["b.pdf:7"], stored[1][0]: ["b.pdf:8"]}
+
+
+def test_forget_source_allows_reingesting_a_file():
+    dedup = ChunkDeduplicator()
+    dedup.deduplicate([chunk(BOILERPLATE, "a.pdf", 1)])
+    dedup.forget_source("a.pdf")
+    unique, _ = dedup.deduplicate([chunk(BOILERPLATE, "a.pdf", 1)])
+    assert len(unique) == 1
+
+
+@pytest.fixture
+def collection():
+    chromadb = pytest.importorskip("chromadb")
+    client = chromadb.EphemeralClient()
+    yield client.get_or_create_collection("dedup-test")
+    client.delete_collection("dedup-test")
+
+
+def _store(collection, documents):
+    collection.add(
+        ids=[make_chunk_id(d) for d in documents],
+        documents=[d.page_content for d in documents],
+        metadatas=[d.metadata for d in documents],
+        embeddings=[[float(i), 1.0, 0.0] for i in range(len(documents))]
+    )
+
+
+def test_occurrences_are_persisted_and_shared_chunks_survive_delete(collection):
+    dedup = ChunkDeduplicator()
+    own = chunk("Only in a.pdf, about dimensional modeling and star schemas.", "a.pdf", 2)
+    unique, occurrences = dedup.deduplicate([chunk(BOILERPLATE, "a.pdf", 1), own])
+    _store(collection, unique)
+    record_occurrences(collection, occurrences)
+
+    _, occurrences = dedup.deduplicate([chunk(BOILERPLATE, "b.pdf", 3)])
+    record_occurrences(collection, occurrences)
+    shared_id = make_chunk_id(unique[0])
+    metadata = collection.get(ids=[shared_id])["metadatas"][0]
+    assert metadata["occurrences"] == "a.pdf:1; b.pdf:3"
+    assert metadata["occurrence_count"] == 2
+
+    # Deleting a.pdf keeps the boilerplate for b.pdf, with its embedding
+    a_ids = collection.get(where={"filename": "a.pdf"})["ids"]
+    moved = release_chunks(collection, a_ids, "a.pdf")
+
+    assert len(moved) == 1
+    new_id, text, metadata = moved[0]
+    assert text == BOILERPLATE
+    assert (metadata["filename"], metadata["page"], metadata["source"]) == ("b.pdf", 3, "kb/b.pdf")
+    assert "occurrences" not in metadata and "start_index" not in metadata
+    stored = collection.get(include=["metadatas", "embeddings"])
+    assert stored["ids"] == [new_id]
+    assert list(stored["embeddings"][0]) == [0.0, 1.0, 0.0]
+    assert [record[0] for record in iter_chunks(collection)] == [new_id]
+
+
+def test_forget_occurrences_strips_a_file(collection):
+    kept = chunk(BOILERPLATE, "a.pdf", 1)
+    _store(collection, [kept])
+    record_occurrences(collection, {make_chunk_id(kept): ["b.pdf:3", "c.pdf:1"]})
+
+    assert forget_occurrences(collection, "b.pdf") == 1
+    metadata = collection.get(ids=[make_chunk_id(kept)])["metadatas"][0]
+    assert metadata["occurrences"] == "a.pdf:1; c.pdf:1"
+    assert metadata["occurrence_count"] == 2
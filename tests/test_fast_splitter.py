@@ -0,0 +1,90 @@
+"""Offset splitter: same chunks as LangChain's RecursiveCharacterTextSplitter"""
+
+import random
+
+import pytest
+
+for module in ("langchain_text_splitters", "langchain_community"):
+    pytest.importorskip(module)
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from backend.core.document_processing.fast_splitter import DEFAULT_SEPARATORS, FastRecursiveSplitter
+
+VOCABULARY = [
+    "warehouse", "fact", "dimension", "OLTP/OLAP", "schema-on-read", "ETL", "3.14159",
+    "naïve", "(SCD-2)", "e-mail:", "données", "数据仓库", "antidisestablishmentarianism"
+]
+GLUE = [" ", " ", " ", "", "\n", "\n\n", ". ", ", ", "! ", "? ", " | ", "\t"]
+
+
+def _text(seed: int, words: int = 1500) -> str:
+    """PDF-like page mixing words, punctuation, numbers, glued runs and blank lines"""
+    rng = random.Random(seed)
+    return "".join(rng.choice(VOCABULARY) + rng.choice(GLUE) for _ in range(words))
+
+
+def _utf8_bytes(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def _assert_same_chunks(separators, chunk_size, chunk_overlap, length_function=None):
+    reference = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        length_function=length_function or len
+    )
+    native = FastRecursiveSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        length_function=length_function
+    )
+    for seed in range(3):
+        text = _text(seed)
+        assert native.split_text(text) == reference.split_text(text)
+
+
+@pytest.mark.parametrize("separators", [
+    DEFAULT_SEPARATORS,
+    ["\n\n", "\n", " ", ""],
+    [" | ", "\n", ""],
+    ["\t", ". "],  # No "" fallback: long pieces stay whole
+])
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(40, 0), (200, 50), (1000, 200), (300, 300)])
+def test_character_chunks_match_langchain(separators, chunk_size, chunk_overlap):
+    _assert_same_chunks(separators, chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("length_function,chunk_size,chunk_overlap", [
+    (_utf8_bytes, 300, 60),
+    (_utf8_bytes, 1200, 0),
+    (_words, 40, 10),
+    (_words, 150, 30),
+])
+@pytest.mark.parametrize("separators", [DEFAULT_SEPARATORS, ["\n\n", "\n", " ", ""]])
+def test_measured_chunks_match_langchain(separators, length_function, chunk_size, chunk_overlap):
+    _assert_same_chunks(separators, chunk_size, chunk_overlap, length_function)
+
+
+def test_start_index_matches_langchain():
+    text = _text(7)
+    reference = RecursiveCharacterTextSplitter(
+        chunk_size=300, chunk_overlap=60, separators=DEFAULT_SEPARATORS, add_start_index=True
+    )
+    native = FastRecursiveSplitter(
+        chunk_size=300, chunk_overlap=60, separators=DEFAULT_SEPARATORS, add_start_index=True
+    )
+    document = Document(page_content=text, metadata={"page": 1})
+
+    expected = reference.split_documents([document])
+    chunks = native.split_documents([document])
+
+    assert [chunk.page_content for chunk in chunks] == [chunk.page_content for chunk in expected]
+    assert [chunk.metadata for chunk in chunks] == [chunk.metadata for chunk in expected]
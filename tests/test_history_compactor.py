@@ -0,0 +1,97 @@
+"""Chat history compaction: older turns folded into a summary, clears win over running folds"""
+
+import threading
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from backend.core.memory import HistoryCompactor
+from backend.core.memory.history_compactor import NO_HISTORY
+from backend.core.memory.session_memory import SessionMemory
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def _blocking_llm(started: threading.Event, release: threading.Event) -> RunnableLambda:
+    """Summarizer that holds the fold until release is set"""
+    def summarize(prompt):
+        started.set()
+        release.wait(2)
+        return "User asked about vacation"
+    return RunnableLambda(summarize)
+
+
+def _compactor(llm=None) -> HistoryCompactor:
+    memory = SessionMemory()
+    memory.add_exchange("s1", "How many vacation days?", "Twenty-five. They accrue monthly.")
+    memory.add_exchange("s1", "Do they carry over?", "Yes, for one year.")
+    return HistoryCompactor(memory, keep_turns=1, llm=llm)
+
+
+def test_older_turns_are_folded_into_the_summary():
+    compactor = _compactor()
+
+    compactor.add_exchange("s1", "Who approves?", "The line manager.")
+    assert _wait_for(lambda: compactor.get_stats()["folds"] == 1)
+
+    history = compactor.format("s1")
+    assert history.startswith("Summary of earlier conversation: Human: How many vacation days?")
+    assert "Assistant: Twenty-five." in history and "They accrue monthly" not in history
+    assert history.endswith("Human: Who approves?\nAssistant: The line manager.")
+    compactor.shutdown()
+
+
+def test_clear_during_a_fold_drops_its_summary():
+    started, release = threading.Event(), threading.Event()
+    compactor = _compactor(llm=_blocking_llm(started, release))
+
+    compactor.add_exchange("s1", "Who approves?", "The line manager.")
+    assert started.wait(2)
+    compactor.clear("s1")
+    release.set()
+    assert _wait_for(lambda: compactor.get_stats()["folding"] == 0)
+
+    assert compactor.memory.get_summary("s1") == ""
+    assert compactor.format("s1") == NO_HISTORY
+    assert compactor.get_stats()["folds"] == 0
+    compactor.shutdown()
+
+
+def test_clearing_all_sessions_during_a_fold_drops_its_summary():
+    started, release = threading.Event(), threading.Event()
+    compactor = _compactor(llm=_blocking_llm(started, release))
+
+    compactor.add_exchange("s1", "Who approves?", "The line manager.")
+    assert started.wait(2)
+    compactor.clear()
+    compactor.add_exchange("s1", "Hello", "Hi, how can I help?")
+    release.set()
+    assert _wait_for(lambda: compactor.get_stats()["folding"] == 0)
+
+    assert compactor.format("s1") == "Human: Hello\nAssistant: Hi, how can I help?"
+    compactor.shutdown()
+
+
+def test_later_folds_of_a_cleared_session_write_again():
+    started, release = threading.Event(), threading.Event()
+    compactor = _compactor(llm=_blocking_llm(started, release))
+    compactor.add_exchange("s1", "Who approves?", "The line manager.")
+    assert started.wait(2)
+    compactor.clear("s1")
+    release.set()
+    assert _wait_for(lambda: compactor.get_stats()["folding"] == 0)
+
+    compactor.add_exchange("s1", "Hello", "Hi.")
+    assert _wait_for(lambda: compactor.get_stats()["folding"] == 0)
+    compactor.add_exchange("s1", "Vacation days?", "Twenty-five.")
+    assert _wait_for(lambda: compactor.get_stats()["folds"] == 1)
+
+    assert compactor.memory.get_summary("s1") == "User asked about vacation"
+    compactor.shutdown()
@@ -0,0 +1,165 @@
+"""LLM admission control: concurrency cap, FIFO queue, rate limits and load shedding"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+for module in ("langchain_cohere", "langchain_groq", "langchain_openai"):
+    pytest.importorskip(module)
+
+from backend.core.llm.limiter import LLMOverloadedError, ProviderLimiter
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def _queue_callers(limiter: ProviderLimiter, count: int, order: list) -> list:
+    """Start count threads that queue one after another, each recording its turn"""
+    def call(i):
+        with limiter.slot():
+            order.append(i)
+
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(target=call, args=(i,))
+        thread.start()
+        assert _wait_for(lambda: limiter.get_stats()["queue_depth"] == i + 1)
+        threads.append(thread)
+    return threads
+
+
+def test_waiters_are_served_in_arrival_order():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    limiter.acquire()
+    order = []
+    threads = _queue_callers(limiter, 5, order)
+
+    limiter.release()
+    for thread in threads:
+        thread.join(2)
+
+    assert order == [0, 1, 2, 3, 4]
+    stats = limiter.get_stats()
+    assert (stats["in_flight"], stats["queued"], stats["max_queue_depth"]) == (0, 5, 5)
+
+
+def test_new_calls_do_not_overtake_the_queue():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    limiter.acquire()
+    order = []
+    threads = _queue_callers(limiter, 1, order)
+
+    # A slot frees up, but the queued call gets it, not a newcomer
+    limiter.release()
+    with limiter.slot():
+        order.append("newcomer")
+    threads[0].join(2)
+
+    assert order == [0, "newcomer"]
+
+
+def test_full_queue_rejects_immediately():
+    limiter = ProviderLimiter("test", max_concurrency=1, max_queue=2)
+    limiter.acquire()
+    threads = _queue_callers(limiter, 2, [])
+
+    started = time.monotonic()
+    with pytest.raises(LLMOverloadedError, match="overloaded"):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.5
+
+    limiter.release()
+    for thread in threads:
+        thread.join(2)
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_waiting_too_long_is_shed_and_leaves_the_queue():
+    limiter = ProviderLimiter("test", max_concurrency=1, max_wait_seconds=0.1)
+    limiter.acquire()
+
+    with pytest.raises(LLMOverloadedError, match="waiting"):
+        limiter.acquire()
+
+    stats = limiter.get_stats()
+    assert (stats["timeouts"], stats["queue_depth"]) == (1, 0)
+    limiter.release()
+    limiter.acquire()  # Nothing left queued ahead of it
+
+
+def test_token_bucket_spaces_out_calls():
+    limiter = ProviderLimiter("test", requests_per_second=20, burst=1)
+
+    started = time.monotonic()
+    for _ in range(3):
+        with limiter.slot():
+            pass
+
+    assert time.monotonic() - started >= 2 / 20 * 0.9
+
+
+def test_requests_per_minute_sheds_once_the_minute_is_used_up():
+    limiter = ProviderLimiter("test", requests_per_minute=2, max_wait_seconds=0.05)
+    for _ in range(2):
+        with limiter.slot():
+            pass
+
+    with pytest.raises(LLMOverloadedError):
+        limiter.acquire()
+
+
+def test_async_waiters_are_served_in_arrival_order():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    order = []
+
+    async def call(i):
+        async with limiter.aslot():
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await limiter.aacquire()
+        tasks = []
+        for i in range(5):
+            tasks.append(asyncio.ensure_future(call(i)))
+            await asyncio.sleep(0.01)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    order = []
+
+    async def call(i):
+        async with limiter.aslot():
+            order.append(i)
+
+    async def main():
+        await limiter.aacquire()
+        first = asyncio.ensure_future(call(0))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(call(1))
+        await asyncio.sleep(0.01)
+        first.cancel()  # Client disconnected while queued
+        await asyncio.sleep(0.01)
+        assert limiter.get_stats()["queue_depth"] == 1
+        limiter.release()
+        await second
+
+    asyncio.run(main())
+
+    assert order == [1]
+    assert limiter.get_stats()["in_flight"] == 0
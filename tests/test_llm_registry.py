@@ -0,0 +1,123 @@
+"""Shared LLM clients: one per key, reused across callers, distinct per configuration"""
+
+import threading
+import time
+
+import pytest
+
+for module in ("langchain_cohere", "langchain_groq", "langchain_openai", "langchain_community"):
+    pytest.importorskip(module)
+
+from backend.core.llm.registry import LLMRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fresh registry behind both LLM factories"""
+    import assistant
+    from backend.core.llm import factory
+
+    registry = LLMRegistry()
+    monkeypatch.setattr(assistant, "llm_registry", registry)
+    monkeypatch.setattr(factory, "llm_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def two_providers(monkeypatch):
+    """mock as primary with cohere as fallback, for both factories"""
+    from config import Config
+    from backend.config import settings
+
+    for config in (Config, settings):
+        monkeypatch.setattr(config, "LLM_FALLBACK_PROVIDERS", ["cohere"])
+        monkeypatch.setattr(config, "COHERE_API_KEY", "test-key")
+
+
+def test_builds_once_per_key():
+    registry = LLMRegistry()
+    builds = []
+
+    first = registry.get(("mock", 0.1), lambda: builds.append(1) or object())
+    again = registry.get(("mock", 0.1), lambda: builds.append(1) or object())
+    other = registry.get(("mock", 0.7), lambda: builds.append(1) or object())
+
+    assert first is again and first is not other
+    assert len(builds) == 2
+    stats = registry.get_stats()
+    assert (stats["clients"], stats["hits"], stats["misses"]) == (2, 1, 2)
+    assert stats["keys"] == ["mock / 0.1", "mock / 0.7"]
+
+
+def test_concurrent_first_calls_share_one_client():
+    registry = LLMRegistry()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(registry.get("key", build))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_builders_may_fetch_other_clients():
+    registry = LLMRegistry()
+
+    routed = registry.get("routed", lambda: [registry.get("a", object), registry.get("b", object)])
+
+    assert routed == [registry.get("a", object), registry.get("b", object)]
+
+
+def test_clear_rebuilds_clients():
+    registry = LLMRegistry()
+    first = registry.get("key", object)
+
+    registry.clear()
+
+    assert registry.get("key", object) is not first
+
+
+def test_factory_reuses_clients_per_provider_and_temperature(registry):
+    from assistant import LLMFactory
+
+    assert LLMFactory.create("mock", 0.1) is LLMFactory.create("mock", 0.1)
+    assert LLMFactory.create("mock", 0.1) is not LLMFactory.create("mock", 0.7)
+    assert registry.get_stats()["clients"] == 2
+
+
+def test_clients_built_with_different_settings_are_kept_apart(registry, two_providers):
+    from assistant import LLMFactory
+    from backend.core.llm.factory import LLMFactory as BackendLLMFactory
+
+    # The CLI/API factory caps max_tokens, the backend factory does not
+    assert LLMFactory.create("cohere", 0.1) is not BackendLLMFactory.create("cohere", 0.1)
+
+
+def test_routed_clients_are_shared_and_wrap_the_shared_members(registry, two_providers):
+    from assistant import LLMFactory
+
+    routed = LLMFactory.create_routed("mock", 0.1)
+
+    assert LLMFactory.create_routed("mock", 0.1) is routed
+    assert routed.providers["mock"] is LLMFactory.create("mock", 0.1)
+    assert routed.providers["cohere"] is LLMFactory.create("cohere", 0.1)
+
+
+def test_routers_over_differently_configured_members_are_kept_apart(registry, two_providers):
+    from assistant import LLMFactory
+    from backend.core.llm.factory import LLMFactory as BackendLLMFactory
+
+    routed = LLMFactory.create_routed("mock", 0.1)
+    backend_routed = BackendLLMFactory.create_routed("mock", 0.1)
+
+    assert routed is not backend_routed
+    assert backend_routed.providers["cohere"] is BackendLLMFactory.create("cohere", 0.1)
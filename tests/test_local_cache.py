@@ -0,0 +1,138 @@
+"""In-process LRU tier: byte budget, recency, TTL, and its place in front of Redis"""
+
+import threading
+import time
+
+import pytest
+
+from backend.core.cache.local_cache import LocalLRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for TTL tests"""
+    now = [1000.0]
+    monkeypatch.setattr("backend.core.cache.local_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used_to_fit_the_byte_budget():
+    cache = LocalLRUCache(max_bytes=100)
+    cache.set("a", "A", 40)
+    cache.set("b", "B", 40)
+    assert cache.get("a") == "A"  # b is now the least recently used
+
+    cache.set("c", "C", 40)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.current_bytes == 80
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = LocalLRUCache(max_bytes=100)
+    cache.set("a", "A", 60)
+    cache.set("a", "A2", 30)
+    cache.set("b", "B", 70)
+
+    assert cache.get("a") == "A2"
+    assert cache.current_bytes == 100
+
+
+def test_entries_larger_than_the_budget_are_not_stored():
+    cache = LocalLRUCache(max_bytes=100)
+    cache.set("a", "A", 50)
+    cache.set("huge", "H", 101)
+
+    assert cache.get("huge") is None
+    assert cache.get("a") == "A"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LocalLRUCache(max_bytes=100, ttl_seconds=60)
+    cache.set("a", "A", 10)
+    clock[0] += 59
+    assert cache.get("a") == "A"
+
+    clock[0] += 1
+
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_delete_clear_and_stats():
+    cache = LocalLRUCache(max_bytes=100)
+    cache.set("a", "A", 10)
+    cache.set("b", "B", 10)
+    assert cache.delete("a") and not cache.delete("a")
+    cache.get("b")
+    cache.get("a")
+    assert cache.get_stats() == {
+        "entries": 1, "bytes": 10, "max_bytes": 100, "hits": 1, "misses": 1, "hit_rate": "50.00%"
+    }
+
+    cache.clear()
+
+    assert cache.get_stats()["entries"] == 0 and cache.current_bytes == 0
+
+
+def test_byte_accounting_stays_consistent_under_concurrency():
+    cache = LocalLRUCache(max_bytes=1000)
+
+    def worker(offset):
+        for i in range(2000):
+            key = f"k{(i * 7 + offset) % 50}"
+            cache.set(key, i, 1 + i % 40)
+            cache.get(f"k{i % 50}")
+            if i % 13 == 0:
+                cache.delete(key)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.current_bytes == sum(size for _, size, _ in cache._entries.values())
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_l1_serves_hits_without_a_redis_round_trip(make_cache, redis_client):
+    cache = make_cache(namespace="t", l1=LocalLRUCache(1024 * 1024, 60))
+    cache.cache_answer("What is ETL?", {"answer": "Extract, transform, load"})
+    redis_client.flushall()  # Only L1 still has it
+
+    response = cache.get_cached_answer("what is etl?")
+
+    assert response == {"answer": "Extract, transform, load", "from_cache": True}
+    assert cache.l1.get_stats()["hits"] == 1
+
+
+def test_invalidations_reach_other_workers_l1(make_cache):
+    first = make_cache(namespace="t", l1=LocalLRUCache(1024 * 1024, 60), pubsub_invalidation=True)
+    second = make_cache(namespace="t", l1=LocalLRUCache(1024 * 1024, 60), pubsub_invalidation=True)
+    first.cache_answer("q1", {"answer": "a"})
+    first.cache_answer("q2", {"answer": "b"})
+    assert second.get_cached_answer("q1") and second.get_cached_answer("q2")
+
+    first.invalidate_cache("q1")
+    deadline = time.monotonic() + 5
+    while second.l1.get_stats()["entries"] != 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert second.l1.get_stats()["entries"] == 1
+
+    first.invalidate_cache()
+    while second.l1.get_stats()["entries"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert second.l1.get_stats()["entries"] == 0
+
+
+def test_close_stops_the_listener_before_closing_its_connection(make_cache):
+    cache = make_cache(namespace="t", l1=LocalLRUCache(1024 * 1024, 60), pubsub_invalidation=True)
+    thread = cache.invalidations._thread
+    assert thread.is_alive()
+
+    cache.invalidations.close()
+
+    assert not thread.is_alive()
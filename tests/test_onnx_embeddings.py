@@ -0,0 +1,49 @@
+"""ONNX Runtime embeddings agree with the PyTorch (sentence-transformers) vectors"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")  # needed by torch.onnx.export
+pytest.importorskip("transformers")
+pytest.importorskip("langchain_community")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from config import Config
+from backend.core.vector_store.onnx_embeddings import FP32_TOLERANCE, INT8_TOLERANCE, ONNXEmbeddings
+
+TEXTS = [
+    "What is a data warehouse?",
+    "Explain the difference between OLTP and OLAP systems",
+    "A fact table stores measurements; dimension tables describe them. " * 12,  # near the model window
+    "Risk management\nin software projects",
+]
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("onnx"))
+
+
+@pytest.fixture(scope="module")
+def reference():
+    model = sentence_transformers.SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    model.max_seq_length = Config.EMBEDDING_MAX_TOKENS
+    return model.encode([text.replace("\n", " ") for text in TEXTS], normalize_embeddings=True)
+
+
+@pytest.mark.parametrize("quantize, tolerance", [(False, FP32_TOLERANCE), (True, INT8_TOLERANCE)])
+def test_vectors_within_tolerance(model_dir, reference, quantize, tolerance):
+    embeddings = ONNXEmbeddings(
+        Config.EMBEDDING_MODEL,
+        model_dir=model_dir,
+        quantize=quantize,
+        max_seq_length=Config.EMBEDDING_MAX_TOKENS
+    )
+    documents = np.array(embeddings.embed_documents(TEXTS))
+    query = np.array(embeddings.embed_query(TEXTS[0]))
+
+    cosine = (documents * reference).sum(axis=1)
+    assert cosine.min() >= 1 - tolerance
+    assert float(query @ reference[0]) >= 1 - tolerance
+    np.testing.assert_allclose(np.linalg.norm(documents, axis=1), 1.0, atol=1e-5)
@@ -0,0 +1,343 @@
+"""Answer-cache invalidation: generations, per-source invalidation and batched deletes"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+
+def _answer(text: str):
+    return {"answer": text, "source_type": "knowledge_base", "sources": []}
+
+
+def _namespace_keys(client, namespace: str):
+    return sorted(key.decode() for key in client.scan_iter(match=f"{namespace}:*"))
+
+
+def test_generation_bump_invalidates_and_prunes_old_answers(make_cache, redis_client):
+    cache = make_cache(namespace="t", batch_size=2)
+    for i in range(5):
+        assert cache.cache_answer(f"question {i}", _answer(f"answer {i}"))
+    assert cache.get_cached_answer("QUESTION 3 ")["answer"] == "answer 3"
+
+    assert cache.invalidate_cache()
+
+    assert cache.get_cached_answer("question 3") is None
+    assert int(redis_client.get("t:generation")) == 1
+    # Old generation's entries are pruned in the background, from Redis and from the index
+    assert _wait_for(lambda: cache._prune_thread is None)
+    assert _namespace_keys(redis_client, "t") == ["t:generation"]
+    assert cache._count_cached_answers() == 0
+
+    cache.cache_answer("question 3", _answer("new answer"))
+    assert cache.get_cached_answer("question 3")["answer"] == "new answer"
+    assert cache._count_cached_answers() == 1
+
+
+def test_other_workers_see_the_new_generation(make_cache):
+    first = make_cache(namespace="t", generation_refresh_seconds=0)
+    second = make_cache(namespace="t", generation_refresh_seconds=0)
+    first.cache_answer("What is a fact table?", _answer("old"))
+    assert second.get_cached_answer("what is a fact table?")["answer"] == "old"
+
+    first.invalidate_cache()
+
+    assert second.get_cached_answer("what is a fact table?") is None
+
+
+def test_bump_returns_without_waiting_for_the_prune(make_cache, redis_client):
+    cache = make_cache(namespace="t")
+    cache.cache_answer("q", _answer("old"))
+    pruning, release = threading.Event(), threading.Event()
+    prune = cache.prune_old_generations
+
+    def slow_prune(current):
+        pruning.set()
+        release.wait(2)
+        return prune(current)
+
+    cache.prune_old_generations = slow_prune
+
+    started = time.monotonic()
+    assert cache.bump_generation() == 1
+    assert cache.bump_generation() == 2  # Coalesces with the running prune
+    assert time.monotonic() - started < 0.5
+    assert pruning.wait(2)
+    assert cache._count_cached_answers() == 1
+
+    release.set()
+    assert _wait_for(lambda: cache._prune_thread is None)
+    assert _namespace_keys(redis_client, "t") == ["t:generation"]
+
+
+def test_prune_keeps_current_and_newer_generations(make_cache, redis_client):
+    cache = make_cache(namespace="t")
+    cache.cache_answer("kept", _answer("a"))
+    redis_client.set("t:generation", 5)
+    cache._refresh_generation()
+    cache.cache_answer("current", _answer("b"))
+
+    assert cache.prune_old_generations(5) == 1
+    assert cache.get_cached_answer("current")["answer"] == "b"
+    assert cache._count_cached_answers() == 1
+
+
+def test_invalidate_source_drops_only_that_files_answers(make_cache, redis_client):
+    cache = make_cache(namespace="t", batch_size=2)
+    for i in range(3):
+        cache.cache_answer(f"about a {i}", _answer("a"), source_files=["a.pdf"])
+    cache.cache_answer("about both", _answer("ab"), source_files=["a.pdf", "b.pdf"])
+    cache.cache_answer("about b", _answer("b"), source_files=["b.pdf"])
+
+    assert cache.invalidate_source("a.pdf") == 4
+
+    assert cache.get_cached_answer("about both") is None
+    assert cache.get_cached_answer("about a 0") is None
+    assert cache.get_cached_answer("about b")["answer"] == "b"
+    assert not redis_client.exists("t:source:a.pdf")
+    assert cache._count_cached_answers() == 1
+    assert cache.invalidate_source("missing.pdf") == 0
+
+
+def test_purge_unlinks_indexed_and_unindexed_keys_in_batches(make_cache, redis_client):
+    cache = make_cache(namespace="t", batch_size=3)
+    for i in range(4):
+        cache.cache_answer(f"question {i}", _answer("x"))
+    # Written without the index (e.g. by a worker predating it)
+    for i in range(7):
+        redis_client.set(f"t:legacy:{i}", b"x")
+
+    unlink = cache.redis_client.unlink
+    calls = []
+    cache.redis_client.unlink = lambda *keys: calls.append(len(keys)) or unlink(*keys)
+
+    assert cache.invalidate_cache(purge=True, scan=True)
+
+    assert _namespace_keys(redis_client, "t") == ["t:generation"]
+    assert calls and max(calls) <= 3 and sum(calls) == 7
+
+
+def test_expired_index_entries_are_not_counted(make_cache, redis_client):
+    cache = make_cache(namespace="t")
+    cache.cache_answer("live", _answer("x"))
+    redis_client.zadd("t:index", {"t:0:expired": time.time() - 1})
+
+    assert cache._count_cached_answers() == 1
+    assert redis_client.zcard("t:index") == 1
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_redis_down_is_skipped_until_it_reconnects(tmp_path):
+    import fakeredis
+
+    from backend.core.cache import RedisCacheManager
+
+    port = _free_port()
+    started = time.monotonic()
+    cache = RedisCacheManager(port=port, namespace="t", retries=3, timeout=0.4, reconnect_interval=0.05)
+    assert time.monotonic() - started < 2
+    assert not cache.enabled
+
+    calls = []
+    cache.redis_client.execute_command = lambda *args, **kwargs: calls.append(args)
+    for _ in range(20):
+        assert cache.get_cached_answer("q") is None
+        assert not cache.cache_answer("q", _answer("a"))
+    assert calls == []  # Only the reconnect loop's PINGs go to Redis while it is down
+    del cache.redis_client.execute_command
+
+    # Knowledge base changed during the outage: answers Redis still holds must not be served
+    assert cache.invalidate_cache()
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert _wait_for(lambda: cache.enabled)
+        assert cache._generation == 1
+        assert cache.cache_answer("q", _answer("a"))
+        assert cache.get_cached_answer("q")["answer"] == "a"
+    finally:
+        cache.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_lost_connection_without_fallback_switches_redis_off(make_cache):
+    import redis
+
+    cache = make_cache(namespace="t", reconnect_interval=0.05)
+    assert cache.enabled
+
+    cache._on_redis_error(redis.ConnectionError("connection reset"))
+
+    assert not cache.enabled
+    assert _wait_for(lambda: cache.enabled)
+
+
+@pytest.fixture
+def outage_cache(make_cache, tmp_path):
+    """Connected manager with a SQLite fallback, then switched to it as if Redis had gone down"""
+    from backend.core.cache import SQLiteCache
+
+    def make(generation: int = 0):
+        cache = make_cache(namespace="t", fallback=SQLiteCache(str(tmp_path / "fallback.sqlite3")))
+        cache.enabled = False
+        cache._generation = generation
+        return cache
+
+    return make
+
+
+def test_write_back_keeps_answers_of_the_current_generation(outage_cache, redis_client):
+    redis_client.set("t:generation", 2)
+    cache = outage_cache(generation=2)
+    cache.cache_answer("q", _answer("from the outage"), source_files=["a.pdf"])
+
+    cache._resume()
+
+    assert cache.enabled
+    assert cache.fallback.store.get_stats()["pending_write_back"] == 0
+    assert cache.get_cached_answer("q")["answer"] == "from the outage"
+    assert redis_client.sismember("t:source:a.pdf", cache._key_for("q", 2))
+
+
+def test_write_back_drops_answers_of_an_outdated_generation(outage_cache, redis_client):
+    # Started while Redis was down (generation unknown: 0); Redis is at 3
+    redis_client.set("t:generation", 3)
+    cache = outage_cache(generation=0)
+    cache.cache_answer("q", _answer("possibly stale"))
+
+    cache._resume()
+
+    assert cache._generation == 3
+    assert cache.get_cached_answer("q") is None
+    assert _namespace_keys(redis_client, "t") == ["t:generation"]
+    assert cache.fallback.store.get_stats()["entries"] == 0
+
+
+def test_write_back_rekeys_answers_after_an_invalidation_during_the_outage(outage_cache, redis_client):
+    redis_client.set("t:generation", 3)
+    cache = outage_cache(generation=0)
+    cache.cache_answer("old", _answer("before the change"))
+    assert cache.invalidate_cache()  # Knowledge base changed: clears the fallback store
+    cache.cache_answer("new", _answer("after the change"))
+
+    cache._resume()
+
+    assert cache._generation == 4
+    assert cache.get_cached_answer("old") is None
+    assert cache.get_cached_answer("new")["answer"] == "after the change"
+    assert cache._count_cached_answers() == 1
+
+
+def test_async_manager_uses_the_local_tiers_off_the_event_loop(outage_cache):
+    import asyncio
+
+    from backend.core.cache import AsyncRedisCacheManager
+
+    cache = outage_cache()
+    threads = []
+    for name in ("get_many", "cache_many", "invalidate_cache"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda *args, method=method: threads.append(threading.current_thread()) or method(*args))
+    async_cache = AsyncRedisCacheManager(cache)
+
+    async def main():
+        assert await async_cache.cache_answer("q", _answer("from SQLite"), semantic=False)
+        hit = await async_cache.get_cached_answer("q")
+        assert await async_cache.invalidate_cache("q")
+        await async_cache.close()
+        return hit
+
+    assert asyncio.run(main())["answer"] == "from SQLite"
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
+
+
+def test_async_manager_flushes_question_counts(make_cache):
+    import asyncio
+
+    from backend.core.cache import AsyncRedisCacheManager
+
+    cache = make_cache(namespace="t", frequency_flush_seconds=0)
+    async_cache = AsyncRedisCacheManager(cache)
+
+    async def main():
+        for question in ["Vacation policy?", "vacation policy?", "Expenses?"]:
+            await async_cache.record_query(question)
+        await async_cache.close()
+
+    asyncio.run(main())
+
+    assert cache.top_queries(10) == [("vacation policy?", 2), ("expenses?", 1)]
+
+
+def test_replace_answer_overwrites_an_unchanged_answer(make_cache):
+    cache = make_cache(namespace="t")
+    other = make_cache(namespace="t")
+    cache.cache_answer("q", _answer("first"))
+
+    assert cache.replace_answer("q", "first", _answer("improved"), source_files=["a.pdf"])
+
+    assert other.get_cached_answer("q")["answer"] == "improved"
+    assert cache.get_cached_answer("q")["answer"] == "improved"
+
+
+def test_replace_answer_leaves_a_regenerated_or_invalidated_answer(make_cache):
+    cache = make_cache(namespace="t", generation_refresh_seconds=0)
+    other = make_cache(namespace="t", generation_refresh_seconds=0)
+    cache.cache_answer("q", _answer("first"))
+    other.cache_answer("q", _answer("regenerated"))
+
+    assert not cache.replace_answer("q", "first", _answer("improved"))
+    assert other.get_cached_answer("q")["answer"] == "regenerated"
+
+    other.invalidate_cache()
+    assert not cache.replace_answer("q", "regenerated", _answer("improved"))
+    assert other.get_cached_answer("q") is None
+
+
+def test_replace_answer_loses_to_a_write_between_read_and_exec(make_cache):
+    from backend.core.cache import LocalLRUCache
+
+    cache = make_cache(namespace="t", l1=LocalLRUCache())
+    other = make_cache(namespace="t")
+    cache.cache_answer("q", _answer("first"))
+    decode = cache.codec.decode
+
+    def decode_then_race(data):
+        # Another worker regenerates the answer after the compare
+        other.cache_answer("q", _answer("regenerated"))
+        return decode(data)
+
+    cache.codec.decode = decode_then_race
+
+    assert not cache.replace_answer("q", "first", _answer("improved"))
+    cache.codec.decode = decode
+    # The improved answer did not stay in L1 either
+    assert cache.get_cached_answer("q")["answer"] == "regenerated"
+
+
+def test_replace_answer_in_the_fallback_store(outage_cache):
+    cache = outage_cache()
+    cache.cache_answer("q", _answer("first"))
+
+    assert not cache.replace_answer("q", "other", _answer("improved"))
+    assert cache.replace_answer("q", "first", _answer("improved"))
+    assert cache.get_cached_answer("q")["answer"] == "improved"
@@ -0,0 +1,140 @@
+"""LLM routing: failover, cooldown of failing providers and hedged requests"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+for module in ("langchain_cohere", "langchain_groq", "langchain_openai"):
+    pytest.importorskip(module)
+
+from backend.core.llm.limiter import LLMOverloadedError
+from backend.core.llm.mock import MockChatModel
+from backend.core.llm.router import RoutingChatModel
+
+
+def _mock(answer: str, **kwargs) -> MockChatModel:
+    return MockChatModel(response=answer, **kwargs)
+
+
+class OverloadedModel(MockChatModel):
+    """Provider whose limiter sheds every call"""
+
+    def _generate(self, *args, **kwargs):
+        raise LLMOverloadedError("queue full")
+
+
+def _warm_up(router: RoutingChatModel, name: str, latency: float, samples: int = 20) -> None:
+    """Give a provider enough latency samples to hedge after"""
+    for _ in range(samples):
+        router._health[name].record(latency, True)
+
+
+def test_needs_a_provider():
+    with pytest.raises(ValueError):
+        RoutingChatModel(providers={})
+
+
+def test_fails_over_to_the_next_provider():
+    router = RoutingChatModel(providers={"a": _mock("from a", failure_rate=1.0), "b": _mock("from b")})
+
+    assert router.invoke("Hi").content == "from b"
+    stats = router.get_stats()["providers"]
+    assert (stats["a"]["failures"], stats["b"]["calls"]) == (1, 1)
+
+
+def test_raises_the_last_error_when_every_provider_fails():
+    router = RoutingChatModel(providers={"a": _mock("a", failure_rate=1.0), "b": _mock("b", failure_rate=1.0)})
+
+    with pytest.raises(ConnectionError):
+        router.invoke("Hi")
+
+
+def test_failing_provider_cools_down_then_is_probed_again():
+    primary = _mock("from a", failure_rate=1.0)
+    router = RoutingChatModel(
+        providers={"a": primary, "b": _mock("from b")},
+        failure_threshold=2, cooldown_seconds=0.2, max_error_rate=1.0  # Cooldown only
+    )
+    router.invoke("Hi")
+    assert router.get_stats()["order"] == ["a", "b"]
+    router.invoke("Hi")
+    assert router.get_stats()["order"] == ["b", "a"]
+
+    router.invoke("Hi")  # Skips a while it cools down
+    assert router.get_stats()["providers"]["a"]["calls"] == 2
+
+    time.sleep(0.2)
+    primary.failure_rate = 0.0
+    assert router.invoke("Hi").content == "from a"
+    assert router.get_stats()["order"] == ["a", "b"]
+
+
+def test_overloaded_provider_is_skipped_without_counting_as_a_failure():
+    router = RoutingChatModel(providers={"a": OverloadedModel(), "b": _mock("from b")})
+
+    assert router.invoke("Hi").content == "from b"
+    assert router.get_stats()["providers"]["a"]["calls"] == 0
+
+
+def test_slow_primary_is_hedged_and_the_backup_wins():
+    router = RoutingChatModel(
+        providers={"a": _mock("from a", latency_ms=500), "b": _mock("from b")}, hedge=True
+    )
+    _warm_up(router, "a", latency=0.01)
+
+    assert router.invoke("Hi").content == "from b"
+    stats = router.get_stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_fast_primary_is_not_hedged():
+    router = RoutingChatModel(providers={"a": _mock("from a"), "b": _mock("from b")}, hedge=True)
+    _warm_up(router, "a", latency=1.0)
+
+    assert router.invoke("Hi").content == "from a"
+    assert router.get_stats()["hedges"] == 0
+
+
+def test_no_hedging_before_enough_samples():
+    router = RoutingChatModel(
+        providers={"a": _mock("from a", latency_ms=100), "b": _mock("from b")}, hedge=True
+    )
+    _warm_up(router, "a", latency=0.01, samples=5)
+
+    assert router.invoke("Hi").content == "from a"
+    assert router.get_stats()["hedges"] == 0
+
+
+def test_async_slow_primary_is_hedged_and_the_backup_wins():
+    router = RoutingChatModel(
+        providers={"a": _mock("from a", latency_ms=500), "b": _mock("from b")}, hedge=True
+    )
+    _warm_up(router, "a", latency=0.01)
+
+    assert asyncio.run(router.ainvoke("Hi")).content == "from b"
+    stats = router.get_stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_concurrent_hedges_are_all_counted():
+    router = RoutingChatModel(
+        providers={"a": _mock("from a", latency_ms=200), "b": _mock("from b")}, hedge=True
+    )
+    _warm_up(router, "a", latency=0.01)
+
+    threads = [threading.Thread(target=router.invoke, args=("Hi",)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = router.get_stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (16, 16)
+
+
+def test_stream_fails_over_before_the_first_token():
+    router = RoutingChatModel(providers={"a": _mock("from a", failure_rate=1.0), "b": _mock("from b")})
+
+    assert "".join(chunk.content for chunk in router.stream("Hi")) == "from b"
@@ -0,0 +1,73 @@
+"""Semantic question index: near-duplicate matches, stale matches and hit counting"""
+
+import threading
+
+from backend.core.cache.semantic_cache import SemanticAnswerCache
+
+
+class KeywordEmbeddings:
+    """Bag-of-words vectors over a fixed vocabulary"""
+
+    VOCABULARY = ["vacation", "days", "policy", "many", "expenses", "the", "how", "what"]
+
+    def embed_query(self, text):
+        words = text.replace("?", "").split()
+        return [float(words.count(word)) for word in self.VOCABULARY]
+
+
+def _index(*questions, threshold: float = 0.8) -> SemanticAnswerCache:
+    cache = SemanticAnswerCache(KeywordEmbeddings(), threshold=threshold, sample_rate=1.0)
+    for question in questions:
+        cache.add(question)
+    return cache
+
+
+def test_near_duplicate_gets_the_matched_answer():
+    cache = _index("How many vacation days?")
+    answers = {"how many vacation days?": {"answer": "Twenty-five"}}
+
+    response = cache.find_answer("how many vacation days", answers.get)
+
+    assert response["answer"] == "Twenty-five"
+    assert response["semantic_match"]["question"] == "how many vacation days?"
+    stats = cache.get_stats()
+    assert (stats["lookups"], stats["hits"], len(stats["sampled_hits"])) == (1, 1, 1)
+
+
+def test_match_without_an_answer_is_not_a_hit_and_leaves_the_index():
+    cache = _index("How many vacation days?")
+
+    assert cache.find_answer("how many vacation days", lambda question: None) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["entries"]) == (0, 0)
+    assert cache.lookup("how many vacation days") is None
+
+
+def test_valid_neighbour_wins_once_a_stale_match_is_dropped():
+    cache = _index("How many vacation days?", "What vacation days policy?", threshold=0.45)
+    answers = {"what vacation days policy?": {"answer": "See the handbook"}}
+
+    assert cache.find_answer("how many vacation days", answers.get) is None
+    response = cache.find_answer("how many vacation days", answers.get)
+
+    assert response["answer"] == "See the handbook"
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_concurrent_hits_are_all_counted():
+    cache = _index("How many vacation days?")
+    answers = {"how many vacation days?": {"answer": "Twenty-five"}}
+
+    def find():
+        for _ in range(200):
+            cache.find_answer("how many vacation days", answers.get)
+
+    threads = [threading.Thread(target=find) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.get_stats()
+    assert (stats["lookups"], stats["hits"]) == (1600, 1600)
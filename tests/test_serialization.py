@@ -0,0 +1,136 @@
+"""Cached answer encoding: every format round-trips and every reader understands every format"""
+
+import json
+
+import pytest
+
+from backend.core.cache import serialization
+from backend.core.cache.serialization import COMPRESSED, FORMAT_MSGPACK, FORMAT_ORJSON, AnswerCodec
+
+RESPONSE = {
+    "answer": "Überstunden are paid at 125% — see § 4.",
+    "source_type": "knowledge_base",
+    "sources": [{"file": "handbook.pdf", "page": 3, "score": 0.82}],
+    "stale": False,
+    "note": None,
+}
+
+
+def _long_response():
+    return dict(RESPONSE, answer="Overtime is paid at 125%. " * 100)
+
+
+@pytest.mark.parametrize("format", ["json", "orjson", "msgpack"])
+def test_round_trips(format):
+    if format != "json":
+        pytest.importorskip(format)
+    codec = AnswerCodec(format=format)
+
+    assert codec.decode(codec.encode(RESPONSE)) == RESPONSE
+
+
+def test_json_is_the_legacy_text_encoding():
+    data = AnswerCodec(format="json").encode(RESPONSE)
+
+    assert data[:1] == b"{"
+    assert json.loads(data) == RESPONSE
+
+
+@pytest.mark.parametrize("format, header", [("orjson", FORMAT_ORJSON), ("msgpack", FORMAT_MSGPACK)])
+def test_binary_formats_carry_a_header_byte(format, header):
+    pytest.importorskip(format)
+
+    assert AnswerCodec(format=format).encode(RESPONSE)[0] == header
+
+
+@pytest.mark.parametrize("format", ["orjson", "msgpack"])
+def test_reads_legacy_json_entries(format):
+    pytest.importorskip(format)
+    codec = AnswerCodec(format=format)
+    legacy = json.dumps(RESPONSE)
+
+    assert codec.decode(legacy) == RESPONSE
+    assert codec.decode(legacy.encode()) == RESPONSE
+
+
+def test_reads_entries_written_in_another_format():
+    pytest.importorskip("orjson")
+    pytest.importorskip("msgpack")
+    orjson_codec = AnswerCodec(format="orjson")
+    msgpack_codec = AnswerCodec(format="msgpack")
+
+    assert orjson_codec.decode(msgpack_codec.encode(RESPONSE)) == RESPONSE
+    assert msgpack_codec.decode(orjson_codec.encode(RESPONSE)) == RESPONSE
+    # Rolled back to json: still reads what newer workers wrote
+    assert AnswerCodec(format="json").decode(orjson_codec.encode(RESPONSE)) == RESPONSE
+
+
+@pytest.mark.parametrize("format", ["orjson", "msgpack"])
+def test_compresses_large_payloads_with_zstd(format):
+    pytest.importorskip(format)
+    pytest.importorskip("zstandard")
+    codec = AnswerCodec(format=format, compression="zstd", compress_min_bytes=1024)
+    response = _long_response()
+
+    data = codec.encode(response)
+
+    assert data[0] & COMPRESSED
+    assert len(data) < len(AnswerCodec(format=format).encode(response))
+    assert codec.decode(data) == response
+    # Readers without compression configured still decompress
+    assert AnswerCodec(format=format).decode(data) == response
+
+
+def test_small_payloads_are_stored_uncompressed():
+    pytest.importorskip("orjson")
+    pytest.importorskip("zstandard")
+    codec = AnswerCodec(format="orjson", compression="zstd", compress_min_bytes=1024)
+
+    data = codec.encode(RESPONSE)
+
+    assert data[0] == FORMAT_ORJSON
+    assert codec.decode(data) == RESPONSE
+
+
+def test_json_format_is_never_compressed():
+    pytest.importorskip("zstandard")
+    codec = AnswerCodec(format="json", compression="zstd", compress_min_bytes=0)
+
+    assert codec.compression is None
+    assert codec.encode(RESPONSE)[:1] == b"{"
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        AnswerCodec(format="pickle")
+
+
+def test_unknown_header_is_rejected():
+    with pytest.raises(ValueError, match="header"):
+        AnswerCodec(format="json").decode(b"\x05payload")
+
+
+def test_falls_back_to_json_when_the_codec_is_missing(monkeypatch):
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+    monkeypatch.setattr(serialization, "MSGPACK_AVAILABLE", False)
+
+    assert AnswerCodec(format="orjson").format == "json"
+    assert AnswerCodec(format="msgpack").format == "json"
+
+
+def test_orjson_entries_decode_without_orjson(monkeypatch):
+    pytest.importorskip("orjson")
+    data = AnswerCodec(format="orjson").encode(RESPONSE)
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+
+    assert AnswerCodec(format="json").decode(data) == RESPONSE
+
+
+def test_compressed_entries_need_zstandard(monkeypatch):
+    pytest.importorskip("orjson")
+    pytest.importorskip("zstandard")
+    data = AnswerCodec(format="orjson", compression="zstd", compress_min_bytes=0).encode(RESPONSE)
+    monkeypatch.setattr(serialization, "ZSTD_AVAILABLE", False)
+
+    with pytest.raises(ValueError, match="zstandard"):
+        AnswerCodec(format="orjson").decode(data)
@@ -0,0 +1,130 @@
+"""Request coalescing within a worker and across workers, sync and async"""
+
+import asyncio
+import threading
+import time
+
+from backend.core.cache import (
+    AsyncRedisCacheManager, AsyncRedisSingleFlight, AsyncSingleFlight, RedisSingleFlight, SingleFlight
+)
+
+
+def _answer(text: str):
+    return {"answer": text, "source_type": "general_knowledge", "sources": []}
+
+
+def test_concurrent_callers_share_one_computation():
+    single_flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def generate():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return _answer("shared")
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(single_flight.do("Question?", generate)))
+    leader.start()
+    started.wait(1)
+    followers = [
+        threading.Thread(target=lambda: results.append(single_flight.do(" question? ", generate)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result["answer"] for result in results] == ["shared"] * 4
+    assert single_flight.get_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 3}
+
+
+def test_async_callers_share_one_task():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return _answer("shared")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("Question?", generate) for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [result["answer"] for result in results] == ["shared"] * 4
+    # Followers get copies: one caller's edits do not leak into another's answer
+    assert len({id(result) for result in results}) == 4
+
+
+def test_workers_wait_for_the_worker_holding_the_redis_lock(make_cache):
+    first = make_cache(namespace="t")
+    second = make_cache(namespace="t")
+    calls = []
+
+    def generate(cache, answer):
+        def run():
+            calls.append(answer)
+            time.sleep(0.2)
+            cache.cache_answer("Question?", _answer(answer))
+            return _answer(answer)
+        return run
+
+    results = {}
+    leader = threading.Thread(
+        target=lambda: results.update(first=RedisSingleFlight(first).do("Question?", generate(first, "first")))
+    )
+    leader.start()
+    time.sleep(0.05)
+    follower = RedisSingleFlight(second, poll_interval=0.02)
+    results["second"] = follower.do("Question?", generate(second, "second"))
+    leader.join()
+
+    assert calls == ["first"]
+    assert results["second"]["answer"] == "first"
+    assert follower.get_stats()["remote_waits"] == 1
+
+
+def test_async_workers_wait_for_the_worker_holding_the_redis_lock(make_cache):
+    workers = [AsyncRedisCacheManager(make_cache(namespace="t")) for _ in range(2)]
+    flights = [AsyncRedisSingleFlight(worker, poll_interval=0.02) for worker in workers]
+    calls = []
+
+    def generate(worker, answer):
+        async def run():
+            calls.append(answer)
+            await asyncio.sleep(0.2)
+            await worker.cache_answer("Question?", _answer(answer))
+            return _answer(answer)
+        return run
+
+    async def main():
+        leader = asyncio.ensure_future(flights[0].do("Question?", generate(workers[0], "first")))
+        await asyncio.sleep(0.05)
+        follower = await flights[1].do("question?", generate(workers[1], "second"))
+        results = [await leader, follower]
+        for worker in workers:
+            await worker.close()
+        return results
+
+    results = asyncio.run(main())
+
+    assert calls == ["first"]
+    assert [result["answer"] for result in results] == ["first", "first"]
+    assert flights[1].get_stats()["remote_waits"] == 1
+
+
+def test_async_coalescing_without_redis_still_runs(make_cache):
+    cache = make_cache(namespace="t")
+    cache.enabled = False
+    single_flight = AsyncRedisSingleFlight(AsyncRedisCacheManager(cache))
+
+    async def generate():
+        return _answer("local")
+
+    assert asyncio.run(single_flight.do("Question?", generate))["answer"] == "local"
@@ -0,0 +1,115 @@
+"""Streamed answers: event order for fresh, cached, knowledge-base and failed answers"""
+
+import pytest
+
+for module in ("langchain_cohere", "langchain_groq", "langchain_openai", "langchain_community"):
+    pytest.importorskip(module)
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from backend.core.llm.limiter import LLMOverloadedError
+from backend.core.llm.mock import MockChatModel
+
+OVERTIME = Document(page_content="Overtime is paid at 125%.", metadata={"filename": "handbook.pdf", "page": 3})
+
+
+def _stream(assistant, question, session_id=None):
+    return list(assistant.ask_stream(question, session_id))
+
+
+def _names(events):
+    return [event["event"] for event in events]
+
+
+def test_fresh_answer_streams_metadata_tokens_then_done(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(response="Paris is the capital of France"))
+
+    events = _stream(assistant, "What is the capital of France?")
+
+    names = _names(events)
+    assert names[0] == "metadata" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"} and len(names) > 3  # Word by word
+    assert events[0] == {"event": "metadata", "source_type": "general_knowledge", "sources": [], "from_cache": False}
+    assert "".join(event["text"] for event in events[1:-1]) == "Paris is the capital of France"
+    assert 0 <= events[-1]["ttft_ms"] <= events[-1]["total_ms"]
+
+
+def test_cached_answer_streams_as_one_token(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(response="Paris is the capital of France"))
+    _stream(assistant, "What is the capital of France?")
+
+    events = _stream(assistant, "what is the capital of france?")
+
+    assert _names(events) == ["metadata", "token", "done"]
+    assert events[0]["from_cache"] is True
+    assert events[1]["text"] == "Paris is the capital of France"
+    assert events[2]["ttft_ms"] == events[2]["total_ms"]
+
+
+def test_knowledge_base_sources_precede_the_tokens(make_assistant):
+    assistant = make_assistant(documents=[OVERTIME], llm=MockChatModel(response="At 125%"))
+
+    events = _stream(assistant, "How is overtime paid?")
+
+    metadata = events[0]
+    assert metadata["event"] == "metadata" and metadata["source_type"] == "knowledge_base"
+    assert metadata["sources"][0]["title"] == "Source: handbook.pdf"
+    assert _names(events)[1:] == ["token", "token", "done"]
+
+
+def test_failed_stream_ends_with_an_error_and_is_not_cached(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(failure_rate=1.0))
+
+    events = _stream(assistant, "What is the capital of France?")
+
+    # Fails before the first token: no metadata for an answer that never comes
+    assert _names(events) == ["error"]
+    assert "Mock provider failure" in events[0]["message"]
+    assert assistant.cache_manager.get_cached_answer("What is the capital of France?") is None
+
+
+def _failing_chain(error: Exception) -> RunnableLambda:
+    def fail(inputs):
+        raise error
+    return RunnableLambda(fail)
+
+
+def test_knowledge_base_failure_before_the_first_token_falls_back_to_general(make_assistant):
+    assistant = make_assistant(documents=[OVERTIME], llm=MockChatModel(response="Usually time and a half"))
+    assistant.rag_chain = _failing_chain(ConnectionError("provider down"))
+
+    events = _stream(assistant, "How is overtime paid?")
+
+    assert events[0] == {"event": "metadata", "source_type": "general_knowledge", "sources": [], "from_cache": False}
+    assert _names(events)[-1] == "done"
+    assert "".join(event["text"] for event in events[1:-1]) == "Usually time and a half"
+    cached = assistant.cache_manager.get_cached_answer("How is overtime paid?")
+    assert cached["source_type"] == "general_knowledge"
+
+
+def test_overloaded_knowledge_base_stream_is_not_retried(make_assistant):
+    assistant = make_assistant(documents=[OVERTIME], llm=MockChatModel(response="Usually time and a half"))
+    assistant.rag_chain = _failing_chain(LLMOverloadedError("queue full"))
+
+    events = _stream(assistant, "How is overtime paid?")
+
+    assert _names(events) == ["error"]
+    assert "queue full" in events[0]["message"]
+
+
+def test_uninitialized_assistant_streams_only_an_error(make_assistant):
+    assistant = make_assistant()
+    assistant.is_initialized = False
+
+    assert _names(_stream(assistant, "Hello?")) == ["error"]
+
+
+def test_streamed_exchange_is_remembered(make_assistant):
+    assistant = make_assistant(llm=MockChatModel(response="Noted"))
+
+    _stream(assistant, "My name is Ada.", session_id="s1")
+
+    history = assistant._format_chat_history("s1")
+    assert "My name is Ada." in history and "Noted" in history
+    assert "My name is Ada." not in assistant._format_chat_history("s2")
@@ -0,0 +1,154 @@
+"""Cache warming: candidate collection, skipping cached answers, concurrency and rate limits"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.core.cache.warmer import CacheWarmer, top_questions_from_logs
+
+
+class FakeCache:
+    """get_many / top_queries over a plain dict"""
+
+    def __init__(self, answers=None, top=None):
+        self.answers = answers or {}
+        self.top = top or []
+
+    def get_many(self, questions):
+        return [self.answers.get(question) for question in questions]
+
+    def top_queries(self, limit=100, days=None):
+        return self.top[:limit]
+
+
+def _answer(text):
+    return {"answer": text, "source_type": "general_knowledge", "sources": []}
+
+
+def _log_line(when, question):
+    return f"{when:%Y-%m-%d %H:%M:%S} - assistant - INFO - ❓ Question: {question}\n"
+
+
+def test_top_questions_from_logs_counts_recent_questions(tmp_path):
+    now = datetime.now()
+    (tmp_path / "app.log.1").write_text(
+        _log_line(now - timedelta(days=30), "Old question")
+        + _log_line(now - timedelta(days=30), "Old question")
+        + _log_line(now - timedelta(hours=2), "what is the vacation policy?"),
+        encoding="utf-8"
+    )
+    os.utime(tmp_path / "app.log.1", (time.time() - 60, time.time() - 60))
+    (tmp_path / "app.log").write_text(
+        _log_line(now - timedelta(hours=1), "What is the vacation policy?")
+        + f"{now:%Y-%m-%d %H:%M:%S} - assistant - INFO - 📝 Cache miss - generating new response\n"
+        + _log_line(now, "Who approves expenses?"),
+        encoding="utf-8"
+    )
+
+    top = top_questions_from_logs(tmp_path, limit=10, days=7)
+
+    # Latest spelling wins; lines older than the window are ignored
+    assert top == [("What is the vacation policy?", 2), ("Who approves expenses?", 1)]
+
+
+def test_collect_merges_the_redis_counter_with_logs(tmp_path):
+    now = datetime.now()
+    (tmp_path / "app.log").write_text(
+        "".join(_log_line(now, "Who approves expenses?") for _ in range(5))
+        + _log_line(now, "what is the vacation policy?"),
+        encoding="utf-8"
+    )
+    cache = FakeCache(top=[("what is the vacation policy?", 3), ("who approves expenses?", 2)])
+
+    questions = CacheWarmer(cache, _answer).collect(limit=10, log_dir=tmp_path)
+
+    # Both sources saw the same requests: the larger count ranks, not the sum
+    assert questions == ["who approves expenses?", "what is the vacation policy?"]
+
+
+def test_collect_reads_question_counts_from_redis(make_cache):
+    cache = make_cache(namespace="t", frequency_flush_seconds=0)
+    for question in ["Vacation policy?", "vacation policy?", "Expenses?"]:
+        cache.record_query(question)
+
+    assert CacheWarmer(cache, _answer).collect(limit=10) == ["vacation policy?", "expenses?"]
+
+
+def test_warm_only_generates_uncached_questions():
+    cache = FakeCache(answers={"cached": _answer("hit")})
+    generated = []
+    warmer = CacheWarmer(cache, lambda question: generated.append(question) or _answer(question), rate_per_second=0)
+
+    stats = warmer.warm(["cached", "a", "b"])
+
+    assert sorted(generated) == ["a", "b"]
+    assert stats == {"candidates": 3, "already_cached": 1, "warmed": 2, "failed": 0, "running": False}
+
+
+def test_failures_and_error_answers_count_as_failed():
+    def generate(question):
+        if question == "raises":
+            raise RuntimeError("LLM down")
+        if question == "error":
+            return {"answer": "Sorry, I encountered an error: LLM down", "source_type": "error", "sources": []}
+        return _answer(question)
+
+    stats = CacheWarmer(FakeCache(), generate, rate_per_second=0).warm(["raises", "error", "ok"])
+
+    assert (stats["warmed"], stats["failed"]) == (1, 2)
+
+
+def test_warm_respects_max_concurrency():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def generate(question):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return _answer(question)
+
+    stats = CacheWarmer(FakeCache(), generate, max_concurrency=2, rate_per_second=0).warm([str(i) for i in range(8)])
+
+    assert stats["warmed"] == 8
+    assert peak[0] == 2
+
+
+def test_warm_spaces_out_generation_starts():
+    starts = []
+    warmer = CacheWarmer(FakeCache(), lambda question: starts.append(time.monotonic()) or _answer(question),
+                         max_concurrency=4, rate_per_second=20)
+
+    warmer.warm(["a", "b", "c", "d"])
+
+    starts.sort()
+    assert starts[-1] - starts[0] >= 3 / 20 * 0.9
+
+
+def test_stop_ends_a_running_warm():
+    warmer = CacheWarmer(FakeCache(), _answer, rate_per_second=10)
+    warmer.stop()
+
+    stats = warmer.warm([str(i) for i in range(50)])
+
+    assert stats["warmed"] == 0
+
+
+def test_start_runs_in_the_background_once():
+    release = threading.Event()
+
+    def generate(question):
+        release.wait(5)
+        return _answer(question)
+
+    warmer = CacheWarmer(FakeCache(top=[("q", 1)]), generate, rate_per_second=0)
+    assert warmer.start(limit=10)
+    assert not warmer.start(limit=10)
+
+    release.set()
+    warmer._thread.join(5)
+    assert warmer.get_stats()["warmed"] == 1
@@ -4,13 +4,18 @@ Handles embeddings and similarity search
 """
 
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from langchain_core.documents import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 
 from config import Config
+from backend.core.vector_store.chunk_ids import make_chunk_ids
+from backend.core.vector_store.occurrences import (
+    StoredChunk, forget_occurrences, iter_chunks, record_occurrences, release_chunks
+)
+from backend.core.vector_store.onnx_embeddings import ONNXEmbeddings
 from backend.utils import get_core_logger
 
 logger = get_core_logger()
@@ -25,11 +30,21 @@ class VectorStoreManager:
         self.vector_store: Optional[Chroma] = None
         
     def _create_embeddings(self):
-        """Create embedding model (free HuggingFace)"""
-        logger.info(" Loading embedding model...")
+        """Create embedding model (free HuggingFace, PyTorch or ONNX Runtime)"""
+        logger.info(f" Loading embedding model ({Config.EMBEDDING_BACKEND})...")
+        
+        if Config.EMBEDDING_BACKEND == "onnx":
+            try:
+                return ONNXEmbeddings(
+                    model_name=Config.EMBEDDING_MODEL,
+                    model_dir=os.path.join(Config.ONNX_MODEL_DIR, Config.EMBEDDING_MODEL.replace("/", "__")),
+                    quantize=Config.ONNX_QUANTIZE
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ ONNX embeddings unavailable, falling back to PyTorch: {e}")
         
         return HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            model_name=Config.EMBEDDING_MODEL,
             model_kwargs={'device': 'cpu'},
             encode_kwargs={'normalize_embeddings': True}
         )
@@ -38,8 +53,11 @@ class VectorStoreManager:
         """Create new vector store from documents"""
         logger.info(f"📊 Creating vector store with {len(documents)} documents...")
         
+        documents, ids = self._with_ids(documents)
+        
         self.vector_store = Chroma.from_documents(
             documents=documents,
+            ids=ids,
             embedding=self.embeddings,
             persist_directory=self.persist_directory,
             collection_metadata={"hnsw:space": "cosine"}
@@ -68,14 +86,95 @@ class VectorStoreManager:
                 return False
         return False
     
+    def _with_ids(self, documents: List[Document]) -> Tuple[List[Document], List[str]]:
+        """Pair chunks with deterministic IDs, dropping repeats within the batch"""
+        unique = {}
+        for doc, doc_id in zip(documents, make_chunk_ids(documents)):
+            unique.setdefault(doc_id, doc)
+        return list(unique.values()), list(unique.keys())
+    
     def add_documents(self, documents: List[Document]) -> None:
-        """Add new documents to existing store"""
+        """Add new documents to existing store (upsert by chunk ID)"""
         if self.vector_store is None:
             self.create_vector_store(documents)
         else:
-            self.vector_store.add_documents(documents)
+            documents, ids = self._with_ids(documents)
+            self.vector_store.add_documents(documents, ids=ids)
             logger.info(f" Added {len(documents)} documents")
     
+    def get_document_chunk_ids(self, filename: str) -> List[str]:
+        """IDs of all chunks stored for a source file"""
+        if self.vector_store is None:
+            return []
+        
+        return self.vector_store.get(where={"filename": filename}, include=[])["ids"]
+    
+    def update_document(self, filename: str, documents: List[Document]) -> Dict:
+        """
+        Sync one source file's chunks with the store
+        Only new/changed chunks are embedded; vanished ones are deleted (or
+        handed over to other files that contain them, listed in "moved")
+        """
+        documents, ids = self._with_ids(documents)
+        existing = set(self.get_document_chunk_ids(filename))
+        current = set(ids)
+        
+        stale = [doc_id for doc_id in existing if doc_id not in current]
+        new = [(doc, doc_id) for doc, doc_id in zip(documents, ids) if doc_id not in existing]
+        
+        moved = self.release_chunks(stale, filename) if stale else []
+        
+        if new:
+            new_docs, new_ids = zip(*new)
+            if self.vector_store is None:
+                self.create_vector_store(list(new_docs))
+            else:
+                self.vector_store.add_documents(list(new_docs), ids=list(new_ids))
+        
+        result = {
+            "added": len(new),
+            "deleted": len(stale) - len(moved),
+            "unchanged": len(ids) - len(new),
+            "reassigned": len(moved)
+        }
+        logger.info(f"🔄 Updated {filename}: {result}")
+        result["moved"] = moved
+        return result
+    
+    def delete_document(self, filename: str) -> Tuple[int, List[StoredChunk]]:
+        """
+        Delete all chunks of a source file
+        
+        Returns:
+            (chunks deleted, chunks handed over to other files that contain them)
+        """
+        ids = self.get_document_chunk_ids(filename)
+        moved = self.release_chunks(ids, filename) if ids else []
+        if self.vector_store is not None:
+            forget_occurrences(self.vector_store._collection, filename)
+        
+        logger.info(f"🗑️ Deleted {len(ids) - len(moved)} chunks of {filename}")
+        return len(ids) - len(moved), moved
+    
+    def release_chunks(self, ids: List[str], filename: str) -> List[StoredChunk]:
+        """Delete chunks of a file; ones other files also contain are re-stored under one of them"""
+        return release_chunks(self.vector_store._collection, ids, filename)
+    
+    def record_occurrences(self, occurrences: Dict[str, List[str]]) -> None:
+        """Record where dropped duplicate chunks appeared on their kept chunks"""
+        if self.vector_store is not None and occurrences:
+            record_occurrences(self.vector_store._collection, occurrences)
+    
+    def forget_occurrences(self, filename: str) -> None:
+        """Drop a file's duplicate locations (before it is re-ingested)"""
+        if self.vector_store is not None:
+            forget_occurrences(self.vector_store._collection, filename)
+    
+    def iter_chunks(self) -> Iterator[StoredChunk]:
+        """Every stored chunk as (chunk ID, text, metadata)"""
+        if self.vector_store is not None:
+            yield from iter_chunks(self.vector_store._collection)
+    
     def similarity_search_with_score(
         self, 
         query: str, 